@@ -0,0 +1,215 @@
+"""
+Конвейерная обработка пакетов с отдельными пулами для каждого вида работы.
+
+Этапы одного пакета:
+    mermaid  - генерация и сохранение Mermaid диаграммы (пул потоков);
+    render   - отрисовка графа (пул процессов, бэкенд Agg);
+    compare  - запуск pipdeptree и сравнение графов (пул потоков, подпроцесс);
+    compare_render - сравнительная визуализация, ставится в очередь сразу
+                     после завершения compare этого пакета (пул процессов).
+
+Пакеты друг от друга не зависят, поэтому этапы всех пакетов выполняются
+одновременно, а результаты выдаются по мере готовности. Ошибка этапа
+записывается в его результат и не останавливает остальные пакеты.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import instrumentation
+from render_pipeline import RenderJob, create_render_pool, render_job, submit_render
+
+# Названия этапов
+MERMAID = 'mermaid'
+RENDER = 'render'
+COMPARE = 'compare'
+COMPARE_RENDER = 'compare_render'
+
+
+class StageResult:
+    """
+    Результат одного этапа обработки пакета
+
+    Args:
+        package_name: Пакет
+        stage: Название этапа
+        seconds: Время выполнения этапа
+        output_file: Созданный файл (если есть)
+        error: Текст ошибки (None - этап выполнен успешно)
+        details: Данные этапа (для compare - результат сравнения графов)
+    """
+
+    __slots__ = ('package_name', 'stage', 'seconds', 'output_file', 'error', 'details')
+
+    def __init__(self, package_name: str, stage: str, seconds: float, output_file: Optional[str] = None,
+                 error: Optional[str] = None, details: Optional[Dict] = None):
+        self.package_name = package_name
+        self.stage = stage
+        self.seconds = seconds
+        self.output_file = output_file
+        self.error = error
+        self.details = details
+
+
+class PackagePipeline:
+    """
+    Конвейер обработки списка пакетов
+
+    Args:
+        mermaid_generator: MermaidGenerator с построенным графом
+        visualizer: GraphVisualizer (используется потоками compare и при render_workers=0)
+        comparer: ComparisonTool
+        io_workers: Размер пула потоков для Mermaid и pipdeptree
+        render_workers: Число процессов отрисовки (0 - рисовать в текущем процессе,
+                        например для интерактивного показа окон)
+        output_dir: Каталог изображений
+        mermaid_dir: Каталог Mermaid диаграмм
+    """
+
+    def __init__(self, mermaid_generator, visualizer, comparer, io_workers: int = 8,
+                 render_workers: Optional[int] = None, output_dir: str = 'examples',
+                 mermaid_dir: str = 'mermaid_files'):
+        self.mermaid_generator = mermaid_generator
+        self.visualizer = visualizer
+        self.comparer = comparer
+        self.parser = visualizer.parser
+        self.io_workers = io_workers
+        self.render_workers = render_workers
+        self.output_dir = output_dir
+        self.mermaid_dir = mermaid_dir
+
+    def _image_file(self, prefix: str) -> str:
+        extension = self.visualizer.image_format or 'png'
+        return f"{self.output_dir}/{prefix}.{extension}"
+
+    def _mermaid_stage(self, package_name: str) -> StageResult:
+        started = time.perf_counter()
+        mermaid_code = self.mermaid_generator.generate_mermaid_graph(package_name)
+        mermaid_file = f"{self.mermaid_dir}/{package_name}_dependencies.mmd"
+        with open(mermaid_file, 'w', encoding='utf-8') as f:
+            f.write(mermaid_code)
+        return StageResult(package_name, MERMAID, time.perf_counter() - started, mermaid_file)
+
+    def _compare_stage(self, package_name: str) -> StageResult:
+        started = time.perf_counter()
+        with instrumentation.span('pipeline.compare', package=package_name):
+            official_graph = self.comparer.create_official_graph(package_name)
+            details = {'official_edges': list(official_graph.edges())}
+            if official_graph.number_of_nodes() > 0:
+                our_graph = self.visualizer.create_networkx_graph(package_name)
+                details['comparison'] = self.comparer.compare_graphs(our_graph, official_graph)
+        return StageResult(package_name, COMPARE, time.perf_counter() - started, details=details)
+
+    def _layout_positions(self, package_name: str) -> Dict[str, tuple]:
+        """
+        Раскладка графа пакета для обеих задач отрисовки
+
+        Считается в основном процессе: кэш раскладок у каждого рабочего
+        процесса свой, и одиночная и сравнительная визуализации пакета
+        могут попасть в разные процессы.
+        """
+        positions = self.visualizer.layout(self.visualizer.create_networkx_graph(package_name))
+        return {node: (float(x), float(y)) for node, (x, y) in positions.items()}
+
+    def _render_inline(self, job: RenderJob) -> Future:
+        """Отрисовать в текущем процессе и вернуть уже завершенный Future"""
+        future = Future()
+        future.set_result(render_job(self.visualizer, job))
+        return future
+
+    def run(self, packages: Iterable[str]) -> Iterator[StageResult]:
+        """
+        Обработать пакеты, выдавая результаты этапов по мере завершения
+
+        Args:
+            packages: Названия пакетов
+
+        Yields:
+            StageResult каждого этапа каждого пакета
+        """
+        packages = list(dict.fromkeys(packages))
+        if not packages:
+            return
+
+        render_pool = None
+        if self.render_workers != 0:
+            render_pool = create_render_pool(self.parser, self.render_workers,
+                                             self.visualizer.dpi, self.visualizer.image_format)
+
+        def submit(job: RenderJob) -> Future:
+            if render_pool is None:
+                return self._render_inline(job)
+            return submit_render(render_pool, job)
+
+        pending: Dict[Future, tuple] = {}
+        layouts: Dict[str, Dict[str, tuple]] = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.io_workers) as io_pool:
+                for index, package_name in enumerate(packages, 1):
+                    pending[io_pool.submit(self._mermaid_stage, package_name)] = (package_name, MERMAID)
+                    pending[io_pool.submit(self._compare_stage, package_name)] = (package_name, COMPARE)
+                    image_file = self._image_file(f"example{index}")
+                    layouts[package_name] = self._layout_positions(package_name)
+                    job = RenderJob(package_name, image_file, positions=layouts[package_name])
+                    pending[submit(job)] = (package_name, RENDER)
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        package_name, stage = pending.pop(future)
+                        result = self._collect(future, package_name, stage)
+
+                        if stage == COMPARE and result.error is None and 'comparison' in result.details:
+                            job = RenderJob(package_name, self._image_file(f"comparison_{package_name}"),
+                                            result.details['official_edges'],
+                                            positions=layouts[package_name])
+                            pending[submit(job)] = (package_name, COMPARE_RENDER)
+
+                        yield result
+        finally:
+            if render_pool is not None:
+                # При досрочном прекращении обхода не ждем оставшиеся отрисовки
+                render_pool.shutdown(wait=not pending, cancel_futures=True)
+
+    @staticmethod
+    def _collect(future: Future, package_name: str, stage: str) -> StageResult:
+        """Преобразовать завершенный Future в StageResult, не пропуская исключения"""
+        try:
+            result = future.result()
+        except Exception as e:
+            return StageResult(package_name, stage, 0.0, error=f"{type(e).__name__}: {e}")
+
+        if isinstance(result, StageResult):
+            return result
+        # RenderResult из процесса отрисовки
+        return StageResult(package_name, stage, result.seconds, result.output_file, result.error)
+
+
+def print_stage_result(result: StageResult, comparer=None):
+    """Напечатать результат этапа по мере поступления"""
+    prefix = f"[{result.package_name}] {result.stage}"
+    if result.error:
+        print(f"❌ {prefix}: {result.error}")
+        return
+
+    if result.stage == COMPARE:
+        comparison = result.details.get('comparison')
+        if comparison is None:
+            print(f"⚠️  {prefix}: официальные данные недоступны для сравнения")
+        else:
+            print(f"🔍 {prefix}: {result.seconds:.2f} с")
+            if comparer is not None:
+                comparer.print_comparison_report(comparison, result.package_name)
+        return
+
+    print(f"✅ {prefix}: {result.output_file} ({result.seconds:.2f} с)")
+
+
+def summarize(results: List[StageResult]) -> Dict[str, List[str]]:
+    """Сгруппировать ошибки по пакетам: {пакет: ['этап: ошибка', ...]}"""
+    failures: Dict[str, List[str]] = {}
+    for result in results:
+        if result.error:
+            failures.setdefault(result.package_name, []).append(f"{result.stage}: {result.error}")
+    return failures
@@ -0,0 +1,512 @@
+"""
+Долгоживущий сервер анализа: граф зависимостей строится один раз и держится в памяти.
+
+Запросы принимаются по HTTP на localhost или через Unix сокет (тот же протокол):
+
+    GET /health                       - поколение графа и число пакетов
+    GET /deps/<пакет>                 - прямые зависимости
+    GET /reverse/<пакет>              - прямые зависимые пакеты
+    GET /closure/<пакет>?direction=dependents - транзитивное замыкание
+    GET /mermaid/<пакет>?max_nodes=20 - Mermaid диаграмма
+    GET /compare/<пакет>              - сравнение с pipdeptree (только для окружения
+                                        интерпретатора сервера, без чужих --path)
+
+Фоновый поток опрашивает mtime каталогов dist-info. При изменении новое
+поколение готовится в стороне: через кэш графа перечитываются только
+изменившиеся дистрибутивы, а отличия применяются к копии текущего поколения
+с инкрементальным обновлением индекса достижимости. Новое поколение
+подменяет текущее одним присваиванием ссылки, поэтому читатели никогда не
+ждут перестроения и не видят частично обновленный граф.
+
+Запуск:
+    python analysis_server.py [--listen 127.0.0.1:8765 | --listen unix:/tmp/deps.sock]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlsplit
+
+from comparison_tool import ComparisonTool
+from dependency_parser import DependencyParser
+from graph_cache import DependencyGraphCache, default_cache_file
+from graph_traversal import DEPENDENCIES, DEPENDENTS
+from mermaid_generator import MermaidGenerator
+from metadata_reader import MetadataReader, normalize_name
+
+DEFAULT_ADDRESS = '127.0.0.1:8765'
+UNIX_PREFIX = 'unix:'
+
+QUERIES = ('deps', 'reverse', 'closure', 'mermaid', 'compare')
+
+
+class QueryError(Exception):
+    """Ошибка запроса к серверу (неизвестный запрос или пакет)"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class GraphGeneration:
+    """
+    Неизменяемое после построения состояние графа одного поколения
+
+    Args:
+        generation: Номер поколения (растет при каждом перестроении)
+        parser: Парсер с построенным графом и индексом достижимости
+        seconds: Время построения
+    """
+
+    __slots__ = ('generation', 'parser', 'mermaid', 'comparer', 'built_at', 'seconds')
+
+    def __init__(self, generation: int, parser: DependencyParser, seconds: float):
+        self.generation = generation
+        self.parser = parser
+        self.mermaid = MermaidGenerator(parser)
+        self.comparer = ComparisonTool(parser)
+        self.built_at = time.time()
+        self.seconds = seconds
+
+
+class AnalysisService:
+    """
+    Граф окружения в памяти и ответы на запросы к нему
+
+    Args:
+        path: Каталоги поиска дистрибутивов (None - sys.path)
+        cache: Кэш графа; сохраняется между перестроениями, поэтому
+               перечитываются только изменившиеся dist-info
+    """
+
+    def __init__(self, path: Optional[List[str]] = None, cache: Optional[DependencyGraphCache] = None):
+        self.path = path
+        self.cache = cache
+        # pipdeptree видит только окружение интерпретатора сервера
+        interpreter_paths = {os.path.realpath(directory) for directory in sys.path}
+        self.compare_available = path is None or all(
+            os.path.realpath(directory) in interpreter_paths for directory in path)
+        self._current: Optional[GraphGeneration] = None
+        self._rebuild_lock = threading.Lock()
+
+    @property
+    def current(self) -> GraphGeneration:
+        """Текущее поколение графа (чтение ссылки атомарно, блокировка не нужна)"""
+        if self._current is None:
+            self.rebuild()
+        return self._current
+
+    def rebuild(self) -> GraphGeneration:
+        """Построить новое поколение графа и подменить им текущее"""
+        with self._rebuild_lock:
+            started = time.perf_counter()
+            parser = DependencyParser(cache=self.cache)
+            parser.metadata_reader = MetadataReader(self.path)
+            parser.build_dependency_graph()
+            if self._current is not None:
+                parser = self._apply_changes(self._current.parser, parser)
+            # Производные индексы строятся до публикации: потоки запросов
+            # только читают поколение и не должны достраивать его лениво
+            parser.reachability
+
+            generation = self._current.generation + 1 if self._current is not None else 1
+            self._current = GraphGeneration(generation, parser, time.perf_counter() - started)
+            return self._current
+
+    @staticmethod
+    def _apply_changes(previous: DependencyParser, built: DependencyParser) -> DependencyParser:
+        """
+        Перенести отличия нового графа на копию предыдущего поколения
+
+        Индекс достижимости не строится заново: update_package_dependencies
+        пересчитывает только компоненты, затронутые изменившимися пакетами.
+        Удаленные пакеты остаются в индексе изолированными узлами без ребер.
+
+        Args:
+            previous: Парсер текущего поколения (не изменяется)
+            built: Парсер с только что прочитанным графом
+
+        Returns:
+            Парсер нового поколения
+        """
+        parser = previous.copy()
+        parser.metadata_reader = built.metadata_reader
+        for package, deps in built.dependencies.items():
+            if previous.dependencies.get(package) != deps:
+                parser.update_package_dependencies(package, deps)
+        for package in previous.dependencies.keys() - built.dependencies.keys():
+            parser.update_package_dependencies(package, [])
+            del parser.dependencies[package]
+        return parser
+
+    def query(self, kind: str, package: Optional[str] = None, params: Optional[Dict[str, str]] = None) -> Dict:
+        """
+        Выполнить запрос к текущему поколению графа
+
+        Args:
+            kind: 'health' или один из QUERIES
+            package: Пакет (для всех запросов, кроме health)
+            params: Дополнительные параметры запроса
+
+        Returns:
+            JSON-совместимый словарь с номером поколения и результатом
+
+        Raises:
+            QueryError: Неизвестный запрос или пакет
+        """
+        current = self.current
+        params = params or {}
+        if kind == 'health':
+            return {
+                'generation': current.generation,
+                'packages': len(current.parser.dependencies),
+                'built_at': current.built_at,
+                'build_seconds': current.seconds,
+            }
+
+        if kind not in QUERIES:
+            raise QueryError(f"Неизвестный запрос: {kind}", 404)
+        if not package:
+            raise QueryError(f"Запрос {kind} требует название пакета")
+        if kind == 'compare' and not self.compare_available:
+            raise QueryError("Сравнение с pipdeptree доступно только для окружения интерпретатора "
+                             "сервера, а граф построен по другим каталогам (--path)", 409)
+
+        parser = current.parser
+        package = normalize_name(package)
+        if package not in parser.dependencies and package not in parser.reverse_dependencies:
+            raise QueryError(f"Пакет не найден: {package}", 404)
+
+        if kind == 'deps':
+            result = parser.dependencies.get(package, [])
+        elif kind == 'reverse':
+            result = parser.reverse_dependencies.get(package, [])
+        elif kind == 'closure':
+            direction = params.get('direction', DEPENDENCIES)
+            if direction not in (DEPENDENCIES, DEPENDENTS):
+                raise QueryError(f"Неизвестное направление: {direction}")
+            if direction == DEPENDENCIES:
+                result = sorted(parser.reachability.transitive_dependencies(package))
+            else:
+                result = sorted(parser.reachability.transitive_dependents(package))
+        elif kind == 'mermaid':
+            result = current.mermaid.generate_mermaid_graph(package, _int_param(params, 'max_nodes', 20))
+        else:
+            result = self._compare(current, package, _int_param(params, 'max_depth', 2))
+
+        return {'generation': current.generation, 'package': package, 'result': result}
+
+    @staticmethod
+    def _compare(current: GraphGeneration, package: str, max_depth: int) -> Optional[Dict]:
+        """Сравнение с pipdeptree; множества преобразуются в отсортированные списки"""
+        import networkx as nx
+
+        official_graph = current.comparer.create_official_graph(package)
+        if official_graph.number_of_nodes() == 0:
+            return None
+
+        traversal = current.parser.traverse(package, max_depth)
+        our_graph = nx.DiGraph()
+        our_graph.add_nodes_from(traversal.depths)
+        our_graph.add_edges_from(traversal.edges)
+
+        comparison = current.comparer.compare_graphs(our_graph, official_graph)
+        return {key: sorted(value) if isinstance(value, set) else value
+                for key, value in comparison.items()}
+
+
+def _int_param(params: Dict[str, str], name: str, default: int) -> int:
+    """Целочисленный параметр запроса; некорректное значение - ошибка клиента"""
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"Параметр {name} должен быть целым числом: {value}") from None
+
+
+class SitePackagesWatcher:
+    """
+    Опрос времени изменения dist-info каталогов в фоновом потоке
+
+    Args:
+        paths: Каталоги site-packages
+        on_change: Вызывается с множеством изменившихся (добавленных,
+                   удаленных, переписанных) dist-info
+        interval: Период опроса в секундах
+    """
+
+    METADATA_SUFFIXES = ('.dist-info', '.egg-info')
+
+    def __init__(self, paths: List[str], on_change: Callable[[set], None], interval: float = 2.0):
+        self.paths = [path for path in dict.fromkeys(paths) if os.path.isdir(path)]
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._state = self.scan()
+
+    def scan(self) -> Dict[str, int]:
+        """Текущее состояние: {путь к dist-info: mtime в наносекундах}"""
+        state = {}
+        for path in self.paths:
+            try:
+                entries = os.scandir(path)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if not entry.name.endswith(self.METADATA_SUFFIXES):
+                        continue
+                    try:
+                        state[entry.path] = entry.stat().st_mtime_ns
+                    except OSError:
+                        continue
+        return state
+
+    def poll(self) -> set:
+        """Один опрос: вернуть изменившиеся dist-info и запомнить новое состояние"""
+        state = self.scan()
+        changed = {path for path in state.keys() | self._state.keys()
+                   if state.get(path) != self._state.get(path)}
+        self._state = state
+        return changed
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            changed = self.poll()
+            if changed:
+                try:
+                    self.on_change(changed)
+                except Exception as e:
+                    # Ошибка перестроения не должна останавливать опрос; текущий граф остается
+                    print(f"❌ Ошибка перестроения графа: {type(e).__name__}: {e}", file=sys.stderr)
+
+    def start(self) -> 'SitePackagesWatcher':
+        self._thread = threading.Thread(target=self._run, name='site-packages-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class _QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        try:
+            if not parts:
+                raise QueryError("Не указан запрос", 404)
+            package = parts[1] if len(parts) > 1 else None
+            status, body = 200, self.server.service.query(parts[0], package, params)
+        except QueryError as e:
+            status, body = e.status, {'error': str(e)}
+        except Exception as e:
+            status, body = 500, {'error': f"{type(e).__name__}: {e}"}
+
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _TcpQueryHandler(_QueryHandler):
+    # Заголовки и тело пишутся отдельно, см. nuget_stub_server; для Unix сокета опция неприменима
+    disable_nagle_algorithm = True
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def parse_address(address: str) -> Tuple[Optional[str], Optional[Tuple[str, int]]]:
+    """
+    Разобрать адрес сервера
+
+    Returns:
+        (путь Unix сокета, None) для 'unix:/путь' или (None, (хост, порт))
+        для 'хост:порт' и 'http://хост:порт'
+    """
+    if address.startswith(UNIX_PREFIX):
+        return address[len(UNIX_PREFIX):], None
+    if '://' in address:
+        address = urlsplit(address).netloc
+    host, _, port = address.rpartition(':')
+    if not host or not port.isdigit():
+        raise ValueError(f"Некорректный адрес сервера: {address}")
+    return None, (host, int(port))
+
+
+class AnalysisServer:
+    """
+    Сервер запросов к AnalysisService
+
+    Args:
+        service: Сервис с графом
+        address: 'хост:порт' (порт 0 - свободный) или 'unix:/путь/к/сокету'
+    """
+
+    def __init__(self, service: AnalysisService, address: str = DEFAULT_ADDRESS):
+        self.service = service
+        self.socket_path, tcp_address = parse_address(address)
+        if self.socket_path is not None:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)  # сокет, оставшийся от прошлого запуска
+            self._server = _UnixHTTPServer(self.socket_path, _QueryHandler)
+        else:
+            self._server = ThreadingHTTPServer(tcp_address, _TcpQueryHandler)
+            self._server.daemon_threads = True
+        self._server.service = service
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        """Адрес для AnalysisClient"""
+        if self.socket_path is not None:
+            return f"{UNIX_PREFIX}{self.socket_path}"
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self) -> 'AnalysisServer':
+        """Обслуживать запросы в фоновом потоке"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.socket_path is not None and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> 'AnalysisServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class AnalysisClient:
+    """
+    Клиент сервера анализа (одно постоянное соединение)
+
+    Args:
+        address: Адрес сервера в формате parse_address
+        timeout: Таймаут запроса в секундах
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float = 60.0):
+        socket_path, tcp_address = parse_address(address)
+        if socket_path is not None:
+            self._connection = _UnixHTTPConnection(socket_path, timeout)
+        else:
+            self._connection = http.client.HTTPConnection(*tcp_address, timeout=timeout)
+
+    def query(self, kind: str, package: Optional[str] = None, **params) -> Dict:
+        """
+        Выполнить запрос
+
+        Raises:
+            QueryError: Сервер вернул ошибку
+        """
+        path = f"/{quote(kind)}"
+        if package:
+            path += f"/{quote(package, safe='')}"
+        if params:
+            path += f"?{urlencode(params)}"
+
+        self._connection.request('GET', path)
+        response = self._connection.getresponse()
+        body = json.loads(response.read().decode('utf-8'))
+        if response.status != 200:
+            raise QueryError(body.get('error', f"HTTP {response.status}"), response.status)
+        return body
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self) -> 'AnalysisClient':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Сервер запросов к графу зависимостей")
+    arg_parser.add_argument('--listen', default=DEFAULT_ADDRESS,
+                            help="хост:порт или unix:/путь/к/сокету")
+    arg_parser.add_argument('--path', action='append', default=None,
+                            help="каталог site-packages (можно несколько; по умолчанию - sys.path)")
+    arg_parser.add_argument('--interval', type=float, default=2.0,
+                            help="период опроса dist-info в секундах")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="не использовать дисковый кэш графа зависимостей")
+    arg_parser.add_argument('--cache-file', default=None,
+                            help="путь к файлу кэша графа зависимостей")
+    args = arg_parser.parse_args(argv)
+
+    cache = None if args.no_cache else DependencyGraphCache(args.cache_file or default_cache_file(args.path))
+    service = AnalysisService(args.path, cache)
+    current = service.rebuild()
+    print(f"📊 Граф построен: {len(current.parser.dependencies)} пакетов за {current.seconds:.2f} с")
+
+    def on_change(changed: set):
+        print(f"🔄 Изменилось dist-info: {len(changed)}, перестроение графа...")
+        rebuilt = service.rebuild()
+        print(f"📊 Поколение {rebuilt.generation}: {len(rebuilt.parser.dependencies)} пакетов "
+              f"за {rebuilt.seconds:.2f} с")
+
+    watcher = SitePackagesWatcher(args.path or sys.path, on_change, args.interval).start()
+    server = AnalysisServer(service, args.listen)
+    print(f"🚀 Сервер анализа слушает {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nОстановка сервера")
+    finally:
+        watcher.stop()
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
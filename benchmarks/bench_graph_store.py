@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Сравнение CompactGraph (CSR) со словарями списков DependencyParser
+
+Запуск:
+    python benchmarks/bench_graph_store.py [--nodes 50000] [--fan-out 4]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from graph_store import CompactGraph
+
+
+def generate_adjacency(node_count: int, fan_out: int, seed: int = 42):
+    """Синтетический граф, похожий на объединение многих окружений"""
+    rng = random.Random(seed)
+    names = [f"package-{i}" for i in range(node_count)]
+    return {
+        name: [names[rng.randrange(node_count)] for _ in range(rng.randint(0, 2 * fan_out))]
+        for name in names
+    }
+
+
+def build_reverse(adjacency):
+    """Обратные зависимости так же, как DependencyParser._build_reverse_dependencies"""
+    reverse = {}
+    for package, deps in adjacency.items():
+        for dep in deps:
+            reverse.setdefault(dep, []).append(package)
+    return reverse
+
+
+def measure(func):
+    """Время выполнения и прирост памяти по tracemalloc"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="CompactGraph против словарей списков")
+    arg_parser.add_argument('--nodes', type=int, default=50000, help="число узлов")
+    arg_parser.add_argument('--fan-out', type=int, default=4, help="среднее число зависимостей")
+    args = arg_parser.parse_args(argv)
+    node_count, fan_out = args.nodes, args.fan_out
+
+    # Исходные строки имен создаются заранее и в замер не входят
+    source = generate_adjacency(node_count, fan_out)
+
+    dicts, dict_time, dict_memory = measure(
+        lambda: ({name: list(deps) for name, deps in source.items()}, build_reverse(source)))
+    graph, csr_time, csr_memory = measure(lambda: CompactGraph.from_adjacency(source))
+
+    print(f"Узлов: {len(graph)}, ребер: {graph.edge_count}")
+    print(f"  словари списков: построение {dict_time:.3f} с, память {dict_memory / 2**20:.1f} МБ")
+    print(f"  CSR:             построение {csr_time:.3f} с, память {csr_memory / 2**20:.1f} МБ "
+          f"(массивы смежности {graph.nbytes() / 2**20:.1f} МБ)")
+
+    forward, reverse = dicts
+    sample = random.Random(1).sample(list(source), min(10000, node_count))
+    sample_nodes = [graph.index_of(name) for name in sample]
+
+    started = time.perf_counter()
+    for name in sample:
+        len(forward[name])
+        len(reverse.get(name, ()))
+        for _ in forward[name]:
+            pass
+    dict_lookup = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for node in sample_nodes:
+        graph.out_degree(node)
+        graph.in_degree(node)
+        for _ in graph.neighbors(node):
+            pass
+    csr_lookup = time.perf_counter() - started
+
+    print(f"Поиск соседей и степеней для {len(sample)} узлов:")
+    print(f"  словари списков: {dict_lookup * 1e3:.2f} мс")
+    print(f"  CSR:             {csr_lookup * 1e3:.2f} мс")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Вычисление маркеров зависимостей с кэшем против разбора каждой строки
+
+Генерируются строки Requires-Dist, в которых небольшое число маркеров
+повторяется тысячи раз (как в реальных окружениях). Прежний способ
+разбирает каждую строку packaging.Requirement и вычисляет ее маркер;
+новый - parse_requirement с кэшем и MarkerEvaluator, который вычисляет
+каждый уникальный маркер один раз. Перед замером проверяется, что оба
+способа отбирают одинаковые зависимости для нескольких целевых окружений.
+
+Запуск:
+    python benchmarks/bench_markers.py [--lines 20000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from packaging.requirements import Requirement
+
+import requirement_records
+from metadata_reader import normalize_name
+from requirement_records import MarkerEvaluator, TargetEnvironment, parse_requirement
+
+MARKERS = [
+    '', '', '', "python_version < '3.8'", "python_version >= '3.9'", "sys_platform == 'win32'",
+    "platform_system == 'Windows'", "os_name == 'nt' and python_version < '3.11'",
+    "implementation_name == 'pypy'", "extra == 'test'", "extra == 'docs' and python_version >= '3.8'",
+]
+
+TARGETS = ['', 'python_version=3.7', 'sys_platform=win32', 'python_version=3.12,sys_platform=darwin']
+
+
+def generate_lines(count: int, seed: int) -> List[str]:
+    """Строки Requires-Dist с повторяющимися маркерами"""
+    rng = random.Random(seed)
+    lines = []
+    for index in range(count):
+        line = f"package-{index % 500}>=1.{index % 7}"
+        marker = rng.choice(MARKERS)
+        lines.append(f"{line}; {marker}" if marker else line)
+    return lines
+
+
+def select_uncached(lines: List[str], variables: Dict[str, str]) -> List[str]:
+    names = []
+    for line in lines:
+        requirement = Requirement(line)
+        if requirement.marker and not requirement.marker.evaluate(variables):
+            continue
+        names.append(normalize_name(requirement.name))
+    return names
+
+
+def select_cached(lines: List[str], evaluator: MarkerEvaluator) -> List[str]:
+    names = []
+    for line in lines:
+        record = parse_requirement(line)
+        if evaluator.evaluate(record.marker):
+            names.append(record.name)
+    return names
+
+
+def clear_caches():
+    parse_requirement.cache_clear()
+    requirement_records._parse_base.cache_clear()
+    requirement_records._compile_marker.cache_clear()
+
+
+def measure(name: str, func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        clear_caches()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    median = statistics.median(timings)
+    print(f"{name:<28} медиана {median * 1000:9.2f} мс, минимум {min(timings) * 1000:9.2f} мс")
+    return median
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Кэширование маркеров зависимостей")
+    arg_parser.add_argument('--lines', type=int, default=20000)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--seed', type=int, default=42)
+    args = arg_parser.parse_args(argv)
+
+    lines = generate_lines(args.lines, args.seed)
+    print(f"Строк Requires-Dist: {len(lines)}, уникальных: {len(set(lines))}, "
+          f"уникальных маркеров: {len(set(MARKERS))}\n")
+
+    for spec in TARGETS:
+        environment = TargetEnvironment.from_spec(spec)
+        variables = dict(environment.values, extra='')
+        evaluator = MarkerEvaluator(environment)
+        assert select_cached(lines, evaluator) == select_uncached(lines, variables), f"расхождение для {spec!r}"
+        print(f"{spec or 'текущий интерпретатор':<40} маркеров вычислено: {evaluator.evaluations}")
+    print("Проверка совпадения результатов пройдена\n")
+
+    environment = TargetEnvironment.from_spec('sys_platform=win32')
+    variables = dict(environment.values, extra='')
+    uncached = measure('без кэша', lambda: select_uncached(lines, variables), args.repeat)
+    cached = measure('с кэшем (холодный)', lambda: select_cached(lines, MarkerEvaluator(environment)),
+                     args.repeat)
+    print(f"\nУскорение: {uncached / cached:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
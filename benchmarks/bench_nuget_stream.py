@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Потоковый анализ NuGet пакетов против get_many
+
+Через локальную заглушку NuGet API (без сети и без HTTP кэша) для пакета
+задач из --packages пакетов замеряются:
+    get_many                 - все результаты словарями после завершения пакета;
+    iter_packages -> JSONL   - записи PackageResult пишутся в файл по мере готовности.
+Для каждого способа выводятся общее время, время до первого результата и
+пиковый прирост памяти (tracemalloc). Перед замером проверяется, что оба
+способа дают одинаковые зависимости.
+
+Запуск:
+    python benchmarks/bench_nuget_stream.py [--packages 10000] [--workers 16]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import BENCH_VERSION, generate_dependency_graph, generate_nuspecs
+
+from dependency_analyzer import JsonLinesSink, NuGetDependencyAnalyzer
+from nuget_stub_server import NuGetStubServer
+
+
+def measure(name: str, func: Callable[[Callable[[], None]], object]) -> Dict[str, float]:
+    """Выполнить func(on_result) и вернуть время, время до первого результата и пик памяти"""
+    first = []
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    def on_result():
+        if not first:
+            first.append(time.perf_counter() - started)
+
+    func(on_result)
+    total = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {'total': total, 'first': first[0] if first else total, 'peak_mb': peak / 1024 / 1024}
+    print(f"{name:<24} всего {total:7.2f} с, первый результат {result['first'] * 1000:9.1f} мс, "
+          f"пик памяти {result['peak_mb']:8.1f} МБ")
+    return result
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Потоковый анализ NuGet пакетов")
+    arg_parser.add_argument('--packages', type=int, default=10000)
+    arg_parser.add_argument('--fan-out', type=int, default=5)
+    arg_parser.add_argument('--workers', type=int, default=16)
+    arg_parser.add_argument('--latency', type=float, default=0.0, help="задержка заглушки в секундах")
+    arg_parser.add_argument('--seed', type=int, default=42)
+    args = arg_parser.parse_args(argv)
+
+    adjacency = generate_dependency_graph(args.packages, args.fan_out, seed=args.seed)
+    pairs = [(name, BENCH_VERSION) for name in adjacency]
+
+    with NuGetStubServer(generate_nuspecs(adjacency), latency=args.latency) as server, \
+            tempfile.TemporaryDirectory(prefix='nuget-stream-') as workdir:
+        def make_analyzer() -> NuGetDependencyAnalyzer:
+            return NuGetDependencyAnalyzer(base_url=server.url, max_workers=args.workers,
+                                           requests_per_second=0, use_cache=False, quiet=True)
+
+        # Проверка: оба способа дают одинаковые зависимости
+        sample = pairs[:200]
+        analyzer = make_analyzer()
+        try:
+            expected = {pair: [(dep['id'], dep['version']) for dep in info['dependencies']]
+                        for pair, info in analyzer.get_many(sample).items()}
+            streamed = {(result.id, result.version): [(dep.id, dep.version) for dep in result.direct_dependencies()]
+                        for result in analyzer.iter_packages(sample)}
+        finally:
+            analyzer.close()
+        assert streamed == expected, "потоковый API дал другие зависимости"
+        print(f"Проверка совпадения результатов пройдена ({len(sample)} пакетов)\n")
+
+        def run_get_many(on_result):
+            analyzer = make_analyzer()
+            try:
+                results = analyzer.get_many(pairs)
+                on_result()
+                return results
+            finally:
+                analyzer.close()
+
+        output = os.path.join(workdir, 'results.jsonl')
+
+        def run_stream(on_result):
+            analyzer = make_analyzer()
+            try:
+                with JsonLinesSink(output, flush=False) as sink:
+                    for result in analyzer.iter_packages(iter(pairs)):
+                        sink.write(result)
+                        on_result()
+            finally:
+                analyzer.close()
+
+        print(f"Пакетов: {len(pairs)}, потоков: {args.workers}")
+        measure('get_many', run_get_many)
+        measure('iter_packages -> JSONL', run_stream)
+
+        with open(output, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        found = sum(record['found'] for record in records)
+        assert len(records) == len(pairs) and found == len(pairs), "в JSONL попали не все пакеты"
+        print(f"\nJSONL: {len(records)} записей, {os.path.getsize(output) / 1024 / 1024:.1f} МБ")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
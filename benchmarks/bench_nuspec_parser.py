@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Сравнение потокового парсера nuspec с прежним построчным парсером
+
+Запуск:
+    python benchmarks/bench_nuspec_parser.py [путь/к/файлу.nuspec ...]
+
+Без аргументов используется сгенерированный nuspec, повторяющий структуру
+Microsoft.EntityFrameworkCore: длинное описание, release notes и несколько
+групп targetFramework с многострочными элементами <dependency>.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from nuspec_parser import flatten_dependencies, iter_chunks, parse_nuspec
+
+FRAMEWORKS = ['net6.0', 'net7.0', 'net8.0', 'netstandard2.0', 'netstandard2.1', 'net462']
+DEPENDENCIES = [
+    'Microsoft.EntityFrameworkCore.Abstractions', 'Microsoft.EntityFrameworkCore.Analyzers',
+    'Microsoft.Extensions.Caching.Memory', 'Microsoft.Extensions.DependencyInjection',
+    'Microsoft.Extensions.Logging', 'System.Collections.Immutable',
+    'System.ComponentModel.Annotations', 'System.Diagnostics.DiagnosticSource',
+]
+
+
+def generate_nuspec(frameworks=FRAMEWORKS, description_lines: int = 400, multiline: bool = True) -> bytes:
+    """Сгенерировать крупный nuspec в формате nuget.org"""
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<package xmlns="http://schemas.microsoft.com/packaging/2013/05/nuspec.xsd">',
+        '  <metadata>',
+        '    <id>Microsoft.EntityFrameworkCore</id>',
+        '    <version>7.0.0</version>',
+        '    <authors>Microsoft</authors>',
+        '    <description>Entity Framework Core is a modern object-database mapper for .NET.',
+    ]
+    lines.extend(f'      Строка описания {i}: LINQ queries, change tracking, updates, migrations.'
+                 for i in range(description_lines))
+    lines.append('    </description>')
+    lines.append('    <dependencies>')
+    for framework in frameworks:
+        lines.append(f'      <group targetFramework="{framework}">')
+        for dependency in DEPENDENCIES:
+            if multiline:
+                # Атрибуты в другом порядке и на разных строках, как у части реальных пакетов
+                lines.append(f'        <dependency version="7.0.0"')
+                lines.append(f'                    id="{dependency}" exclude="Build,Analyzers" />')
+            else:
+                lines.append(f'        <dependency id="{dependency}" version="7.0.0" exclude="Build,Analyzers" />')
+        lines.append('      </group>')
+    lines.append('    </dependencies>')
+    lines.append('    <releaseNotes>' + 'https://go.microsoft.com/fwlink/?linkid=2218712 ' * 200
+                 + '</releaseNotes>')
+    lines.append('  </metadata>')
+    lines.append('</package>')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def legacy_parse(content: str):
+    """Прежний построчный парсер из NuGetDependencyAnalyzer (для сравнения)"""
+    dependencies = []
+    in_dependencies = False
+    for line in content.split('\n'):
+        line = line.strip()
+        if '<dependencies>' in line:
+            in_dependencies = True
+            continue
+        if '</dependencies>' in line:
+            in_dependencies = False
+            continue
+        if in_dependencies and '<dependency' in line:
+            id_start = line.find('id="') + 4
+            id_end = line.find('"', id_start)
+            version_start = line.find('version="') + 9
+            version_end = line.find('"', version_start)
+            if id_start > 3 and id_end > id_start and version_start > 8 and version_end > version_start:
+                dependencies.append({'id': line[id_start:id_end],
+                                     'version': line[version_start:version_end]})
+    return dependencies
+
+
+def streaming_parse(content: bytes):
+    """Новый потоковый парсер"""
+    return flatten_dependencies(parse_nuspec(iter_chunks(content))['groups'])
+
+
+def run(name: str, content: bytes, number: int = 200):
+    legacy_time = min(timeit.repeat(lambda: legacy_parse(content.decode('utf-8')),
+                                    number=number, repeat=3)) / number
+    streaming_time = min(timeit.repeat(lambda: streaming_parse(content),
+                                       number=number, repeat=3)) / number
+
+    groups = parse_nuspec(iter_chunks(content))['groups']
+    print(f"{name}: {len(content) / 1024:.1f} КБ")
+    print(f"  построчный парсер: {legacy_time * 1e6:9.1f} мкс, "
+          f"зависимостей {len(legacy_parse(content.decode('utf-8')))}")
+    print(f"  потоковый парсер:  {streaming_time * 1e6:9.1f} мкс, "
+          f"групп {len(groups)}, уникальных зависимостей {len(streaming_parse(content))}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Потоковый парсер nuspec против построчного")
+    arg_parser.add_argument('paths', nargs='*', help="nuspec файлы (по умолчанию - синтетический)")
+    args = arg_parser.parse_args(argv)
+
+    if args.paths:
+        for path in args.paths:
+            with open(path, 'rb') as f:
+                run(os.path.basename(path), f.read())
+    else:
+        run('Microsoft.EntityFrameworkCore (синтетический, однострочные зависимости)',
+            generate_nuspec(multiline=False))
+        run('Microsoft.EntityFrameworkCore (синтетический, многострочные зависимости)',
+            generate_nuspec(multiline=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Замер бинарного снимка графа против pickle текущих словарей
+
+Для синтетического графа (по умолчанию 100 000 узлов) проверяется
+сохранение без потерь (снимок -> словари, снимок -> JSON -> снимок) и
+замеряются: запись, открытие, открытие с несколькими запросами, полная
+материализация словарей и размер файла. Для pickle "открытие" - это
+загрузка всего графа, без которой не выполнить ни одного запроса.
+Дополнительно замеряется сравнение двух снимков, отличающихся несколькими
+пакетами, против сравнения материализованных словарей.
+
+Запуск:
+    python benchmarks/bench_snapshot.py [--nodes 100000] [--queries 100] [--output results.json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import pickle
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_dependency_graph
+
+from graph_snapshot import GraphSnapshot, export_json, import_json, write_snapshot
+from snapshot_diff import SnapshotDiff
+
+
+def measure(results: Dict[str, Dict], name: str, func: Callable[[], object], repeat: int):
+    """Выполнить func несколько раз и запомнить медиану"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    results[name] = {'min': min(timings), 'median': statistics.median(timings), 'runs': timings}
+    print(f"{name:<32} медиана {results[name]['median'] * 1000:10.2f} мс, минимум {min(timings) * 1000:10.2f} мс")
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Снимок графа против pickle")
+    arg_parser.add_argument('--nodes', type=int, default=100000)
+    arg_parser.add_argument('--fan-out', type=int, default=3)
+    arg_parser.add_argument('--queries', type=int, default=100, help="запросов зависимостей после открытия")
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--changes', type=int, default=5, help="измененных пакетов для замера сравнения")
+    arg_parser.add_argument('--seed', type=int, default=42)
+    arg_parser.add_argument('--output', default=None, help="сохранить результаты в JSON")
+    args = arg_parser.parse_args(argv)
+
+    dependencies = generate_dependency_graph(args.nodes, args.fan_out, seed=args.seed)
+    columns = {'version': {name: f"1.{index % 50}.{index % 7}" for index, name in enumerate(dependencies)}}
+    rng = random.Random(args.seed)
+    queried = rng.sample(list(dependencies), min(args.queries, len(dependencies)))
+    edges = sum(len(deps) for deps in dependencies.values())
+    print(f"Граф: {len(dependencies)} узлов, {edges} ребер\n")
+
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix='snapshot-bench-') as workdir:
+        snapshot_file = os.path.join(workdir, 'graph.snap')
+        pickle_file = os.path.join(workdir, 'graph.pickle')
+
+        measure(results, 'write[snapshot]', lambda: write_snapshot(snapshot_file, dependencies, columns), 1)
+
+        def write_pickle():
+            with open(pickle_file, 'wb') as f:
+                pickle.dump((dependencies, columns), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        measure(results, 'write[pickle]', write_pickle, args.repeat)
+
+        # Проверки без потерь
+        with GraphSnapshot(snapshot_file) as snapshot:
+            assert snapshot.to_adjacency() == dependencies, "снимок изменил граф"
+            assert snapshot.to_columns() == columns, "снимок изменил столбцы"
+            json_file = os.path.join(workdir, 'graph.json')
+            export_json(snapshot, json_file)
+        copy_file = os.path.join(workdir, 'copy.snap')
+        write_snapshot(copy_file, *import_json(json_file))
+        with open(snapshot_file, 'rb') as original, open(copy_file, 'rb') as copy:
+            assert original.read() == copy.read(), "JSON -> снимок дает другой файл"
+        print("Проверки сохранения без потерь пройдены\n")
+
+        def open_snapshot():
+            GraphSnapshot(snapshot_file).close()
+
+        def query_snapshot():
+            with GraphSnapshot(snapshot_file) as snapshot:
+                for name in queried:
+                    snapshot.dependencies_of(name)
+                    snapshot.value('version', snapshot.index_of(name))
+
+        def load_pickle():
+            with open(pickle_file, 'rb') as f:
+                return pickle.load(f)
+
+        def query_pickle():
+            loaded_dependencies, loaded_columns = load_pickle()
+            for name in queried:
+                loaded_dependencies[name]
+                loaded_columns['version'][name]
+
+        def materialize_snapshot():
+            with GraphSnapshot(snapshot_file) as snapshot:
+                snapshot.to_adjacency()
+
+        measure(results, 'open[snapshot]', open_snapshot, args.repeat)
+        measure(results, f'open+{len(queried)}q[snapshot]', query_snapshot, args.repeat)
+        measure(results, f'open+{len(queried)}q[pickle]', query_pickle, args.repeat)
+        measure(results, 'materialize[snapshot]', materialize_snapshot, args.repeat)
+        measure(results, 'materialize[pickle]', load_pickle, args.repeat)
+
+        # Сравнение со снимком, где у нескольких пакетов изменились версии и зависимости
+        changed_columns = {'version': dict(columns['version'])}
+        changed_dependencies = dict(dependencies)
+        for name in rng.sample(list(dependencies), args.changes):
+            changed_columns['version'][name] += '.post1'
+            changed_dependencies[name] = changed_dependencies[name][1:]
+        changed_file = os.path.join(workdir, 'changed.snap')
+        write_snapshot(changed_file, changed_dependencies, changed_columns)
+
+        def diff_snapshots():
+            with GraphSnapshot(snapshot_file) as old, GraphSnapshot(changed_file) as new:
+                return list(SnapshotDiff(old, new))
+
+        def diff_dicts():
+            with GraphSnapshot(snapshot_file) as old, GraphSnapshot(changed_file) as new:
+                before, after = old.to_adjacency(), new.to_adjacency()
+                before_versions, after_versions = old.to_columns()['version'], new.to_columns()['version']
+            return ([name for name in before.keys() | after.keys()
+                     if before_versions.get(name) != after_versions.get(name)],
+                    {(a, b) for a, deps in before.items() for b in deps} ^
+                    {(a, b) for a, deps in after.items() for b in deps})
+
+        measure(results, f'diff[snapshot, {args.changes} changed]', diff_snapshots, args.repeat)
+        measure(results, f'diff[dicts, {args.changes} changed]', diff_dicts, args.repeat)
+
+        sizes = {'snapshot': os.path.getsize(snapshot_file), 'pickle': os.path.getsize(pickle_file),
+                 'json': os.path.getsize(json_file)}
+        print("\nРазмер файлов: " + ', '.join(f"{name} {size / 1024 / 1024:.1f} МБ" for name, size in sizes.items()))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'parameters': vars(args), 'results': results, 'sizes': sizes}, f, indent=2)
+        print(f"Результаты сохранены в {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Сравнение прежнего рекурсивного построения подграфа с обходом в ширину
+на синтетических «ромбовидных» решетках (каждый пакет уровня зависит от
+всех пакетов следующего уровня - число путей растет как width ** depth)
+
+Запуск:
+    python benchmarks/bench_traversal.py [--width 3] [--max-depth 14]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import networkx as nx
+
+from graph_traversal import breadth_first
+
+# Прежний алгоритм перестает замеряться, когда один прогон дольше этого порога
+LEGACY_TIME_LIMIT = 5.0
+
+
+def diamond_lattice(width: int, levels: int):
+    """Граф из levels уровней по width пакетов, уровень i зависит от всего уровня i + 1"""
+    dependencies = {'root': [f"n1_{j}" for j in range(width)]}
+    for level in range(1, levels):
+        for i in range(width):
+            dependencies[f"n{level}_{i}"] = [f"n{level + 1}_{j}" for j in range(width)]
+    return dependencies
+
+
+def legacy_subgraph(dependencies, package_name: str, max_depth: int) -> nx.DiGraph:
+    """Прежний GraphVisualizer.create_networkx_graph (рекурсия без множества посещенных)"""
+    G = nx.DiGraph()
+
+    def add_dependencies(pkg: str, depth: int = 0):
+        if depth > max_depth:
+            return
+        G.add_node(pkg)
+        for dep in dependencies.get(pkg, []):
+            G.add_node(dep)
+            G.add_edge(pkg, dep)
+            add_dependencies(dep, depth + 1)
+
+    add_dependencies(package_name)
+    return G
+
+
+def bfs_subgraph(dependencies, package_name: str, max_depth: int) -> nx.DiGraph:
+    """Новый обход в ширину с кратчайшими глубинами"""
+    traversal = breadth_first([package_name], lambda pkg: dependencies.get(pkg, []), max_depth)
+    G = nx.DiGraph()
+    G.add_nodes_from(traversal.depths)
+    G.add_edges_from(traversal.edges)
+    return G
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Рекурсивное построение подграфа против обхода в ширину")
+    arg_parser.add_argument('--width', type=int, default=3, help="ширина уровня решетки")
+    arg_parser.add_argument('--max-depth', type=int, default=14, help="максимальная глубина")
+    args = arg_parser.parse_args(argv)
+    width, max_levels = args.width, args.max_depth
+    dependencies = diamond_lattice(width, max_levels + 1)
+
+    print(f"Ромбовидная решетка шириной {width}")
+    print(f"{'глубина':>8} {'узлов':>7} {'рекурсия, с':>12} {'BFS, с':>10}")
+
+    legacy_enabled = True
+    for max_depth in range(1, max_levels + 1):
+        graph, bfs_time = timed(bfs_subgraph, dependencies, 'root', max_depth)
+
+        legacy_column = '-'
+        if legacy_enabled:
+            legacy_graph, legacy_time = timed(legacy_subgraph, dependencies, 'root', max_depth)
+            assert set(legacy_graph.edges()) == set(graph.edges())
+            legacy_column = f"{legacy_time:.4f}"
+            legacy_enabled = legacy_time < LEGACY_TIME_LIMIT
+
+        print(f"{max_depth:>8} {graph.number_of_nodes():>7} {legacy_column:>12} {bfs_time:>10.4f}")
+
+
+if __name__ == '__main__':
+    main()
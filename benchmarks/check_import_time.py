@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Проверка бюджета времени импорта для быстрых сценариев запуска
+
+Для каждого сценария модули импортируются в отдельном процессе с
+``python -X importtime``; проверяется, что суммарное время импорта
+(лучшее из нескольких запусков) укладывается в бюджет и что тяжелые
+библиотеки (matplotlib, networkx, numpy, packaging) не загружаются.
+Код выхода 1 означает нарушение бюджета.
+
+Запуск:
+    python benchmarks/check_import_time.py [--runs 5] [--scale 1.0]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Сценарий -> (импортируемые модули, бюджет в миллисекундах)
+SCENARIOS: Dict[str, Tuple[List[str], float]] = {
+    'config': (['config', 'exceptions'], 20),
+    'parse': (['dependency_parser'], 120),
+    'mermaid': (['mermaid_generator', 'graph_exporters'], 120),
+    'main': (['main'], 200),
+}
+
+# Библиотеки, которые должны загружаться только при отрисовке или работе с networkx
+HEAVY_MODULES = ('matplotlib', 'networkx', 'numpy', 'packaging', 'multiprocessing')
+
+
+def import_profile(modules: List[str]) -> Tuple[float, List[str]]:
+    """
+    Импортировать модули в новом процессе
+
+    Returns:
+        Суммарное время импорта модулей в мс и список всех загруженных модулей
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {', '.join(modules)}"],
+        capture_output=True, text=True, cwd=REPO_ROOT, check=True
+    )
+
+    total_us = 0
+    loaded = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue  # строка заголовка
+        loaded.append(name.strip())
+        if name.strip() in modules and not name.startswith('  '):
+            total_us += int(cumulative)
+    return total_us / 1000, loaded
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="Проверка бюджета времени импорта")
+    arg_parser.add_argument('--runs', type=int, default=5, help="число запусков (берется лучший)")
+    arg_parser.add_argument('--scale', type=float, default=1.0,
+                            help="множитель бюджетов для медленных машин")
+    args = arg_parser.parse_args()
+
+    failed = False
+    print(f"{'сценарий':<10} {'время, мс':>10} {'бюджет, мс':>11}  тяжелые модули")
+    for scenario, (modules, budget) in SCENARIOS.items():
+        best = None
+        heavy = []
+        for _ in range(args.runs):
+            elapsed, loaded = import_profile(modules)
+            best = elapsed if best is None else min(best, elapsed)
+            heavy = sorted({name.split('.')[0] for name in loaded if name.split('.')[0] in HEAVY_MODULES})
+
+        budget *= args.scale
+        ok = best <= budget and not heavy
+        failed |= not ok
+        status = '✅' if ok else '❌'
+        print(f"{scenario:<10} {best:>10.1f} {budget:>11.1f}  {', '.join(heavy) or '-'} {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
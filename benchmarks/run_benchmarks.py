@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Набор воспроизводимых замеров без сети
+
+Генерирует синтетическое окружение (site-packages, подменный pip, NuGet
+заглушку с задержкой) и замеряет основные операции: построение графа
+обоими источниками метаданных, create_networkx_graph, генерацию Mermaid,
+раскладку и отрисовку, загрузку nuspec и разрешение транзитивного графа
+NuGet. Результаты сохраняются в JSON; при указании --baseline медианы
+сравниваются с прошлым прогоном и регрессии выше порога дают код выхода 1.
+
+Запуск:
+    python benchmarks/run_benchmarks.py [--packages 500] [--output results.json]
+    python benchmarks/run_benchmarks.py --baseline old.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib
+matplotlib.use('Agg')
+# Визуализатор импортирует pyplot лениво; загружаем заранее, чтобы импорт не попал в замер
+import matplotlib.pyplot
+
+from synthetic import (BENCH_VERSION, generate_dependency_graph, generate_nuspecs,
+                       package_name, write_fake_pip, write_site_packages)
+
+from dependency_analyzer import NuGetDependencyAnalyzer
+from dependency_parser import DependencyParser
+from graph_exporters import export_graph
+from graph_visualizer import GraphVisualizer
+from http_cache import HttpDiskCache
+from layered_layout import LayeredLayout
+from mermaid_generator import MermaidGenerator
+from metadata_reader import MetadataReader
+from nuget_resolver import TransitiveResolver
+from nuget_stub_server import NuGetStubServer
+
+RESULTS_FORMAT_VERSION = 1
+
+
+class BenchmarkRunner:
+    """Выполняет замеры и собирает результаты"""
+
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results: Dict[str, Dict] = {}
+
+    def measure(self, name: str, func: Callable[[], object], setup: Optional[Callable[[], None]] = None,
+                repeat: Optional[int] = None):
+        """Выполнить func несколько раз (setup перед каждым прогоном не замеряется)"""
+        timings = []
+        for _ in range(repeat or self.repeat):
+            # Сообщения замеряемого кода не печатаются и не влияют на время
+            with contextlib.redirect_stdout(io.StringIO()):
+                if setup is not None:
+                    setup()
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+
+        self.results[name] = {
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'runs': timings,
+        }
+        print(f"{name:<40} медиана {self.results[name]['median']:.4f} с, минимум {min(timings):.4f} с")
+
+
+def make_parser(site_packages: str, backend: str = 'metadata') -> DependencyParser:
+    parser = DependencyParser(backend=backend)
+    parser.metadata_reader = MetadataReader([site_packages])
+    return parser
+
+
+def bench_python_graph(runner: BenchmarkRunner, args, workdir: str):
+    """Замеры построения и использования графа Python пакетов"""
+    adjacency = generate_dependency_graph(args.packages, args.fan_out, args.diamonds, args.cycles, args.seed)
+    site_packages = write_site_packages(os.path.join(workdir, 'site-packages'), adjacency)
+
+    parser = make_parser(site_packages)
+    runner.measure('build_dependency_graph[metadata]', parser.build_dependency_graph,
+                   setup=parser.metadata_reader.invalidate)
+    assert {name: parser.dependencies[name] for name in adjacency} == adjacency, \
+        "граф, построенный по метаданным, не совпадает с синтетическим"
+
+    # pip show запускает процесс на каждый пакет, поэтому окружение меньше
+    pip_adjacency = generate_dependency_graph(args.pip_packages, args.fan_out, seed=args.seed)
+    pip_site = write_site_packages(os.path.join(workdir, 'pip-site-packages'), pip_adjacency)
+    saved_environ = dict(os.environ)
+    os.environ.update(write_fake_pip(os.path.join(workdir, 'fake-pip'), pip_site))
+    try:
+        pip_parser = make_parser(pip_site, backend='pip')
+        runner.measure('build_dependency_graph[pip]', pip_parser.build_dependency_graph, repeat=1)
+        assert {name: pip_parser.dependencies[name] for name in pip_adjacency} == pip_adjacency, \
+            "граф, построенный через pip show, не совпадает с синтетическим"
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_environ)
+
+    root = package_name(0)
+    visualizer = GraphVisualizer(parser, headless=True, dpi=args.dpi)
+    runner.measure('create_networkx_graph', lambda: visualizer.create_networkx_graph(root, args.depth))
+
+    mermaid = MermaidGenerator(parser)
+    runner.measure('generate_mermaid_graph', lambda: mermaid.generate_mermaid_graph(root))
+    runner.measure('export_mermaid_full', lambda: export_graph(
+        parser.dependencies, os.path.join(workdir, 'full.mmd'), 'mermaid', [root], args.max_nodes))
+
+    graph = visualizer.create_networkx_graph(root, args.depth)
+    runner.measure('layered_layout', lambda: LayeredLayout().compute(graph))
+    runner.measure('render_png', lambda: visualizer.visualize_package_dependencies(
+        root, os.path.join(workdir, 'render.png')), repeat=1)
+
+
+def bench_nuget(runner: BenchmarkRunner, args, workdir: str):
+    """Замеры загрузки nuspec и транзитивного разрешения через локальную заглушку"""
+    adjacency = generate_dependency_graph(args.nuget_packages, args.fan_out, args.diamonds,
+                                          args.cycles, args.seed)
+    pairs = [(name, BENCH_VERSION) for name in adjacency]
+
+    with NuGetStubServer(generate_nuspecs(adjacency), latency=args.latency) as server:
+        def make_analyzer(cache=None) -> NuGetDependencyAnalyzer:
+            return NuGetDependencyAnalyzer(base_url=server.url, max_workers=args.workers,
+                                           requests_per_second=0, cache=cache,
+                                           use_cache=cache is not None)
+
+        analyzer = make_analyzer()
+        try:
+            runner.measure('nuget_get_many[cold]', lambda: analyzer.get_many(pairs))
+        finally:
+            analyzer.close()
+
+        cache = HttpDiskCache(os.path.join(workdir, 'http-cache'))
+        cached_analyzer = make_analyzer(cache)
+        try:
+            runner.measure('nuget_get_many[disk_cache]', lambda: cached_analyzer.get_many(pairs),
+                           setup=lambda: cached_analyzer.get_many(pairs))
+        finally:
+            cached_analyzer.close()
+
+        def resolve():
+            resolver_analyzer = make_analyzer()
+            try:
+                TransitiveResolver(resolver_analyzer).resolve([(package_name(0), BENCH_VERSION)])
+            finally:
+                resolver_analyzer.close()
+
+        runner.measure('nuget_resolve_transitive', resolve)
+
+
+def compare_with_baseline(results: Dict[str, Dict], baseline_file: str, threshold: float) -> List[str]:
+    """Сравнить медианы с прошлым прогоном, вернуть названия регрессировавших замеров"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    print(f"\nСравнение с {baseline_file} (порог {threshold:.0%}):")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"  {name:<40} нет в базовом прогоне")
+            continue
+        ratio = result['median'] / previous['median'] if previous['median'] else float('inf')
+        marker = ''
+        if ratio > 1 + threshold:
+            marker = '  ⚠️  регрессия'
+            regressions.append(name)
+        print(f"  {name:<40} {previous['median']:.4f} -> {result['median']:.4f} с (x{ratio:.2f}){marker}")
+    return regressions
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Замеры производительности без сети")
+    arg_parser.add_argument('--packages', type=int, default=500, help="пакетов в site-packages")
+    arg_parser.add_argument('--pip-packages', type=int, default=40, help="пакетов для замера pip show")
+    arg_parser.add_argument('--nuget-packages', type=int, default=200, help="пакетов в NuGet заглушке")
+    arg_parser.add_argument('--fan-out', type=int, default=3, help="среднее число зависимостей")
+    arg_parser.add_argument('--diamonds', type=int, default=50, help="дополнительных ромбов")
+    arg_parser.add_argument('--cycles', type=int, default=5, help="циклов")
+    arg_parser.add_argument('--seed', type=int, default=42)
+    arg_parser.add_argument('--depth', type=int, default=2, help="глубина подграфа для визуализации")
+    arg_parser.add_argument('--max-nodes', type=int, default=200, help="бюджет узлов полного экспорта")
+    arg_parser.add_argument('--dpi', type=int, default=100)
+    arg_parser.add_argument('--latency', type=float, default=0.005, help="задержка ответа заглушки, с")
+    arg_parser.add_argument('--workers', type=int, default=8, help="параллельных запросов NuGet")
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--only', choices=('python', 'nuget'), default=None)
+    arg_parser.add_argument('--output', default='benchmark_results.json')
+    arg_parser.add_argument('--baseline', default=None, help="JSON прошлого прогона для сравнения")
+    arg_parser.add_argument('--threshold', type=float, default=0.2, help="допустимое замедление")
+    return arg_parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    runner = BenchmarkRunner(args.repeat)
+
+    with tempfile.TemporaryDirectory(prefix='dependency-bench-') as workdir:
+        if args.only in (None, 'python'):
+            bench_python_graph(runner, args, workdir)
+        if args.only in (None, 'nuget'):
+            bench_nuget(runner, args, workdir)
+
+    report = {
+        'format_version': RESULTS_FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': vars(args),
+        'results': runner.results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nРезультаты сохранены в {args.output}")
+
+    if args.baseline:
+        return 1 if compare_with_baseline(runner.results, args.baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
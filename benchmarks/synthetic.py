@@ -0,0 +1,153 @@
+"""
+Генераторы синтетических окружений для замеров без сети
+
+- граф зависимостей с настраиваемым ветвлением, ромбами и циклами;
+- каталог site-packages с dist-info для этого графа;
+- подменный pip (``python -m pip show``), читающий этот каталог;
+- nuspec файлы того же графа для NuGetStubServer.
+"""
+
+import os
+import random
+from typing import Dict, List, Tuple
+
+BENCH_VERSION = '1.0.0'
+
+# Переменная окружения, из которой подменный pip берет путь к site-packages
+FAKE_PIP_SITE_ENV = 'FAKE_PIP_SITE'
+
+FAKE_PIP_MAIN = '''"""Подменный pip для замеров: поддерживает только `pip show`"""
+import glob
+import os
+import re
+import sys
+
+site = os.environ[{env!r}]
+if sys.argv[1:2] != ['show']:
+    sys.exit(2)
+
+found = False
+for name in sys.argv[2:]:
+    pattern = re.sub(r'[^A-Za-z0-9.]+', '_', name) + '-*.dist-info'
+    for dist_info in glob.glob(os.path.join(site, pattern)):
+        fields, requires = {{}}, []
+        with open(os.path.join(dist_info, 'METADATA'), encoding='utf-8') as f:
+            for line in f:
+                key, _, value = line.rstrip('\\n').partition(': ')
+                if key == 'Requires-Dist':
+                    if 'extra ==' not in value:
+                        requires.append(value.split(';')[0].strip())
+                elif key in ('Name', 'Version'):
+                    fields[key] = value
+        print(f"Name: {{fields['Name']}}")
+        print(f"Version: {{fields['Version']}}")
+        print(f"Requires: {{', '.join(requires)}}")
+        found = True
+        break
+
+sys.exit(0 if found else 1)
+'''
+
+
+def package_name(index: int) -> str:
+    return f"bench-pkg-{index}"
+
+
+def generate_dependency_graph(package_count: int, fan_out: int = 3, diamonds: int = 0,
+                              cycles: int = 0, seed: int = 42) -> Dict[str, List[str]]:
+    """
+    Сгенерировать граф зависимостей
+
+    Args:
+        package_count: Число пакетов
+        fan_out: Среднее число прямых зависимостей (ребра ведут к пакетам с большим номером)
+        diamonds: Число дополнительных ромбов a -> b, c -> d
+        cycles: Число обратных ребер, замыкающих циклы
+        seed: Зерно генератора случайных чисел
+
+    Returns:
+        Словарь {пакет: отсортированный список зависимостей}
+    """
+    rng = random.Random(seed)
+    edges = [set() for _ in range(package_count)]
+
+    for source in range(package_count - 1):
+        for _ in range(rng.randint(0, 2 * fan_out)):
+            edges[source].add(rng.randrange(source + 1, package_count))
+
+    for _ in range(diamonds if package_count >= 4 else 0):
+        a, b, c, d = sorted(rng.sample(range(package_count), 4))
+        edges[a].update((b, c))
+        edges[b].add(d)
+        edges[c].add(d)
+
+    for _ in range(cycles if package_count >= 2 else 0):
+        low, high = sorted(rng.sample(range(package_count), 2))
+        edges[low].add(high)
+        edges[high].add(low)
+
+    return {package_name(source): sorted(package_name(target) for target in targets)
+            for source, targets in enumerate(edges)}
+
+
+def write_site_packages(directory: str, adjacency: Dict[str, List[str]]) -> str:
+    """
+    Записать dist-info каталоги для графа
+
+    У каждого пятого пакета добавляется зависимость за extra-маркером,
+    которая не должна попадать в граф (как и у реальных пакетов).
+    """
+    os.makedirs(directory, exist_ok=True)
+    for index, (name, dependencies) in enumerate(adjacency.items()):
+        dist_info = os.path.join(directory, f"{name.replace('-', '_')}-{BENCH_VERSION}.dist-info")
+        os.makedirs(dist_info, exist_ok=True)
+
+        lines = ['Metadata-Version: 2.1', f"Name: {name}", f"Version: {BENCH_VERSION}"]
+        lines.extend(f"Requires-Dist: {dependency}" for dependency in dependencies)
+        if index % 5 == 0:
+            lines.append('Requires-Dist: pytest ; extra == "test"')
+
+        with open(os.path.join(dist_info, 'METADATA'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        with open(os.path.join(dist_info, 'RECORD'), 'w', encoding='utf-8') as f:
+            f.write(f"{name.replace('-', '_')}-{BENCH_VERSION}.dist-info/METADATA,,\n")
+    return directory
+
+
+def write_fake_pip(directory: str, site_packages: str) -> Dict[str, str]:
+    """
+    Создать подменный пакет pip и вернуть переменные окружения для него
+
+    Каталог добавляется в начало PYTHONPATH, поэтому ``sys.executable -m pip``
+    в дочерних процессах находит подменный pip раньше настоящего.
+    """
+    package_dir = os.path.join(directory, 'pip')
+    os.makedirs(package_dir, exist_ok=True)
+    with open(os.path.join(package_dir, '__init__.py'), 'w', encoding='utf-8') as f:
+        f.write('')
+    with open(os.path.join(package_dir, '__main__.py'), 'w', encoding='utf-8') as f:
+        f.write(FAKE_PIP_MAIN.format(env=FAKE_PIP_SITE_ENV))
+
+    python_path = os.pathsep.join(filter(None, [directory, os.environ.get('PYTHONPATH')]))
+    return {'PYTHONPATH': python_path, FAKE_PIP_SITE_ENV: site_packages}
+
+
+def generate_nuspecs(adjacency: Dict[str, List[str]]) -> Dict[Tuple[str, str], str]:
+    """nuspec файлы графа для NuGetStubServer: одна версия на пакет, диапазоны вида [1.0.0, )"""
+    nuspecs = {}
+    for name, dependencies in adjacency.items():
+        lines = [
+            '<?xml version="1.0" encoding="utf-8"?>',
+            '<package xmlns="http://schemas.microsoft.com/packaging/2013/05/nuspec.xsd">',
+            '  <metadata>',
+            f'    <id>{name}</id>',
+            f'    <version>{BENCH_VERSION}</version>',
+            '    <description>Синтетический пакет для замеров</description>',
+            '    <dependencies>',
+            '      <group targetFramework="net8.0">',
+        ]
+        lines.extend(f'        <dependency id="{dependency}" version="[{BENCH_VERSION}, )" />'
+                     for dependency in dependencies)
+        lines.extend(['      </group>', '    </dependencies>', '  </metadata>', '</package>'])
+        nuspecs[(name, BENCH_VERSION)] = '\n'.join(lines)
+    return nuspecs
@@ -1,20 +1,157 @@
+import argparse
+import json
 import sys
-from config import PackageAnalyzerConfig
+from typing import Dict, List, Optional, Tuple
+from config import EXPORT_EXTENSIONS, PackageAnalyzerConfig
 from exceptions import ConfigurationError
 
-def main():
+def analyze_python_package(config: PackageAnalyzerConfig) -> Tuple[str, Dict[str, List[str]]]:
+    """Построить подграф установленного Python пакета с отсечением по глубине и фильтру"""
+    from dependency_parser import DependencyParser
+    from metadata_reader import normalize_name
+
+    parser = DependencyParser()
+    parser.build_package_graph(config.package_name, config.max_depth, config.filter_substring)
+    return normalize_name(config.package_name), parser.dependencies
+
+def analyze_nuget_package(config: PackageAnalyzerConfig) -> Tuple[str, Dict[str, List[str]]]:
+    """Разрешить транзитивные зависимости NuGet пакета с отсечением по глубине и фильтру"""
+    from dependency_analyzer import NuGetDependencyAnalyzer
+    from nuget_resolver import TransitiveResolver
+
+    # В тестовом режиме сеть не используется: только HTTP кэш или локальный каталог
+    analyzer = NuGetDependencyAnalyzer.from_repository(config.repository_url, offline=config.test_mode)
+    resolver = TransitiveResolver(analyzer, max_depth=config.max_depth,
+                                  filter_substring=config.filter_substring)
+    try:
+        result = resolver.resolve([(config.package_name, config.package_version)])
+    finally:
+        analyzer.close()
+
+    def label(package_id: str, version: str) -> str:
+        return f"{package_id} {version}"
+
+    adjacency: Dict[str, List[str]] = {}
+    for node in result['nodes'].values():
+        deps = [label(dep['id'], dep['version']) for dep in node['dependencies']]
+        adjacency[label(node['id'], node['version'])] = deps
+        for dep in deps:
+            adjacency.setdefault(dep, [])
+
+    for item in result['unresolved']:
+        print(f"⚠️  Не удалось разрешить {item['id']} {item['range']}")
+
+    root_id, root_version = result['roots'][0]
+    return label(resolver.nodes[(root_id, root_version)]['id'], root_version), adjacency
+
+def save_output(config: PackageAnalyzerConfig, root: str, adjacency: Dict[str, List[str]]):
+    """Сохранить граф в output_filename: экспорт для .mmd/.dot/.graphml, иначе изображение"""
+    if config.output_filename.lower().endswith(EXPORT_EXTENSIONS):
+        from graph_exporters import export_graph
+        export_graph(adjacency, config.output_filename, roots=[root])
+        print(f"Граф сохранен в {config.output_filename}")
+        return
+
+    from dependency_parser import DependencyParser
+    from graph_visualizer import GraphVisualizer
+
+    parser = DependencyParser()
+    for package, deps in adjacency.items():
+        parser.update_package_dependencies(package, deps)
+    # Граф уже отсечен при построении, поэтому рисуется целиком
+    GraphVisualizer(parser, headless=True).visualize_package_dependencies(
+        root, config.output_filename, max_depth=None)
+
+def run_analysis(config: PackageAnalyzerConfig) -> Dict[str, List[str]]:
+    """Выполнить анализ по загруженной конфигурации и сохранить результат"""
+    if config.repository_type == 'nuget':
+        root, adjacency = analyze_nuget_package(config)
+    else:
+        root, adjacency = analyze_python_package(config)
+
+    edges = sum(len(deps) for deps in adjacency.values())
+    print(f"\nГраф зависимостей {root}: {len(adjacency)} пакетов, {edges} зависимостей")
+    for package, deps in adjacency.items():
+        if deps:
+            print(f"  {package} -> {', '.join(deps)}")
+
+    save_output(config, root, adjacency)
+    return adjacency
+
+def split_query(query: List[str]) -> Tuple[str, Optional[str], Dict[str, str]]:
+    """
+    Разобрать токены --query: вид запроса, необязательный пакет и параметры ключ=значение
+
+    Raises:
+        ValueError: Лишний токен без "=" или параметр без имени
+    """
+    kind, package, params = query[0], None, {}
+    for token in query[1:]:
+        key, separator, value = token.partition('=')
+        if separator:
+            if not key:
+                raise ValueError(f"Параметр без имени: {token}")
+            params[key] = value
+        elif package is None:
+            package = token
+        else:
+            raise ValueError(f"Лишний аргумент запроса: {token} (параметры задаются как ключ=значение)")
+    return kind, package, params
+
+def run_query(address: str, query: List[str]):
+    """Клиентский режим: выполнить запрос к запущенному analysis_server и напечатать ответ"""
+    from analysis_server import AnalysisClient
+
+    kind, package, params = split_query(query)
+    with AnalysisClient(address) as client:
+        response = client.query(kind, package, **params)
+
+    result = response.get('result', response)
+    if isinstance(result, str):
+        print(result)
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+def parse_args(argv=None):
+    """Разобрать аргументы командной строки"""
+    arg_parser = argparse.ArgumentParser(description="Анализ зависимостей пакета по XML конфигурации")
+    arg_parser.add_argument('config', nargs='?', default="config.xml",
+                            help="путь к XML файлу конфигурации")
+    arg_parser.add_argument('--server', metavar='ADDRESS', default=None,
+                            help="адрес analysis_server (хост:порт или unix:/путь) для режима клиента")
+    arg_parser.add_argument('--query', nargs='+', metavar=('KIND', 'PACKAGE'), default=None,
+                            help="запрос к серверу: health, deps, reverse, closure, mermaid или compare; "
+                                 "параметры - ключ=значение (direction=dependents, max_nodes=50, max_depth=3)")
+    args = arg_parser.parse_args(argv)
+    if args.query:
+        try:
+            split_query(args.query)
+        except ValueError as e:
+            arg_parser.error(str(e))
+    return args
+
+def main(argv=None):
     """Основная функция CLI приложения"""
+    args = parse_args(argv)
     try:
+        if args.query:
+            from analysis_server import DEFAULT_ADDRESS, QueryError
+            try:
+                run_query(args.server or DEFAULT_ADDRESS, args.query)
+            except (QueryError, OSError) as e:
+                print(f"Ошибка запроса к серверу: {e}", file=sys.stderr)
+                sys.exit(1)
+            return
+
         # Загрузка конфигурации
-        config = PackageAnalyzerConfig()
+        config = PackageAnalyzerConfig(args.config)
         config.load_config()
-        
+
         # Вывод конфигурации (требование этапа 1)
         config.display_config()
-        
-        # Здесь в будущих этапах будет основная логика анализа
-        print("\nКонфигурация успешно загружена. Готов к анализу зависимостей!")
-        
+
+        run_analysis(config)
+
     except ConfigurationError as e:
         print(f"Ошибка конфигурации: {e}", file=sys.stderr)
         sys.exit(1)
@@ -26,4 +163,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
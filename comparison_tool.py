@@ -1,19 +1,30 @@
 import subprocess
 import json
-import networkx as nx
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional
+import instrumentation
+from graph_traversal import breadth_first
+from metadata_reader import MetadataReader, normalize_name
+from requirement_records import requirement_name
+
+if TYPE_CHECKING:
+    import networkx as nx
 
 class ComparisonTool:
+    # Источники эталонных данных для пакетного сравнения
+    SNAPSHOT_SOURCES = ('pipdeptree', 'metadata')
+
     def __init__(self, dependency_parser):
         self.parser = dependency_parser
     
     def get_official_dependencies(self, package_name: str) -> Dict:
         """Получить зависимости через официальные инструменты (pipdeptree)"""
         try:
-            result = subprocess.run(
-                ['pipdeptree', '-p', package_name, '--json'],
-                capture_output=True, text=True, check=True
-            )
+            instrumentation.count('subprocess.pipdeptree')
+            with instrumentation.span('subprocess.pipdeptree', package=package_name):
+                result = subprocess.run(
+                    ['pipdeptree', '-p', package_name, '--json'],
+                    capture_output=True, text=True, check=True
+                )
             
             data = json.loads(result.stdout)
             return self._parse_pipdeptree_output(data, package_name)
@@ -25,37 +36,125 @@ class ComparisonTool:
     def _parse_pipdeptree_output(self, data: List, package_name: str) -> Dict:
         """Парсить вывод pipdeptree"""
         dependencies = {}
+        graph = {}
         
         for item in data:
-            if item['package']['key'].lower() == package_name.lower():
+            key = item['package']['key'].lower()
+            graph[key] = [requirement_name(dep['key']) for dep in item.get('dependencies', [])]
+            
+            if key == package_name.lower():
                 dependencies['package'] = package_name
-                dependencies['dependencies'] = []
-                
-                for dep in item.get('dependencies', []):
-                    dep_name = dep['key'].split('[')[0]  # Убираем extras
-                    dependencies['dependencies'].append(dep_name)
-                
-                break
+                dependencies['dependencies'] = graph[key]
         
+        if dependencies:
+            dependencies['graph'] = graph
         return dependencies
     
-    def create_official_graph(self, package_name: str) -> nx.DiGraph:
+    def create_official_graph(self, package_name: str, max_depth: int = 0) -> 'nx.DiGraph':
         """Создать граф из официальных данных"""
+        import networkx as nx
+        
         G = nx.DiGraph()
         official_data = self.get_official_dependencies(package_name)
         
         if not official_data:
             return G
         
-        G.add_node(package_name)
-        
-        for dep in official_data.get('dependencies', []):
-            G.add_node(dep)
-            G.add_edge(package_name, dep)
+        # Корневой пакет может быть записан в другом регистре, чем ключи pipdeptree
+        graph = dict(official_data['graph'])
+        graph[package_name] = official_data['dependencies']
+        traversal = breadth_first([package_name], lambda pkg: graph.get(pkg, []), max_depth)
         
+        G.add_nodes_from(traversal.depths)
+        G.add_edges_from(traversal.edges)
         return G
     
-    def compare_graphs(self, our_graph: nx.DiGraph, official_graph: nx.DiGraph) -> Dict:
+    def get_environment_snapshot(self, source: str = 'pipdeptree') -> Optional[Dict[str, List[str]]]:
+        """
+        Получить прямые зависимости всех пакетов окружения одним вызовом
+        
+        Args:
+            source: 'pipdeptree' (один запуск pipdeptree --json) или
+                    'metadata' (чтение метаданных дистрибутивов в процессе)
+            
+        Returns:
+            Словарь {пакет: список зависимостей} или None, если источник недоступен
+        """
+        if source not in self.SNAPSHOT_SOURCES:
+            raise ValueError(f"Неизвестный источник данных: {source}")
+        
+        if source == 'metadata':
+            # Маркеры вычисляются для того же окружения, что и у проверяемого графа
+            return MetadataReader(environment=self.parser.metadata_reader.environment).read_all()
+        
+        try:
+            instrumentation.count('subprocess.pipdeptree')
+            with instrumentation.span('subprocess.pipdeptree'):
+                result = subprocess.run(
+                    ['pipdeptree', '--json'],
+                    capture_output=True, text=True, check=True
+                )
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            print("pipdeptree не установлен. Установите: pip install pipdeptree")
+            return None
+        
+        snapshot = {}
+        for item in json.loads(result.stdout):
+            key = normalize_name(item['package']['key'])
+            snapshot[key] = [requirement_name(dep['key']) for dep in item.get('dependencies', [])]
+        return snapshot
+    
+    def compare_environment(self, source: str = 'pipdeptree') -> Optional[Dict]:
+        """
+        Сравнить прямые зависимости всех пакетов окружения за один проход
+        
+        Args:
+            source: Источник эталонных данных (см. get_environment_snapshot)
+            
+        Returns:
+            Машиночитаемый отчет по всему окружению или None, если источник недоступен
+        """
+        snapshot = self.get_environment_snapshot(source)
+        if snapshot is None:
+            return None
+        
+        ours = {normalize_name(package): deps for package, deps in self.parser.dependencies.items()}
+        packages = {}
+        counts = {'match': 0, 'mismatch': 0, 'missing_ours': 0, 'not_installed': 0}
+        
+        for package in sorted(set(ours) | set(snapshot)):
+            if package not in snapshot:
+                # Зависимость, которая упомянута в метаданных, но не установлена
+                status = 'not_installed'
+                entry = {'status': status}
+            elif package not in ours:
+                status = 'missing_ours'
+                entry = {'status': status, 'official_dependencies': sorted(snapshot[package])}
+            else:
+                our_deps = {normalize_name(dep) for dep in ours[package]}
+                official_deps = set(snapshot[package])
+                status = 'match' if our_deps == official_deps else 'mismatch'
+                entry = {'status': status}
+                if status == 'mismatch':
+                    entry['our_unique_dependencies'] = sorted(our_deps - official_deps)
+                    entry['official_unique_dependencies'] = sorted(official_deps - our_deps)
+            
+            counts[status] += 1
+            packages[package] = entry
+        
+        return {
+            'source': source,
+            'summary': dict(counts, packages=len(packages)),
+            'packages': packages
+        }
+    
+    def save_environment_report(self, report: Dict, filename: str):
+        """Сохранить отчет о сравнении окружения в JSON"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Отчет о сравнении окружения сохранен в {filename}")
+    
+    def compare_graphs(self, our_graph: 'nx.DiGraph', official_graph: 'nx.DiGraph') -> Dict:
         """Сравнить два графа"""
         our_nodes = set(our_graph.nodes())
         official_nodes = set(official_graph.nodes())
@@ -119,7 +218,7 @@ class ComparisonTool:
                 "• pipdeptree показывает только прямые зависимости, указанные в метаданных пакета"
             )
         
-        if len(comparison_result['our_node_count']) > len(comparison_result['official_node_count']):
+        if comparison_result['our_node_count'] > comparison_result['official_node_count']:
             reasons.append(
                 "• Наш анализ может быть более глубоким и включать непрямые зависимости"
             )
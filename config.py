@@ -2,6 +2,11 @@
 Конфигурационный файл с предопределенными пакетами для анализа
 """
 
+# typing не импортируется: модуль входит в самый жесткий бюджет времени импорта
+import os
+
+from exceptions import InvalidParameterError, MissingParameterError, XMLConfigError
+
 # Список пакетов для анализа (название, версия)
 PACKAGES_TO_ANALYZE = [
     ("Newtonsoft.Json", "13.0.1"),
@@ -14,6 +19,152 @@ PACKAGES_TO_ANALYZE = [
     ("Moq", "4.18.4")
 ]
 
+# Python пакеты, обрабатываемые main.py, если список не задан в командной строке
+PYTHON_PACKAGES_TO_ANALYZE = ['requests', 'numpy', 'matplotlib']
+
 # Настройки анализатора
-REQUEST_DELAY = 1  # Задержка между запросами в секундах
-TIMEOUT = 30  # Таймаут запросов в секундах
\ No newline at end of file
+REPOSITORY_URL = "https://api.nuget.org/v3-flatcontainer"  # URL flat-container API или путь к каталогу с .nupkg
+REQUESTS_PER_SECOND = 10  # Ограничение частоты запросов (0 - без ограничения)
+MAX_WORKERS = 8  # Число параллельных запросов и постоянных соединений
+TIMEOUT = 30  # Таймаут запросов в секундах
+HTTP_CACHE_DIR = None  # Каталог HTTP кэша (None - ~/.cache/nuget-dependency-analyzer/http)
+HTTP_CACHE_MAX_BYTES = 100 * 1024 * 1024  # Лимит размера HTTP кэша в байтах
+
+# Расширения output_filename: изображения рисуются GraphVisualizer, остальные - экспортеры графа
+IMAGE_EXTENSIONS = ('.png', '.svg', '.pdf', '.jpg', '.jpeg')
+EXPORT_EXTENSIONS = ('.mmd', '.dot', '.gv', '.graphml')
+
+REPOSITORY_TYPES = ('python', 'nuget')
+
+
+class PackageAnalyzerConfig:
+    """
+    Параметры анализа одного пакета из XML файла
+
+    Обязательные параметры: package_name, repository_url. Необязательные:
+    repository_type ('python' - установленные пакеты окружения, 'nuget' -
+    flat-container API или каталог с .nupkg; по умолчанию определяется по
+    repository_url), test_mode (без обращения к сети), package_version,
+    output_filename, max_depth (глубина раскрываемых пакетов) и
+    filter_substring (пакеты с этой подстрокой в названии исключаются из
+    обхода вместе с поддеревьями).
+
+    Args:
+        config_file: Путь к XML файлу конфигурации
+    """
+
+    DEFAULT_MAX_DEPTH = 3
+
+    def __init__(self, config_file: str = "config.xml"):
+        self.config_file = config_file
+        self.package_name = None
+        self.repository_url = None
+        self.repository_type = None
+        self.test_mode = False
+        self.package_version = None
+        self.output_filename = None
+        self.max_depth = self.DEFAULT_MAX_DEPTH
+        self.filter_substring = ''
+
+    def load_config(self) -> 'PackageAnalyzerConfig':
+        """
+        Прочитать и проверить параметры
+
+        Raises:
+            XMLConfigError: Файл отсутствует или не является корректным XML
+            MissingParameterError: Не задан обязательный параметр
+            InvalidParameterError: Значение параметра некорректно
+        """
+        # ElementTree загружается только при чтении конфигурации
+        import xml.etree.ElementTree as ET
+
+        try:
+            root = ET.parse(self.config_file).getroot()
+        except FileNotFoundError:
+            raise XMLConfigError(f"Файл конфигурации не найден: {self.config_file}")
+        except ET.ParseError as e:
+            raise XMLConfigError(f"Ошибка разбора XML в {self.config_file}: {e}")
+
+        values = {child.tag: (child.text or '').strip() for child in root}
+
+        self.package_name = self._required(values, 'package_name')
+        self.repository_url = self._required(values, 'repository_url')
+        self.test_mode = self._parse_bool(values, 'test_mode', False)
+        self.package_version = values.get('package_version') or None
+        self.max_depth = self._parse_depth(values)
+        self.filter_substring = values.get('filter_substring', '')
+
+        self.repository_type = values.get('repository_type') or self._detect_repository_type()
+        if self.repository_type not in REPOSITORY_TYPES:
+            raise InvalidParameterError(
+                f"repository_type: ожидается одно из {', '.join(REPOSITORY_TYPES)}, "
+                f"получено '{self.repository_type}'")
+        if self.repository_type == 'nuget' and self.package_version is None:
+            raise MissingParameterError("package_version: обязателен для NuGet репозитория")
+
+        self.output_filename = values.get('output_filename') or f"{self.package_name}_dependencies.png"
+        if not self.output_filename.lower().endswith(IMAGE_EXTENSIONS + EXPORT_EXTENSIONS):
+            raise InvalidParameterError(
+                f"output_filename: неподдерживаемое расширение файла '{self.output_filename}'")
+        return self
+
+    @staticmethod
+    def _required(values: dict, name: str) -> str:
+        if name not in values:
+            raise MissingParameterError(f"{name}: обязательный параметр отсутствует")
+        if not values[name]:
+            raise MissingParameterError(f"{name}: обязательный параметр не может быть пустым")
+        return values[name]
+
+    @staticmethod
+    def _parse_bool(values: dict, name: str, default: bool) -> bool:
+        value = values.get(name, '').lower()
+        if not value:
+            return default
+        if value in ('true', '1', 'yes'):
+            return True
+        if value in ('false', '0', 'no'):
+            return False
+        raise InvalidParameterError(f"{name}: ожидается true или false, получено '{values[name]}'")
+
+    def _parse_depth(self, values: dict) -> int:
+        value = values.get('max_depth')
+        if not value:
+            return self.DEFAULT_MAX_DEPTH
+        try:
+            depth = int(value)
+        except ValueError:
+            raise InvalidParameterError(f"max_depth: ожидается целое число, получено '{value}'")
+        if depth < 0:
+            raise InvalidParameterError(f"max_depth: значение не может быть отрицательным ({depth})")
+        return depth
+
+    def _detect_repository_type(self) -> str:
+        """NuGet для flat-container API и каталогов с .nupkg, иначе окружение Python"""
+        url = self.repository_url.lower()
+        if url.startswith(('http://', 'https://')):
+            return 'nuget' if 'nuget' in url or 'flatcontainer' in url.replace('-', '') else 'python'
+        if os.path.isdir(self.repository_url):
+            # Тот же обход, что и у локального репозитория: плоский каталог или id/version/
+            from nuget_local_feed import contains_packages
+            if contains_packages(self.repository_url):
+                return 'nuget'
+        return 'python'
+
+    def to_dict(self) -> dict:
+        return {
+            'package_name': self.package_name,
+            'repository_url': self.repository_url,
+            'repository_type': self.repository_type,
+            'test_mode': self.test_mode,
+            'package_version': self.package_version,
+            'output_filename': self.output_filename,
+            'max_depth': self.max_depth,
+            'filter_substring': self.filter_substring,
+        }
+
+    def display_config(self):
+        """Вывести параметры в формате ключ-значение"""
+        print(f"Конфигурация ({self.config_file}):")
+        for key, value in self.to_dict().items():
+            print(f"  {key}: {value if value not in (None, '') else '-'}")
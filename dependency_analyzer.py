@@ -1,8 +1,133 @@
-import urllib.request
-import urllib.error
+import argparse
+import http.client
+import itertools
 import json
+import queue
 import sys
-from typing import List, Dict, Optional
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
+
+import config
+import instrumentation
+from http_cache import HttpDiskCache
+from http_pool import ConnectionPool, TokenBucket
+from nuget_local_feed import LocalNuGetFeed
+from nuspec_parser import flatten_dependencies, iter_chunks, parse_nuspec
+
+
+class DependencyRecord:
+    """
+    Зависимость NuGet пакета из одной группы targetFramework
+
+    Строки id, version и framework интернируются: у тысяч пакетов они
+    повторяются (одни и те же зависимости, диапазоны и платформы).
+    """
+
+    __slots__ = ('id', 'version', 'framework')
+
+    def __init__(self, package_id: str, version: str, framework: str = ''):
+        self.id = sys.intern(package_id)
+        self.version = sys.intern(version)
+        self.framework = sys.intern(framework)
+
+    def __repr__(self) -> str:
+        return f"DependencyRecord({self.id} {self.version}, {self.framework or 'any'})"
+
+    def to_dict(self) -> Dict[str, str]:
+        return {'id': self.id, 'version': self.version, 'framework': self.framework}
+
+
+class PackageResult:
+    """
+    Результат анализа одного пакета для потокового API
+
+    Args:
+        package_id: Название пакета
+        version: Версия пакета
+        dependencies: Зависимости всех групп targetFramework в порядке nuspec
+        error: Текст ошибки, если nuspec не удалось получить или разобрать
+    """
+
+    __slots__ = ('id', 'version', 'dependencies', 'error')
+
+    def __init__(self, package_id: str, version: str, dependencies: Tuple[DependencyRecord, ...] = (),
+                 error: Optional[str] = None):
+        self.id = sys.intern(package_id)
+        self.version = sys.intern(version)
+        self.dependencies = dependencies
+        self.error = error
+
+    @property
+    def found(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        state = f"error={self.error!r}" if self.error else f"{len(self.dependencies)} dependencies"
+        return f"PackageResult({self.id} {self.version}, {state})"
+
+    def direct_dependencies(self) -> List[DependencyRecord]:
+        """Зависимости без дубликатов между группами (как flatten_dependencies)"""
+        seen = set()
+        unique = []
+        for dependency in self.dependencies:
+            key = dependency.id.lower()
+            if key not in seen:
+                seen.add(key)
+                unique.append(dependency)
+        return unique
+
+    def to_dict(self) -> Dict:
+        return {'id': self.id, 'version': self.version, 'found': self.found, 'error': self.error,
+                'dependencies': [dependency.to_dict() for dependency in self.dependencies]}
+
+
+class JsonLinesSink:
+    """
+    Запись результатов в JSON Lines по мере их поступления
+
+    Каждый результат сразу записывается одной строкой и сбрасывается в файл,
+    поэтому другой процесс может читать файл, пока анализ еще идет.
+
+    Args:
+        target: Имя файла или открытый текстовый поток (например, sys.stdout)
+        flush: Сбрасывать буфер после каждой записи
+    """
+
+    def __init__(self, target, flush: bool = True):
+        self._owns_handle = isinstance(target, str)
+        self.handle = open(target, 'w', encoding='utf-8') if self._owns_handle else target
+        self.flush = flush
+        self.written = 0
+        self.errors = 0
+
+    def write(self, result: PackageResult):
+        self.handle.write(json.dumps(result.to_dict(), ensure_ascii=False) + '\n')
+        if self.flush:
+            self.handle.flush()
+        self.written += 1
+        if not result.found:
+            self.errors += 1
+
+    def consume(self, results: Iterable[PackageResult]) -> int:
+        """Записать все результаты потока и вернуть их число"""
+        for result in results:
+            self.write(result)
+        return self.written
+
+    def close(self):
+        if self._owns_handle:
+            self.handle.close()
+        else:
+            self.handle.flush()
+
+    def __enter__(self) -> 'JsonLinesSink':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
 
 class NuGetDependencyAnalyzer:
     """
@@ -12,10 +137,62 @@ class NuGetDependencyAnalyzer:
     # Базовый URL для NuGet API
     NUGET_API_BASE_URL = "https://api.nuget.org/v3-flatcontainer"
     
-    def __init__(self):
-        self.session = urllib.request.build_opener()
-        self.session.addheaders = [('User-Agent', 'NuGet-Dependency-Analyzer/1.0')]
+    def __init__(self, base_url: Optional[str] = None, max_workers: Optional[int] = None,
+                 requests_per_second: Optional[float] = None, timeout: Optional[float] = None,
+                 cache: Optional[HttpDiskCache] = None, use_cache: bool = True, offline: bool = False,
+                 local_feed: Optional[LocalNuGetFeed] = None, quiet: bool = False):
+        """
+        Args:
+            base_url: Базовый URL flat-container API (по умолчанию api.nuget.org)
+            max_workers: Число параллельных запросов в get_many
+            requests_per_second: Ограничение частоты запросов (0 - без ограничения)
+            timeout: Таймаут запроса в секундах
+            cache: Дисковый HTTP кэш (по умолчанию создается из настроек config)
+            use_cache: Использовать ли дисковый HTTP кэш
+            offline: Работать только с кэшем, не обращаясь к сети
+            local_feed: Локальный репозиторий .nupkg файлов вместо HTTP API
+            quiet: Не печатать сообщения о каждом запросе и ошибке
+        """
+        self.base_url = (base_url or self.NUGET_API_BASE_URL).rstrip('/')
+        self.max_workers = max_workers or config.MAX_WORKERS
+        self.timeout = timeout if timeout is not None else config.TIMEOUT
+        if requests_per_second is None:
+            requests_per_second = config.REQUESTS_PER_SECOND
+
+        if cache is None and use_cache:
+            cache = HttpDiskCache(config.HTTP_CACHE_DIR, config.HTTP_CACHE_MAX_BYTES)
+        self.cache = cache
+        self.offline = offline
+        self.local_feed = local_feed
+        self.quiet = quiet
+
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.session = ConnectionPool(
+            self.base_url,
+            max_connections=self.max_workers,
+            timeout=self.timeout,
+            headers={'User-Agent': 'NuGet-Dependency-Analyzer/1.0'}
+        )
+    
+    @classmethod
+    def from_repository(cls, repository_url: str, **kwargs) -> 'NuGetDependencyAnalyzer':
+        """
+        Создает анализатор для репозитория: HTTP(S) API или локальный каталог
+        
+        Args:
+            repository_url: URL flat-container API или путь к каталогу с .nupkg
+            **kwargs: Дополнительные параметры конструктора
+            
+        Returns:
+            Настроенный анализатор
+        """
+        if repository_url.startswith(('http://', 'https://')):
+            return cls(base_url=repository_url, **kwargs)
+        # Локальные файлы читаются быстрее HTTP кэша, но явный use_cache уважаем
+        kwargs.setdefault('use_cache', False)
+        return cls(local_feed=LocalNuGetFeed(repository_url), **kwargs)
     
+    @instrumentation.traced('nuget.get_package_info')
     def get_package_info(self, package_name: str, version: str) -> Optional[Dict]:
         """
         Получает информацию о пакете из NuGet API
@@ -27,109 +204,276 @@ class NuGetDependencyAnalyzer:
         Returns:
             Словарь с информацией о пакете или None в случае ошибки
         """
-        try:
-            # Формируем URL для получения информации о пакете
-            url = f"{self.NUGET_API_BASE_URL}/{package_name.lower()}/{version}/{package_name.lower()}.nuspec"
+        content, error = self._load_nuspec(package_name, version)
+        if content is None:
+            self._report(error)
+            return None
+        return self._parse_nuspec_content(content, package_name, version)
+    
+    @instrumentation.traced('nuget.fetch_package')
+    def fetch_package(self, package_name: str, version: str) -> PackageResult:
+        """
+        Получает зависимости пакета в виде компактной записи
+        
+        Ошибки не печатаются, а сохраняются в записи результата.
+        
+        Args:
+            package_name: Название пакета
+            version: Версия пакета
             
-            print(f"Запрос к API: {url}")
+        Returns:
+            Результат анализа пакета
+        """
+        content, error = self._load_nuspec(package_name, version)
+        if content is None:
+            return PackageResult(package_name, version, error=error)
+        
+        try:
+            parsed = parse_nuspec(iter_chunks(content))
+        except ET.ParseError as e:
+            return PackageResult(package_name, version, error=f"Ошибка при парсинге зависимостей: {str(e)}")
+        
+        dependencies = tuple(DependencyRecord(dependency['id'], dependency['version'], framework)
+                             for framework, group in parsed['groups'].items()
+                             for dependency in group)
+        return PackageResult(package_name, version, dependencies)
+    
+    def _load_nuspec(self, package_name: str, version: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Загружает nuspec пакета из локального репозитория или API
+        
+        Returns:
+            Кортеж (содержимое nuspec, None) или (None, текст ошибки)
+        """
+        if self.local_feed is not None:
+            content = self.local_feed.get_nuspec(package_name, version)
+            if content is None:
+                return None, f"Ошибка: Пакет {package_name} {version} не найден в локальном репозитории"
+            return content, None
+        
+        try:
+            # Формируем путь к nuspec файлу пакета
+            package_id = package_name.lower()
+            path = f"{package_id}/{version.lower()}/{package_id}.nuspec"
             
-            # Выполняем HTTP-запрос
-            with self.session.open(url) as response:
-                if response.status == 200:
-                    # Читаем и декодируем XML ответ (NuGet использует nuspec формат)
-                    content = response.read().decode('utf-8')
-                    return self._parse_nuspec_content(content, package_name, version)
-                else:
-                    print(f"Ошибка: Пакет не найден (HTTP {response.status})")
-                    return None
+            # Опубликованный nuspec для конкретной версии никогда не меняется
+            status, body = self._fetch(path, immutable=True)
+            if status == 200:
+                return body, None
+            return None, f"Ошибка: Пакет не найден (HTTP {status})"
                     
-        except urllib.error.HTTPError as e:
-            print(f"HTTP ошибка: {e.code} - {e.reason}")
-            return None
-        except urllib.error.URLError as e:
-            print(f"URL ошибка: {e.reason}")
-            return None
+        except (OSError, http.client.HTTPException) as e:
+            return None, f"Ошибка соединения: {str(e)}"
         except Exception as e:
-            print(f"Неожиданная ошибка: {str(e)}")
-            return None
+            return None, f"Неожиданная ошибка: {str(e)}"
+    
+    def _report(self, message: str):
+        """Вывести сообщение о запросе, если анализатор не в тихом режиме"""
+        if not self.quiet:
+            print(message)
     
-    def _parse_nuspec_content(self, content: str, package_name: str, version: str) -> Dict:
+    def get_package_versions(self, package_name: str) -> List[str]:
         """
-        Парсит содержимое nuspec файла и извлекает зависимости
+        Получает список опубликованных версий пакета из индекса версий
         
         Args:
-            content: XML содержимое nuspec файла
             package_name: Название пакета
-            version: Версия пакета
             
         Returns:
-            Словарь с информацией о пакете и его зависимостях
+            Список версий (пустой в случае ошибки)
         """
-        package_info = {
-            'name': package_name,
-            'version': version,
-            'dependencies': []
-        }
+        if self.local_feed is not None:
+            return self.local_feed.get_versions(package_name) or []
         
         try:
-            # Упрощенный парсинг XML для извлечения зависимостей
-            lines = content.split('\n')
-            in_dependencies = False
+            status, body = self._fetch(f"{package_name.lower()}/index.json", immutable=False)
+            if status == 200:
+                return json.loads(body.decode('utf-8')).get('versions', [])
+            self._report(f"Ошибка: Индекс версий не найден (HTTP {status})")
+        except (OSError, http.client.HTTPException) as e:
+            self._report(f"Ошибка соединения: {str(e)}")
+        except ValueError as e:
+            self._report(f"Ошибка разбора индекса версий: {str(e)}")
+        return []
+    
+    def _fetch(self, path: str, immutable: bool) -> Tuple[int, bytes]:
+        """
+        Выполняет GET запрос с учетом дискового кэша
+        
+        Неизменяемые ответы отдаются из кэша без обращения к сети, остальные
+        перепроверяются условным запросом с If-None-Match.
+        
+        Args:
+            path: Путь относительно базового URL
+            immutable: Ответ по этому пути никогда не меняется
             
-            for line in lines:
-                line = line.strip()
-                
-                # Ищем начало секции зависимостей
-                if '<dependencies>' in line:
-                    in_dependencies = True
-                    continue
-                
-                # Ищем конец секции зависимостей
-                if '</dependencies>' in line:
-                    in_dependencies = False
-                    continue
-                
-                # Парсим зависимости
-                if in_dependencies and '<dependency' in line:
-                    dependency = self._parse_dependency_line(line)
-                    if dependency:
-                        package_info['dependencies'].append(dependency)
-                        
-        except Exception as e:
-            print(f"Ошибка при парсинге зависимостей: {str(e)}")
+        Returns:
+            Кортеж (HTTP статус, тело ответа)
+        """
+        url = f"{self.base_url}/{path}"
+        entry = self.cache.lookup(url) if self.cache is not None else None
         
-        return package_info
+        if entry is not None and (entry['immutable'] or self.offline):
+            body = self.cache.read(url)
+            if body is not None:
+                instrumentation.count('http.cache_hits')
+                return 200, body
+            entry = None
+        
+        if self.offline:
+            self._report(f"Офлайн режим: ответ отсутствует в кэше ({url})")
+            return 504, b''
+        
+        headers = {}
+        if entry is not None and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        
+        self._report(f"Запрос к API: {url}")
+        status, response_headers, body = self._request(path, headers)
+        
+        if status == 304 and headers:
+            instrumentation.count('http.not_modified')
+            self.cache.touch(url)
+            cached_body = self.cache.read(url)
+            if cached_body is not None:
+                return 200, cached_body
+            # Тело пропало из кэша - запрашиваем ответ целиком
+            status, response_headers, body = self._request(path)
+        
+        if status == 200 and self.cache is not None:
+            self.cache.store(url, body, response_headers.get('etag'), immutable)
+        
+        return status, body
     
-    def _parse_dependency_line(self, line: str) -> Optional[Dict]:
+    def _request(self, path: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Один HTTP запрос с учетом ограничения частоты и метриками запросов"""
+        self.rate_limiter.acquire()
+        with instrumentation.span('http.request', path=path):
+            started = time.perf_counter()
+            status, response_headers, body = self.session.request(path, headers)
+        instrumentation.count('http.requests')
+        instrumentation.count('http.bytes', len(body))
+        instrumentation.observe('http.latency_ms', (time.perf_counter() - started) * 1000)
+        return status, response_headers, body
+    
+    def get_many(self, packages: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[Dict]]:
         """
-        Парсит строку с информацией о зависимости
+        Получает информацию о нескольких пакетах параллельно
         
         Args:
-            line: Строка XML с информацией о зависимости
+            packages: Пары (название пакета, версия)
             
         Returns:
-            Словарь с информацией о зависимости или None в случае ошибки
+            Словарь {(название, версия): информация о пакете или None} в порядке входных данных
         """
-        try:
-            # Извлекаем атрибуты из строки вида: <dependency id="Package.Name" version="1.0.0" />
-            id_start = line.find('id="') + 4
-            id_end = line.find('"', id_start)
+        unique_packages = list(dict.fromkeys(packages))
+        return self._map_concurrently(lambda pair: self.get_package_info(*pair), unique_packages)
+    
+    def get_many_versions(self, package_names: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Получает индексы версий нескольких пакетов параллельно
+        
+        Args:
+            package_names: Названия пакетов
             
-            version_start = line.find('version="') + 9
-            version_end = line.find('"', version_start)
+        Returns:
+            Словарь {название пакета: список версий}
+        """
+        unique_names = list(dict.fromkeys(package_names))
+        return self._map_concurrently(self.get_package_versions, unique_names)
+    
+    def iter_packages(self, packages: Iterable[Tuple[str, str]],
+                      window: Optional[int] = None) -> Iterator[PackageResult]:
+        """
+        Выдает результаты анализа пакетов по мере готовности
+        
+        Входные пары читаются лениво, а одновременно в работе находится не
+        больше window запросов, поэтому память не растет с размером пакета
+        задач и обработка первых результатов начинается до окончания всех
+        запросов. Результаты выдаются в порядке готовности; повторяющиеся
+        пары не объединяются.
+        
+        Args:
+            packages: Пары (название пакета, версия), можно генератор
+            window: Число запросов в работе (по умолчанию - удвоенное max_workers)
             
-            if id_start > 3 and id_end > id_start and version_start > 8 and version_end > version_start:
-                package_id = line[id_start:id_end]
-                package_version = line[version_start:version_end]
-                
-                return {
-                    'id': package_id,
-                    'version': package_version
-                }
-        except Exception as e:
-            print(f"Ошибка при парсинге строки зависимости: {str(e)}")
+        Yields:
+            Результат анализа каждого пакета
+        """
+        window = window or self.max_workers * 2
+        # Завершенные задачи попадают в очередь сами, без опроса всех ожидающих
+        completed: queue.SimpleQueue = queue.SimpleQueue()
+        pending = set()
+        pairs = iter(packages)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for pair in itertools.islice(pairs, window):
+                future = executor.submit(self.fetch_package, *pair)
+                pending.add(future)
+                future.add_done_callback(completed.put)
+            while pending:
+                future = completed.get()
+                pending.discard(future)
+                pair = next(pairs, None)
+                if pair is not None:
+                    next_future = executor.submit(self.fetch_package, *pair)
+                    pending.add(next_future)
+                    next_future.add_done_callback(completed.put)
+                yield future.result()
+        finally:
+            # Потребитель мог прекратить чтение: отменяем еще не начатые запросы
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            if self.cache is not None:
+                self.cache.flush()
+    
+    def _map_concurrently(self, func, items: List) -> Dict:
+        """Применить функцию к элементам на пуле потоков и сохранить индекс кэша"""
+        if not items:
+            return {}
+        
+        workers = min(self.max_workers, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = dict(zip(items, executor.map(func, items)))
         
-        return None
+        if self.cache is not None:
+            self.cache.flush()
+        return results
+    
+    def close(self):
+        """Закрыть соединения с сервером и сохранить индекс кэша"""
+        self.session.close()
+        if self.cache is not None:
+            self.cache.flush()
+    
+    def _parse_nuspec_content(self, content: bytes, package_name: str, version: str) -> Dict:
+        """
+        Парсит содержимое nuspec файла и извлекает зависимости
+        
+        Args:
+            content: XML содержимое nuspec файла (байты ответа)
+            package_name: Название пакета
+            version: Версия пакета
+            
+        Returns:
+            Словарь с информацией о пакете, его зависимостями и их группами по targetFramework
+        """
+        package_info = {
+            'name': package_name,
+            'version': version,
+            'dependencies': [],
+            'dependency_groups': {}
+        }
+        
+        try:
+            parsed = parse_nuspec(iter_chunks(content))
+            package_info['dependency_groups'] = parsed['groups']
+            package_info['dependencies'] = flatten_dependencies(parsed['groups'])
+        except ET.ParseError as e:
+            self._report(f"Ошибка при парсинге зависимостей: {str(e)}")
+        
+        return package_info
     
     def get_direct_dependencies(self, package_name: str, version: str) -> List[Dict]:
         """
@@ -142,8 +486,8 @@ class NuGetDependencyAnalyzer:
         Returns:
             Список прямых зависимостей
         """
-        print(f"\nПолучение зависимостей для пакета: {package_name} версии {version}")
-        print("=" * 50)
+        self._report(f"\nПолучение зависимостей для пакета: {package_name} версии {version}")
+        self._report("=" * 50)
         
         package_info = self.get_package_info(package_name, version)
         
@@ -174,4 +518,82 @@ class NuGetDependencyAnalyzer:
         for i, dep in enumerate(dependencies, 1):
             print(f"{i}. {dep['id']} версия {dep['version']}")
         
-        print(f"\nИтого найдено прямых зависимостей: {len(dependencies)}")
\ No newline at end of file
+        print(f"\nИтого найдено прямых зависимостей: {len(dependencies)}")
+    
+    def display_result(self, result: PackageResult):
+        """
+        Выводит результат потокового анализа на экран
+        
+        Args:
+            result: Результат анализа пакета
+        """
+        if not result.found:
+            print(f"\n{result.id} {result.version}: {result.error}")
+            return
+        self.display_dependencies(result.id, result.version,
+                                  [dependency.to_dict() for dependency in result.direct_dependencies()])
+
+
+def read_package_list(filename: str) -> Iterator[Tuple[str, str]]:
+    """Лениво читать пары (пакет, версия) из файла строк вида "Id==Version" или "Id Version" """
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                yield parse_package_spec(line)
+
+
+def parse_package_spec(spec: str) -> Tuple[str, str]:
+    """Разобрать "Id==Version" или "Id Version" в пару (пакет, версия)"""
+    package_id, separator, version = spec.partition('==')
+    if not separator:
+        package_id, _, version = spec.strip().partition(' ')
+    package_id, version = package_id.strip(), version.strip()
+    if not package_id or not version:
+        raise ValueError(f"Ожидалось Id==Version: {spec}")
+    return package_id, version
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Пакетный анализ прямых зависимостей NuGet пакетов")
+    arg_parser.add_argument('packages', nargs='*', help="пакеты вида Id==Version")
+    arg_parser.add_argument('--packages-file', default=None, help="файл со списком пакетов (по одному в строке)")
+    arg_parser.add_argument('--repository', default=None,
+                            help="URL flat-container API или каталог с .nupkg (по умолчанию api.nuget.org)")
+    arg_parser.add_argument('--output', default=None, help="файл JSON Lines (по умолчанию - stdout)")
+    arg_parser.add_argument('--workers', type=int, default=None, help="число параллельных запросов")
+    arg_parser.add_argument('--offline', action='store_true', help="только HTTP кэш, без обращения к сети")
+    arg_parser.add_argument('--verbose', action='store_true', help="печатать сообщения о каждом запросе")
+    args = arg_parser.parse_args(argv)
+
+    try:
+        pairs = [parse_package_spec(spec) for spec in args.packages]
+    except ValueError as e:
+        arg_parser.error(str(e))
+    if args.packages_file:
+        packages = itertools.chain(pairs, read_package_list(args.packages_file))
+    elif pairs:
+        packages = pairs
+    else:
+        arg_parser.error("укажите пакеты или --packages-file")
+
+    options = {'max_workers': args.workers, 'offline': args.offline, 'quiet': not args.verbose}
+    if args.repository:
+        analyzer = NuGetDependencyAnalyzer.from_repository(args.repository, **options)
+    else:
+        analyzer = NuGetDependencyAnalyzer(**options)
+
+    started = time.perf_counter()
+    try:
+        with JsonLinesSink(args.output or sys.stdout) as sink:
+            sink.consume(analyzer.iter_packages(packages))
+    finally:
+        analyzer.close()
+
+    print(f"Пакетов: {sink.written}, с ошибками: {sink.errors}, "
+          f"время {time.perf_counter() - started:.2f} с", file=sys.stderr)
+    return 1 if sink.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
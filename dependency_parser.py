@@ -1,64 +1,166 @@
 import subprocess
-import json
 import sys
-from typing import Dict, List, Set, Tuple
-import pkg_resources
+import threading
+from typing import Dict, List, Optional
+import instrumentation
+from graph_cache import DependencyGraphCache
+from graph_store import CompactGraph
+from graph_traversal import DEPENDENCIES, TraversalResult, breadth_first, substring_filter
+from reachability import ReachabilityIndex
+from metadata_reader import MetadataReader, normalize_name
+from requirement_records import TargetEnvironment, requirement_name
 
 class DependencyParser:
-    def __init__(self):
+    # Доступные источники метаданных: чтение dist-info в процессе или pip show
+    BACKENDS = ('metadata', 'pip')
+
+    def __init__(self, backend: str = 'metadata', cache: Optional[DependencyGraphCache] = None,
+                 environment: Optional[TargetEnvironment] = None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Неизвестный источник метаданных: {backend}")
+        if backend == 'pip' and environment is not None:
+            # pip show уже вычислил маркеры для текущего интерпретатора
+            raise ValueError("Целевое окружение поддерживается только источником metadata")
+        self.backend = backend
+        self.metadata_reader = MetadataReader(environment=environment)
+        self.cache = cache
         self.dependencies = {}
         self.reverse_dependencies = {}
+        self._compact_graph = None
+        self._reachability = None
+        self._reachability_lock = threading.Lock()
+    
+    @property
+    def graph(self) -> CompactGraph:
+        """Компактное (CSR) представление графа, строится при первом обращении"""
+        if self._compact_graph is None:
+            self._compact_graph = CompactGraph.from_adjacency(self.dependencies)
+        return self._compact_graph
+    
+    @property
+    def reachability(self) -> ReachabilityIndex:
+        """Индекс транзитивной достижимости, строится при первом обращении"""
+        if self._reachability is None:
+            # Потоки конвейера могут обратиться к индексу одновременно: строим его один раз
+            with self._reachability_lock:
+                if self._reachability is None:
+                    self._reachability = ReachabilityIndex(self.dependencies)
+        return self._reachability
     
     def get_installed_packages(self) -> List[str]:
         """Получить список установленных пакетов"""
-        return [pkg.key for pkg in pkg_resources.working_set]
+        return self.metadata_reader.get_installed_packages()
     
+    @instrumentation.traced('parser.get_package_dependencies')
     def get_package_dependencies(self, package_name: str) -> List[str]:
         """Получить зависимости для конкретного пакета"""
+        if self.backend == 'pip':
+            return self._get_pip_show_dependencies(package_name)
+
+        deps = self.metadata_reader.get_package_dependencies(package_name)
+        return deps if deps is not None else []
+
+    def _get_pip_show_dependencies(self, package_name: str) -> List[str]:
+        """Получить зависимости пакета через pip show (запасной вариант)"""
         try:
             # Используем pip show для получения информации о пакете
-            result = subprocess.run(
-                [sys.executable, '-m', 'pip', 'show', package_name],
-                capture_output=True, text=True, check=True
-            )
+            instrumentation.count('subprocess.pip_show')
+            with instrumentation.span('subprocess.pip_show', package=package_name):
+                result = subprocess.run(
+                    [sys.executable, '-m', 'pip', 'show', package_name],
+                    capture_output=True, text=True, check=True
+                )
             
             dependencies = []
             for line in result.stdout.split('\n'):
                 if line.startswith('Requires:'):
                     deps = line.split(':', 1)[1].strip()
                     if deps:
-                        dependencies = [dep.strip().lower() for dep in deps.split(',')]
+                        dependencies = [requirement_name(dep) for dep in deps.split(',')]
                     break
             
             return dependencies
         except subprocess.CalledProcessError:
             return []
     
+    @instrumentation.traced('parser.build_dependency_graph')
     def build_dependency_graph(self, max_depth: int = 3) -> Dict[str, List[str]]:
         """Построить граф зависимостей для всех пакетов"""
+        self._compact_graph = None
+        self._reachability = None
+        if self.cache is not None and self.backend == 'metadata':
+            return self._build_from_cache()
+
+        self.metadata_reader.invalidate()
         packages = self.get_installed_packages()
         self.dependencies = {}
         
-        for package in packages:
-            self._get_dependencies_recursive(package, set(), max_depth)
+        # Все установленные пакеты - корни одного обхода, поэтому каждый пакет
+        # раскрывается один раз на своей кратчайшей глубине
+        breadth_first(packages, self._load_dependencies, max_depth)
         
         self._build_reverse_dependencies()
         return self.dependencies
     
-    def _get_dependencies_recursive(self, package: str, visited: Set[str], max_depth: int, current_depth: int = 0):
-        """Рекурсивно получить зависимости пакета"""
-        if current_depth > max_depth or package in visited:
-            return
-        
-        visited.add(package)
-        
+    @instrumentation.traced('parser.build_package_graph')
+    def build_package_graph(self, package_name: str, max_depth: Optional[int] = None,
+                            filter_substring: Optional[str] = None) -> TraversalResult:
+        """
+        Построить граф зависимостей одного пакета с отсечением во время обхода
+
+        В отличие от build_dependency_graph, зависимости запрашиваются только
+        у пакетов, до которых доходит обход: пакеты глубже max_depth и пакеты,
+        отброшенные фильтром, вместе с их поддеревьями не читаются и не
+        запускают pip show.
+
+        Args:
+            package_name: Корневой пакет
+            max_depth: Максимальная глубина раскрываемых пакетов (None - без ограничения)
+            filter_substring: Исключить пакеты, в названии которых есть подстрока
+
+        Returns:
+            Результат обхода подграфа пакета
+        """
+        self._compact_graph = None
+        self._reachability = None
+
+        traversal = breadth_first([normalize_name(package_name)], self.get_package_dependencies,
+                                  max_depth, accept=substring_filter(filter_substring))
+
+        # В графе остаются только раскрытые пакеты и принятые фильтром ребра,
+        # поэтому traverse по построенному графу дает тот же подграф
+        self.dependencies = {node: [] for node, depth in traversal.depths.items()
+                             if max_depth is None or depth <= max_depth}
+        for package, dep in traversal.edges:
+            self.dependencies[package].append(dep)
+        self._build_reverse_dependencies()
+        return traversal
+
+    def load_graph(self, dependencies: Dict[str, List[str]]):
+        """Использовать готовый граф (другого окружения или сохраненный) вместо построения"""
+        self._compact_graph = None
+        self._reachability = None
+        self.dependencies = dependencies
+        self._build_reverse_dependencies()
+
+    def _load_dependencies(self, package: str) -> List[str]:
+        """Получить зависимости пакета, запомнив их в графе"""
         if package not in self.dependencies:
-            deps = self.get_package_dependencies(package)
-            self.dependencies[package] = deps
-            
+            self.dependencies[package] = self.get_package_dependencies(package)
+        return self.dependencies[package]
+    
+    def _build_from_cache(self) -> Dict[str, List[str]]:
+        """Построить граф из дискового кэша, перечитав только изменившиеся дистрибутивы"""
+        self.dependencies, self.reverse_dependencies = self.cache.refresh(self.metadata_reader)
+
+        # Корнями обхода являются все установленные пакеты, поэтому полный граф
+        # отличается от кэша только пустыми узлами для неустановленных зависимостей
+        for deps in list(self.dependencies.values()):
             for dep in deps:
-                if dep not in visited:
-                    self._get_dependencies_recursive(dep, visited, max_depth, current_depth + 1)
+                self.dependencies.setdefault(dep, [])
+
+        self.cache.save()
+        return self.dependencies
     
     def _build_reverse_dependencies(self):
         """Построить обратные зависимости (какие пакеты зависят от данного)"""
@@ -70,15 +172,62 @@ class DependencyParser:
                     self.reverse_dependencies[dep] = []
                 self.reverse_dependencies[dep].append(package)
     
-    def get_package_info(self, package_name: str) -> Dict:
-        """Получить полную информацию о пакете и его зависимостях"""
+    def copy(self) -> 'DependencyParser':
+        """Копия графа и индекса достижимости, которую можно менять, не затрагивая оригинал"""
+        parser = DependencyParser(self.backend, self.cache)
+        parser.metadata_reader = self.metadata_reader
+        # Списки зависимостей только заменяются целиком, а списки обратного индекса
+        # меняются на месте, поэтому копируются лишь последние
+        parser.dependencies = dict(self.dependencies)
+        parser.reverse_dependencies = {package: list(deps) for package, deps in self.reverse_dependencies.items()}
+        if self._reachability is not None:
+            parser._reachability = self._reachability.copy()
+        return parser
+    
+    def update_package_dependencies(self, package_name: str, dependencies: List[str]):
+        """Заменить зависимости одного пакета, обновив обратный индекс и индекс достижимости"""
+        old_deps = self.dependencies.get(package_name, [])
+        for dep in old_deps:
+            dependents = self.reverse_dependencies.get(dep, [])
+            if package_name in dependents:
+                dependents.remove(package_name)
+            if not dependents:
+                self.reverse_dependencies.pop(dep, None)
+        
+        self.dependencies[package_name] = list(dependencies)
+        for dep in dependencies:
+            self.dependencies.setdefault(dep, [])
+            self.reverse_dependencies.setdefault(dep, []).append(package_name)
+        
+        self._compact_graph = None
+        if self._reachability is not None:
+            self._reachability.update_package(package_name, dependencies)
+    
+    def traverse(self, package_name: str, max_depth: Optional[int] = None,
+                 direction: str = DEPENDENCIES, filter_substring: Optional[str] = None) -> TraversalResult:
+        """Обойти построенный граф от пакета в сторону зависимостей или зависимых пакетов"""
+        adjacency = self.dependencies if direction == DEPENDENCIES else self.reverse_dependencies
+        return breadth_first([package_name], lambda pkg: adjacency.get(pkg, []), max_depth, direction,
+                             accept=substring_filter(filter_substring))
+    
+    def get_package_info(self, package_name: str, include_transitive: bool = False) -> Dict:
+        """
+        Получить информацию о пакете и его зависимостях
+
+        Транзитивные зависимости и зависимые пакеты добавляются только по
+        запросу: для них строится индекс достижимости всего графа.
+        """
         direct_deps = self.dependencies.get(package_name, [])
         reverse_deps = self.reverse_dependencies.get(package_name, [])
         
-        return {
+        info = {
             'package': package_name,
             'direct_dependencies': direct_deps,
             'reverse_dependencies': reverse_deps,
             'dependency_count': len(direct_deps),
-            'dependent_count': len(reverse_deps)
-        }
\ No newline at end of file
+            'dependent_count': len(reverse_deps),
+        }
+        if include_transitive:
+            info['transitive_dependencies'] = self.reachability.transitive_dependencies(package_name)
+            info['transitive_dependents'] = self.reachability.transitive_dependents(package_name)
+        return info
\ No newline at end of file
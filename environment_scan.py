@@ -0,0 +1,427 @@
+"""
+Параллельное сканирование нескольких окружений Python (virtualenv, образы контейнеров).
+
+Сканирование идет в два этапа на пуле процессов:
+    1. для каждого окружения перечисляются dist-info каталоги и из заголовков
+       METADATA читаются только Name и Version;
+    2. зависимости (Requires-Dist) разбираются один раз для каждой уникальной
+       пары name==version: одинаковые дистрибутивы в разных окружениях
+       используют одну запись метаданных.
+
+Записи метаданных хранят требования без вычисления маркеров, а маркеры
+вычисляются отдельно для каждого окружения: версия Python берется из имени
+каталога lib/pythonX.Y или из pyvenv.cfg, раскладка Lib/site-packages
+означает Windows. Поэтому venv с Python 3.8 получает ребро
+"typing-extensions; python_version < '3.9'", даже если сканер запущен
+на Python 3.11.
+
+Результат - общий граф с метками окружений. Его можно сохранить в JSON и
+отвечать на вопросы "в каких окружениях есть пакет" и "чем окружения
+отличаются" без повторного сканирования.
+
+Запуск:
+    python environment_scan.py venv1 venv2 /path/to/site-packages --output scan.json
+    python environment_scan.py --load scan.json --contains requests
+    python environment_scan.py --load scan.json --differences
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from metadata_reader import MetadataReader, normalize_name
+from requirement_records import MarkerEvaluator, RequirementRecord, TargetEnvironment
+
+# Ключ записи метаданных: (нормализованное имя, версия)
+DistKey = Tuple[str, str]
+
+SCAN_FORMAT_VERSION = 2
+
+# Каталог интерпретатора в lib/ окружения: python3.8, pypy3.9
+_LIB_PYTHON = re.compile(r'^(python|pypy)(\d+\.\d+)$')
+
+# Число dist-info в одной задаче разбора зависимостей (меньше накладных расходов на IPC)
+METADATA_CHUNK_SIZE = 64
+
+
+def site_packages_dirs(path: str) -> List[str]:
+    """
+    Каталоги site-packages окружения
+
+    Для virtualenv (есть pyvenv.cfg) и префикса установки ищутся
+    lib/python*/site-packages и Lib/site-packages; любой другой каталог
+    считается самим site-packages.
+    """
+    if os.path.basename(os.path.normpath(path)) in ('site-packages', 'dist-packages'):
+        return [path]
+
+    candidates = sorted(glob.glob(os.path.join(path, 'lib', 'python*', 'site-packages')))
+    candidates += sorted(glob.glob(os.path.join(path, 'lib', 'pypy*', 'site-packages')))
+    candidates += [os.path.join(path, 'Lib', 'site-packages')]
+    found = [candidate for candidate in candidates if os.path.isdir(candidate)]
+    return found or [path]
+
+
+def _read_name_version(dist_info: str) -> Optional[DistKey]:
+    """Прочитать Name и Version из заголовков METADATA (до первой пустой строки)"""
+    for filename in ('METADATA', 'PKG-INFO'):
+        try:
+            f = open(os.path.join(dist_info, filename), 'r', encoding='utf-8', errors='replace')
+        except OSError:
+            continue
+        name = version = None
+        with f:
+            for line in f:
+                if line in ('\n', '\r\n'):
+                    break
+                if line.startswith('Name:'):
+                    name = line[5:].strip()
+                elif line.startswith('Version:'):
+                    version = line[8:].strip()
+                if name and version:
+                    return normalize_name(name), version
+        return None
+    return None
+
+
+def _read_pyvenv_version(prefix: str) -> Optional[str]:
+    """Полная версия Python из pyvenv.cfg (version или version_info)"""
+    try:
+        f = open(os.path.join(prefix, 'pyvenv.cfg'), 'r', encoding='utf-8', errors='replace')
+    except OSError:
+        return None
+    values = {}
+    with f:
+        for line in f:
+            key, separator, value = line.partition('=')
+            if separator:
+                values[key.strip().lower()] = value.strip()
+    match = re.match(r'\d+\.\d+(\.\d+)?', values.get('version') or values.get('version_info') or '')
+    return match.group(0) if match else None
+
+
+def environment_markers(site_packages: List[str]) -> Dict[str, str]:
+    """
+    Переменные маркеров окружения, которые следуют из его раскладки
+
+    Версия Python берется из pyvenv.cfg префикса или из имени каталога
+    lib/pythonX.Y, раскладка Lib/site-packages означает Windows. Переменные,
+    которые определить не удалось, остаются значениями текущего интерпретатора.
+
+    Args:
+        site_packages: Каталоги site-packages окружения
+    """
+    markers: Dict[str, str] = {}
+    for directory in site_packages:
+        parent = os.path.dirname(os.path.normpath(directory))
+        parent_name = os.path.basename(parent)
+        match = _LIB_PYTHON.match(parent_name)
+        if match:
+            prefix = os.path.dirname(os.path.dirname(parent))
+            markers.setdefault('python_version', match.group(2))
+            if match.group(1) == 'pypy':
+                markers.setdefault('implementation_name', 'pypy')
+                markers.setdefault('platform_python_implementation', 'PyPy')
+        elif parent_name == 'Lib':
+            prefix = os.path.dirname(parent)
+            markers.setdefault('sys_platform', 'win32')
+        else:
+            continue
+
+        full_version = _read_pyvenv_version(prefix)
+        if full_version:
+            markers.setdefault('python_version', '.'.join(full_version.split('.')[:2]))
+            if full_version.count('.') == 2:
+                markers.setdefault('python_full_version', full_version)
+    if 'python_full_version' in markers and not markers['python_full_version'].startswith(
+            markers['python_version'] + '.'):
+        # Версия pyvenv.cfg относится к другому интерпретатору, чем каталог lib/
+        del markers['python_full_version']
+    return markers
+
+
+def _list_environment(path: str) -> Tuple[str, Dict[str, Tuple[str, str]], Dict[str, str]]:
+    """
+    Этап 1 (рабочий процесс): установленные дистрибутивы окружения
+
+    Returns:
+        (путь окружения, {пакет: (версия, путь к dist-info)}, переменные маркеров);
+        как и в sys.path, побеждает первый найденный дистрибутив с данным именем
+    """
+    packages: Dict[str, Tuple[str, str]] = {}
+    directories = site_packages_dirs(path)
+    for directory in directories:
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            continue
+        for name in names:
+            if not name.endswith(('.dist-info', '.egg-info')):
+                continue
+            dist_info = os.path.join(directory, name)
+            key = _read_name_version(dist_info)
+            if key is not None and key[0] not in packages:
+                packages[key[0]] = (key[1], dist_info)
+    return path, packages, environment_markers(directories)
+
+
+def _read_requirements(dist_infos: List[Tuple[DistKey, str]]) -> List[Tuple[DistKey, List[RequirementRecord]]]:
+    """Этап 2 (рабочий процесс): требования (без вычисления маркеров) для пачки уникальных name==version"""
+    from importlib import metadata
+    from pathlib import Path
+
+    reader = MetadataReader()
+    return [(key, reader.read_requirements(metadata.PathDistribution(Path(dist_info))))
+            for key, dist_info in dist_infos]
+
+
+class MultiEnvironmentGraph:
+    """
+    Граф зависимостей нескольких окружений с общими записями метаданных
+
+    Args:
+        environments: {окружение: {пакет: версия}}
+        requirements: {(пакет, версия): требования} - одна запись на name==version,
+                      маркеры не вычислены
+        markers: {окружение: значения переменных маркеров}; для окружений без
+                 значений используется текущий интерпретатор
+    """
+
+    def __init__(self, environments: Dict[str, Dict[str, str]],
+                 requirements: Dict[DistKey, List[RequirementRecord]],
+                 markers: Optional[Dict[str, Dict[str, str]]] = None):
+        self.environments = environments
+        self.requirements = requirements
+        self.markers = markers or {}
+        # Вычислители по окружениям и по отпечаткам значений: окружения с
+        # одинаковыми значениями маркеров используют один кэш результатов
+        self._evaluators: Dict[str, MarkerEvaluator] = {}
+        self._shared_evaluators: Dict[str, MarkerEvaluator] = {}
+
+    def evaluator(self, environment: str) -> MarkerEvaluator:
+        """Вычислитель маркеров окружения (создается один раз на окружение)"""
+        evaluator = self._evaluators.get(environment)
+        if evaluator is None:
+            target = TargetEnvironment(self.markers.get(environment))
+            evaluator = self._shared_evaluators.get(target.fingerprint)
+            if evaluator is None:
+                evaluator = self._shared_evaluators[target.fingerprint] = MarkerEvaluator(target)
+            self._evaluators[environment] = evaluator
+        return evaluator
+
+    def requires(self, environment: str, package: str) -> List[str]:
+        """Зависимости установленного в окружении пакета, применимые в этом окружении"""
+        version = self.environments[environment].get(package)
+        records = self.requirements.get((package, version), [])
+        evaluator = self.evaluator(environment)
+        # Как и pip show, не учитываем зависимости, подключаемые через extras
+        return sorted({record.name for record in records if evaluator.evaluate(record.marker, '')})
+
+    def dependencies(self, environment: str) -> Dict[str, List[str]]:
+        """Граф одного окружения в формате DependencyParser.dependencies"""
+        installed = self.environments[environment]
+        dependencies = {}
+        for package in installed:
+            dependencies[package] = self.requires(environment, package)
+        for deps in list(dependencies.values()):
+            for dep in deps:
+                dependencies.setdefault(dep, [])
+        return dependencies
+
+    def parser(self, environment: str):
+        """DependencyParser с графом окружения (для визуализации, Mermaid и запросов)"""
+        from dependency_parser import DependencyParser
+
+        parser = DependencyParser()
+        parser.load_graph(self.dependencies(environment))
+        return parser
+
+    def merged_edges(self) -> Dict[Tuple[str, str], List[str]]:
+        """Объединенный граф: {(пакет, зависимость): окружения, где есть это ребро}"""
+        edges: Dict[Tuple[str, str], List[str]] = {}
+        for environment, installed in self.environments.items():
+            for package in installed:
+                for dep in self.requires(environment, package):
+                    edges.setdefault((package, dep), []).append(environment)
+        return edges
+
+    def environments_containing(self, package: str, version: Optional[str] = None) -> Dict[str, str]:
+        """В каких окружениях установлен пакет: {окружение: версия}"""
+        package = normalize_name(package)
+        return {environment: installed[package]
+                for environment, installed in self.environments.items()
+                if package in installed and (version is None or installed[package] == version)}
+
+    def differences(self, environments: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Пакеты, которые различаются между окружениями
+
+        Returns:
+            {пакет: {версия или '-' (не установлен): [окружения]}} только для
+            пакетов, у которых вариантов больше одного
+        """
+        environments = list(environments or self.environments)
+        packages = sorted({package for environment in environments for package in self.environments[environment]})
+
+        differences = {}
+        for package in packages:
+            variants: Dict[str, List[str]] = {}
+            for environment in environments:
+                variants.setdefault(self.environments[environment].get(package, '-'), []).append(environment)
+            if len(variants) > 1:
+                differences[package] = variants
+        return differences
+
+    def diff(self, old: str, new: str) -> Dict[str, Dict]:
+        """Отличия окружения new от old: добавленные, удаленные и сменившие версию пакеты"""
+        before, after = self.environments[old], self.environments[new]
+        return {
+            'added': {package: after[package] for package in sorted(after.keys() - before.keys())},
+            'removed': {package: before[package] for package in sorted(before.keys() - after.keys())},
+            'changed': {package: [before[package], after[package]]
+                        for package in sorted(before.keys() & after.keys())
+                        if before[package] != after[package]},
+        }
+
+    def save(self, filename: str):
+        """Сохранить результат сканирования в JSON"""
+        data = {
+            'version': SCAN_FORMAT_VERSION,
+            'environments': self.environments,
+            'markers': self.markers,
+            'requirements': [[package, version, [record.to_dict() for record in records]]
+                             for (package, version), records in self.requirements.items()],
+        }
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, filename: str) -> 'MultiEnvironmentGraph':
+        """Загрузить сохраненный результат сканирования"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != SCAN_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия файла сканирования: {data.get('version')}")
+        requirements = {(package, version): [RequirementRecord.from_dict(record) for record in records]
+                        for package, version, records in data['requirements']}
+        return cls(data['environments'], requirements, data.get('markers'))
+
+
+def scan_environments(paths: Iterable[str], workers: Optional[int] = None) -> MultiEnvironmentGraph:
+    """
+    Просканировать окружения параллельно в рабочих процессах
+
+    Args:
+        paths: Каталоги virtualenv, префиксов установки или site-packages
+        workers: Число процессов (по умолчанию - число ядер; 0 - в текущем процессе)
+
+    Returns:
+        Граф окружений; ключи окружений - переданные пути
+    """
+    paths = list(dict.fromkeys(paths))
+
+    if workers == 0:
+        listings = [_list_environment(path) for path in paths]
+        unique = _unique_dist_infos(listings)
+        chunks = _chunks(unique)
+        parsed = [_read_requirements(chunk) for chunk in chunks]
+    else:
+        # multiprocessing загружается только при параллельном сканировании
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            listings = list(pool.map(_list_environment, paths))
+            unique = _unique_dist_infos(listings)
+            parsed = list(pool.map(_read_requirements, _chunks(unique)))
+
+    environments = {path: {package: version for package, (version, _) in packages.items()}
+                    for path, packages, _ in listings}
+    # Полные значения переменных сохраняются вместе с результатом, чтобы
+    # загруженное на другой машине сканирование давало тот же граф
+    markers = {path: TargetEnvironment(overrides).values for path, _, overrides in listings}
+    requirements = {key: records for chunk in parsed for key, records in chunk}
+    return MultiEnvironmentGraph(environments, requirements, markers)
+
+
+def _unique_dist_infos(listings: List[Tuple[str, Dict[str, Tuple[str, str]], Dict[str, str]]]
+                       ) -> List[Tuple[DistKey, str]]:
+    """Один dist-info на каждую уникальную пару name==version"""
+    unique: Dict[DistKey, str] = {}
+    for _, packages, _ in listings:
+        for package, (version, dist_info) in packages.items():
+            unique.setdefault((package, version), dist_info)
+    return list(unique.items())
+
+
+def _chunks(items: List, size: int = METADATA_CHUNK_SIZE) -> List[List]:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def print_scan_summary(graph: MultiEnvironmentGraph, seconds: Optional[float] = None):
+    """Напечатать число пакетов по окружениям и степень дедупликации метаданных"""
+    installed = sum(len(packages) for packages in graph.environments.values())
+    print(f"\n📦 Окружений: {len(graph.environments)}, установленных дистрибутивов: {installed}, "
+          f"уникальных name==version: {len(graph.requirements)}")
+    if seconds is not None:
+        print(f"⏱  Сканирование заняло {seconds:.2f} с")
+    for environment, packages in graph.environments.items():
+        markers = graph.markers.get(environment, {})
+        target = ', '.join(f"{key} {markers[key]}" for key in ('python_version', 'sys_platform') if key in markers)
+        print(f"  {environment}: {len(packages)} пакетов" + (f" ({target})" if target else ''))
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Сканирование нескольких окружений Python")
+    arg_parser.add_argument('paths', nargs='*', help="virtualenv, префиксы установки или site-packages")
+    arg_parser.add_argument('--workers', type=int, default=None,
+                            help="число процессов (0 - сканировать в текущем процессе)")
+    arg_parser.add_argument('--output', default=None, help="сохранить результат сканирования в JSON")
+    arg_parser.add_argument('--load', default=None, help="использовать сохраненный результат вместо сканирования")
+    arg_parser.add_argument('--contains', metavar='PACKAGE', default=None,
+                            help="в каких окружениях установлен пакет")
+    arg_parser.add_argument('--differences', action='store_true',
+                            help="пакеты, различающиеся между окружениями")
+    arg_parser.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'), default=None,
+                            help="отличия окружения NEW от OLD")
+    args = arg_parser.parse_args(argv)
+
+    if args.load:
+        graph = MultiEnvironmentGraph.load(args.load)
+        print_scan_summary(graph)
+    elif args.paths:
+        started = time.perf_counter()
+        graph = scan_environments(args.paths, args.workers)
+        print_scan_summary(graph, time.perf_counter() - started)
+    else:
+        arg_parser.error("укажите окружения для сканирования или --load")
+
+    if args.output:
+        graph.save(args.output)
+        print(f"💾 Результат сохранен в {args.output}")
+
+    if args.contains:
+        found = graph.environments_containing(args.contains)
+        print(f"\n🔍 {args.contains}: {len(found)} из {len(graph.environments)} окружений")
+        for environment, version in found.items():
+            print(f"  {environment}: {version}")
+
+    if args.differences:
+        differences = graph.differences()
+        print(f"\n⚖️  Различающихся пакетов: {len(differences)}")
+        for package, variants in differences.items():
+            print(f"  {package}: " + '; '.join(f"{version} - {', '.join(envs)}"
+                                               for version, envs in variants.items()))
+
+    if args.diff:
+        print(json.dumps(graph.diff(*args.diff), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
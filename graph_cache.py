@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from metadata_reader import MetadataReader, normalize_name
+
+
+def default_cache_file(path: Optional[List[str]] = None) -> str:
+    """
+    Путь к файлу кэша для текущего интерпретатора
+
+    Args:
+        path: Каталоги поиска дистрибутивов, если граф строится не по sys.path;
+              у каждого набора каталогов свой файл кэша
+    """
+    cache_root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    env_key = sys.prefix
+    if path is not None:
+        env_key += '\0' + '\0'.join(os.path.abspath(directory) for directory in path)
+    env_id = hashlib.sha256(env_key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_root, 'dependency-visualizer', f'graph_{env_id}.json')
+
+
+class DependencyGraphCache:
+    """
+    Дисковый кэш графа зависимостей с отпечатком для каждого дистрибутива.
+
+    Отпечаток строится из пути к dist-info, времени изменения и хэша RECORD.
+    При обновлении перечитываются только добавленные, удаленные и измененные
+    дистрибутивы, а обратный индекс исправляется точечно. Зависимости в кэше
+    уже отфильтрованы маркерами, поэтому при смене целевого окружения кэш
+    строится заново.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_file: Optional[str] = None):
+        self.cache_file = cache_file or default_cache_file()
+        self.hits = 0
+        self.misses = 0
+        self.removed = 0
+        self._entries: Dict[str, Dict] = {}
+        self._active: Dict[str, str] = {}
+        self._reverse: Dict[str, List[str]] = {}
+        self._environment = ''
+        self._loaded = False
+
+    def load(self):
+        """Загрузить кэш с диска (поврежденный или устаревший кэш игнорируется)"""
+        self._loaded = True
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get('version') != self.FORMAT_VERSION:
+            return
+
+        self._entries = data.get('entries', {})
+        self._active = data.get('active', {})
+        self._reverse = data.get('reverse', {})
+        self._environment = data.get('environment', '')
+
+    def save(self):
+        """Сохранить кэш на диск (атомарно, через временный файл)"""
+        directory = os.path.dirname(self.cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        data = {
+            'version': self.FORMAT_VERSION,
+            'entries': self._entries,
+            'active': self._active,
+            'reverse': self._reverse,
+            'environment': self._environment,
+        }
+        temp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_file, self.cache_file)
+
+    def _stat_key(self, dist_path: str) -> Optional[List[int]]:
+        """Быстрая часть отпечатка: mtime каталога dist-info и mtime/размер RECORD"""
+        try:
+            dist_stat = os.stat(dist_path)
+        except OSError:
+            return None
+
+        try:
+            record_stat = os.stat(os.path.join(dist_path, 'RECORD'))
+            return [dist_stat.st_mtime_ns, record_stat.st_mtime_ns, record_stat.st_size]
+        except OSError:
+            return [dist_stat.st_mtime_ns, 0, 0]
+
+    def _record_hash(self, dist_path: str) -> str:
+        """Хэш содержимого RECORD (или METADATA, если RECORD отсутствует)"""
+        for filename in ('RECORD', 'METADATA', 'PKG-INFO'):
+            try:
+                with open(os.path.join(dist_path, filename), 'rb') as f:
+                    return hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                continue
+        return ''
+
+    def _refresh_entry(self, dist, dist_path: str, reader: MetadataReader) -> Optional[Dict]:
+        """Вернуть актуальную запись кэша для дистрибутива, перечитывая его только при изменении"""
+        stat_key = self._stat_key(dist_path)
+        cached = self._entries.get(dist_path)
+
+        if cached is not None and stat_key is not None and cached['stat'] == stat_key:
+            self.hits += 1
+            return cached
+
+        record_hash = self._record_hash(dist_path)
+        if cached is not None and stat_key is not None and cached['record_hash'] == record_hash:
+            # Файлы переписаны тем же содержимым (например, переустановка той же версии)
+            cached['stat'] = stat_key
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        name = dist.metadata['Name']
+        if not name:
+            return None
+
+        return {
+            'key': normalize_name(name),
+            'stat': stat_key,
+            'record_hash': record_hash,
+            'requires': reader.read_requires(dist),
+        }
+
+    def refresh(self, reader: MetadataReader) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        """
+        Синхронизировать кэш с текущим состоянием site-packages
+
+        Args:
+            reader: Источник метаданных (определяет пути поиска дистрибутивов)
+
+        Returns:
+            Кортеж (зависимости установленных пакетов, обратные зависимости)
+        """
+        if not self._loaded:
+            self.load()
+
+        self.hits = self.misses = self.removed = 0
+
+        if self._environment != reader.environment_key:
+            # Записи вычислены для другого целевого окружения
+            self._entries, self._active, self._reverse = {}, {}, {}
+            self._environment = reader.environment_key
+
+        from importlib import metadata
+
+        if reader.path is None:
+            distributions = metadata.distributions()
+        else:
+            distributions = metadata.distributions(path=reader.path)
+
+        entries = {}
+        active = {}
+        for dist in distributions:
+            dist_path = str(getattr(dist, '_path', ''))
+            if not dist_path or dist_path in entries:
+                continue
+
+            entry = self._refresh_entry(dist, dist_path, reader)
+            if entry is None:
+                continue
+
+            entries[dist_path] = entry
+            # Как и в sys.path, первый найденный дистрибутив с данным именем побеждает
+            active.setdefault(entry['key'], dist_path)
+
+        self.removed = len(set(self._entries) - set(entries))
+        self._patch_reverse(entries, active)
+        self._entries = entries
+        self._active = active
+
+        dependencies = {key: list(entries[path]['requires']) for key, path in active.items()}
+        reverse = {dep: list(dependents) for dep, dependents in self._reverse.items()}
+        return dependencies, reverse
+
+    def _patch_reverse(self, entries: Dict[str, Dict], active: Dict[str, str]):
+        """Исправить обратный индекс только для пакетов, чьи зависимости изменились"""
+        old_requires = {key: self._entries[path]['requires']
+                        for key, path in self._active.items() if path in self._entries}
+        new_requires = {key: entries[path]['requires'] for key, path in active.items()}
+
+        for key in set(old_requires) | set(new_requires):
+            old = old_requires.get(key, [])
+            new = new_requires.get(key, [])
+            if old == new:
+                continue
+
+            for dep in set(old) - set(new):
+                dependents = self._reverse.get(dep, [])
+                if key in dependents:
+                    dependents.remove(key)
+                if not dependents:
+                    self._reverse.pop(dep, None)
+
+            for dep in set(new) - set(old):
+                self._reverse.setdefault(dep, []).append(key)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика последнего обновления кэша"""
+        return {'hits': self.hits, 'misses': self.misses, 'removed': self.removed}
@@ -0,0 +1,324 @@
+"""
+Потоковый экспорт графа зависимостей в Mermaid, Graphviz DOT и GraphML.
+
+Экспортеры не собирают документ в памяти: строки выдаются генератором и
+сразу пишутся в файл. План экспорта при этом хранит порядок обхода и
+принадлежность каждого узла (O(V) памяти), см. ExportPlan. Если
+транзитивный граф больше бюджета узлов,
+поддеревья за границей бюджета сворачиваются в узлы-кластеры, а их ребра
+перенаправляются на кластер - ни одно ребро не теряется молча.
+"""
+
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, TextIO, Tuple
+from html import escape
+
+import instrumentation
+from graph_traversal import breadth_first
+
+# Слова, которые Mermaid не принимает в качестве идентификатора узла
+MERMAID_RESERVED = {'end', 'graph', 'subgraph', 'flowchart', 'style', 'class', 'click'}
+
+
+class NodeIdRegistry:
+    """
+    Мемоизированные идентификаторы узлов с разрешением коллизий
+
+    Разные имена могут нормализоваться в один идентификатор (например,
+    'a-b' и 'a.b' -> 'a_b'); второе имя получает суффикс '_2', третье '_3'
+    и т.д. Один и тот же ключ всегда получает один и тот же идентификатор,
+    в том числе при обращении из нескольких потоков.
+    """
+
+    _INVALID = re.compile(r'[^A-Za-z0-9_]')
+
+    def __init__(self, reserved: Iterable[str] = ()):
+        self._ids: Dict[Hashable, str] = {}
+        self._taken = set(reserved)
+        self._lock = threading.Lock()
+
+    def node_id(self, key: Hashable, text: Optional[str] = None) -> str:
+        """
+        Получить идентификатор узла
+
+        Args:
+            key: Ключ узла (имя пакета или ключ кластера)
+            text: Текст для построения идентификатора (по умолчанию - ключ)
+
+        Returns:
+            Уникальный идентификатор из букв, цифр и '_'
+        """
+        node_id = self._ids.get(key)
+        if node_id is not None:
+            return node_id
+
+        base = self._INVALID.sub('_', text if text is not None else str(key)) or '_'
+        with self._lock:
+            node_id = self._ids.get(key)
+            if node_id is not None:
+                return node_id
+
+            node_id = base
+            suffix = 2
+            while node_id in self._taken:
+                node_id = f"{base}_{suffix}"
+                suffix += 1
+
+            self._taken.add(node_id)
+            self._ids[key] = node_id
+        return node_id
+
+
+class ExportPlan:
+    """
+    Какие узлы попадают в экспорт и в какие кластеры свернуты остальные
+
+    План не потоковый: он хранит глубины всех достижимых узлов, оставленные
+    узлы и владельца каждого свернутого узла, то есть O(V) памяти даже при
+    малом бюджете, а iter_edges дополнительно запоминает уже выданные ребра
+    между кластерами. Потоково пишется только сам документ. Для графов,
+    которые уже загружены в память как adjacency, это тот же порядок.
+
+    Args:
+        adjacency: Словарь {пакет: список зависимостей}
+        roots: Корни экспорта; None - все пакеты без зависимых (весь граф)
+        max_nodes: Бюджет узлов-пакетов (None - без ограничения)
+    """
+
+    def __init__(self, adjacency: Dict[str, List[str]], roots: Optional[Iterable[str]] = None,
+                 max_nodes: Optional[int] = None):
+        self.adjacency = adjacency
+        self.roots = list(roots) if roots is not None else self._top_level(adjacency)
+
+        order = breadth_first(self.roots, self._neighbors, record_edges=False).depths
+        if roots is None:
+            # Пакеты, входящие только в циклы, недостижимы из пакетов без зависимых:
+            # каждый такой цикл получает один дополнительный корень
+            for name in sorted(adjacency):
+                if name not in order:
+                    self.roots.append(name)
+                    order.update(breadth_first(
+                        [name], lambda node: [dep for dep in self._neighbors(node) if dep not in order],
+                        record_edges=False).depths)
+
+        budget = len(order) if max_nodes is None else max(max_nodes, 0)
+        self.kept: Dict[str, int] = {}
+        self.owner: Dict[str, Optional[str]] = {}
+        self.cluster_sizes: Dict[Optional[str], int] = {}
+
+        for node, depth in order.items():
+            if len(self.kept) < budget:
+                self.kept[node] = depth
+            elif depth == 0:
+                self._collapse(node, None)
+
+        if len(self.kept) == len(order):
+            return
+
+        # Обход в порядке BFS: первый раскрытый узел, открывший соседа на
+        # следующем уровне, - его родитель в дереве обхода
+        for node, depth in order.items():
+            owner = node if node in self.kept else self.owner[node]
+            for dep in self._neighbors(node):
+                if dep not in self.kept and dep not in self.owner and order[dep] == depth + 1:
+                    self._collapse(dep, owner)
+
+    @staticmethod
+    def _top_level(adjacency: Dict[str, List[str]]) -> List[str]:
+        has_dependents = {dep for deps in adjacency.values() for dep in deps}
+        return sorted(name for name in adjacency if name not in has_dependents)
+
+    def _neighbors(self, node: str) -> List[str]:
+        return self.adjacency.get(node, [])
+
+    def _collapse(self, node: str, owner: Optional[str]):
+        self.owner[node] = owner
+        self.cluster_sizes[owner] = self.cluster_sizes.get(owner, 0) + 1
+
+    def endpoint(self, node: str) -> Hashable:
+        """
+        Ключ узла в экспорте: сам пакет или кластер ('cluster', владелец),
+        в который он свернут; владелец None - общий кластер для корней,
+        не поместившихся в бюджет
+        """
+        if node in self.kept:
+            return node
+        return ('cluster', self.owner[node])
+
+    def iter_nodes(self) -> Iterator[Tuple[Hashable, str, int]]:
+        """Узлы экспорта: (ключ, подпись, число свернутых пакетов - 0 для обычных узлов)"""
+        for node in self.kept:
+            yield node, node, 0
+        for owner, size in self.cluster_sizes.items():
+            label = f"{owner}: +{size}" if owner is not None else f"прочие: +{size}"
+            yield ('cluster', owner), label, size
+
+    def iter_edges(self) -> Iterator[Tuple[Hashable, Hashable]]:
+        """
+        Ребра экспорта в виде пар ключей
+
+        Ребра между оставленными пакетами выдаются как есть; ребра,
+        затрагивающие свернутые пакеты, перенаправляются на кластеры и
+        выдаются один раз. Ребра внутри одного кластера не выдаются.
+        """
+        aggregated = set()
+        for node in (*self.kept, *self.owner):
+            source = self.endpoint(node)
+            for dep in dict.fromkeys(self._neighbors(node)):
+                target = self.endpoint(dep)
+                if node in self.kept and dep in self.kept:
+                    yield source, target
+                elif source != target and (source, target) not in aggregated:
+                    aggregated.add((source, target))
+                    yield source, target
+
+
+class GraphExporter(ABC):
+    """Базовый потоковый экспортер: подклассы выдают строки документа"""
+
+    extension = ''
+
+    def __init__(self, reserved: Iterable[str] = ()):
+        """
+        Args:
+            reserved: Идентификаторы, недопустимые в формате экспорта
+        """
+        self.ids = NodeIdRegistry(reserved)
+
+    def node_id(self, key: Hashable) -> str:
+        if isinstance(key, tuple):
+            owner = key[1]
+            return self.ids.node_id(key, f"cluster_{owner if owner is not None else 'other'}")
+        return self.ids.node_id(key)
+
+    @abstractmethod
+    def iter_lines(self, plan: ExportPlan) -> Iterator[str]:
+        """Выдавать строки документа без символа перевода строки"""
+
+    def write(self, plan: ExportPlan, handle: TextIO) -> int:
+        """Записать документ в открытый файл, вернуть число строк"""
+        count = 0
+        for line in self.iter_lines(plan):
+            handle.write(line)
+            handle.write('\n')
+            count += 1
+        return count
+
+
+class MermaidExporter(GraphExporter):
+    """Экспорт в Mermaid (flowchart)"""
+
+    extension = '.mmd'
+
+    def __init__(self):
+        super().__init__(MERMAID_RESERVED)
+
+    @staticmethod
+    def _label(text: str) -> str:
+        return '"' + text.replace('"', '#quot;') + '"'
+
+    def iter_lines(self, plan: ExportPlan) -> Iterator[str]:
+        yield "graph TD"
+        for key, label, size in plan.iter_nodes():
+            if size:
+                yield f"    {self.node_id(key)}([{self._label(label)}]):::cluster"
+            else:
+                yield f"    {self.node_id(key)}[{self._label(label)}]"
+        for source, target in plan.iter_edges():
+            yield f"    {self.node_id(source)} --> {self.node_id(target)}"
+        if plan.cluster_sizes:
+            yield "    classDef cluster stroke-dasharray: 5 5"
+
+
+class DotExporter(GraphExporter):
+    """Экспорт в Graphviz DOT (рендерится через dot или pydot/graphviz)"""
+
+    extension = '.dot'
+
+    @staticmethod
+    def _quote(text: str) -> str:
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+    def iter_lines(self, plan: ExportPlan) -> Iterator[str]:
+        yield "digraph dependencies {"
+        yield "    rankdir=TB;"
+        yield "    node [shape=box];"
+        for key, label, size in plan.iter_nodes():
+            attributes = f"label={self._quote(label)}"
+            if size:
+                attributes += ", shape=folder, style=dashed"
+            yield f"    {self._quote(self.node_id(key))} [{attributes}];"
+        for source, target in plan.iter_edges():
+            yield f"    {self._quote(self.node_id(source))} -> {self._quote(self.node_id(target))};"
+        yield "}"
+
+
+def quoteattr(value: str) -> str:
+    """Значение XML атрибута в кавычках (xml.sax.saxutils тянет за собой urllib и ssl)"""
+    return '"' + escape(value, quote=True) + '"'
+
+
+class GraphMLExporter(GraphExporter):
+    """Экспорт в GraphML (открывается в yEd, Gephi, networkx.read_graphml)"""
+
+    extension = '.graphml'
+
+    def iter_lines(self, plan: ExportPlan) -> Iterator[str]:
+        yield '<?xml version="1.0" encoding="UTF-8"?>'
+        yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">'
+        yield '  <key id="label" for="node" attr.name="label" attr.type="string"/>'
+        yield '  <key id="collapsed" for="node" attr.name="collapsed" attr.type="int"/>'
+        yield '  <graph id="dependencies" edgedefault="directed">'
+        for key, label, size in plan.iter_nodes():
+            yield (f'    <node id={quoteattr(self.node_id(key))}>'
+                   f'<data key="label">{escape(label)}</data>'
+                   f'<data key="collapsed">{size}</data></node>')
+        for source, target in plan.iter_edges():
+            yield f'    <edge source={quoteattr(self.node_id(source))} target={quoteattr(self.node_id(target))}/>'
+        yield '  </graph>'
+        yield '</graphml>'
+
+
+EXPORTERS = {
+    'mermaid': MermaidExporter,
+    'dot': DotExporter,
+    'graphml': GraphMLExporter,
+}
+
+
+def exporter_for_file(filename: str) -> str:
+    """Определить формат экспорта по расширению файла"""
+    for name, exporter in EXPORTERS.items():
+        if filename.endswith(exporter.extension):
+            return name
+    if filename.endswith('.gv'):
+        return 'dot'
+    raise ValueError(f"Не удалось определить формат по имени файла: {filename}")
+
+
+def export_graph(adjacency: Dict[str, List[str]], filename: str, fmt: Optional[str] = None,
+                 roots: Optional[Iterable[str]] = None, max_nodes: Optional[int] = None) -> ExportPlan:
+    """
+    Экспортировать транзитивный граф зависимостей в файл
+
+    Args:
+        adjacency: Словарь {пакет: список зависимостей}
+        filename: Путь к результату
+        fmt: 'mermaid', 'dot' или 'graphml' (по умолчанию - по расширению)
+        roots: Корни экспорта; None - весь граф
+        max_nodes: Бюджет узлов-пакетов, остальное сворачивается в кластеры
+
+    Returns:
+        План экспорта (оставленные узлы и размеры кластеров)
+    """
+    fmt = fmt or exporter_for_file(filename)
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Неизвестный формат экспорта: {fmt}")
+
+    with instrumentation.span('export.plan'):
+        plan = ExportPlan(adjacency, roots, max_nodes)
+    with instrumentation.span('export.write', format=fmt), open(filename, 'w', encoding='utf-8') as f:
+        EXPORTERS[fmt]().write(plan, f)
+    return plan
@@ -0,0 +1,433 @@
+"""
+Бинарный снимок графа зависимостей с загрузкой через mmap.
+
+Формат (little-endian, версия SNAPSHOT_VERSION), все секции выровнены на 8 байт:
+
+    заголовок     magic, версия, число узлов, ребер, строк и столбцов
+    каталог       (вид секции, id строки с именем, смещение, длина) для каждой секции
+    строки        смещения u32[строк + 1] и UTF-8 данные; первые n строк -
+                  имена узлов, отсортированные по байтам UTF-8, поэтому узел
+                  ищется двоичным поиском без построения словаря
+    CSR           смещения u32[n + 1] и соседи u32[ребер] для прямых и обратных ребер
+    хэши          u64[n] - хэш содержимого узла (имя, столбцы, имена зависимостей)
+    столбцы       u32[n] - id строки значения (NO_VALUE - значение не задано),
+                  например версия пакета или окружение
+
+Открытие снимка читает только заголовок и каталог; остальные данные
+подгружаются операционной системой по мере обращения к страницам.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+SNAPSHOT_MAGIC = b'DEPSNAP\x00'
+SNAPSHOT_VERSION = 1
+
+NO_VALUE = 0xFFFFFFFF
+
+_HEADER = struct.Struct('<8sIIIIII')
+_SECTION = struct.Struct('<IIQQ')
+
+# Виды секций каталога
+STRING_OFFSETS, STRING_DATA, OFFSETS, TARGETS, REVERSE_OFFSETS, REVERSE_TARGETS, HASHES, COLUMN = range(8)
+
+# Формат JSON представления снимка
+JSON_FORMAT = 'dependency-graph-snapshot'
+
+
+def node_hash(name: str, values: Iterable[Optional[str]], dependencies: Iterable[str]) -> int:
+    """
+    Хэш содержимого узла: имя, значения столбцов и множество имен зависимостей
+
+    Порядок зависимостей не влияет на хэш; используется для пропуска
+    неизменившихся узлов при сравнении снимков.
+    """
+    parts = [name, '\x1e']
+    parts.extend('\x00' if value is None else '\x01' + value for value in values)
+    parts.append('\x1e')
+    parts.extend(sorted(set(dependencies)))
+    digest = hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def _little_endian(arr: array) -> array:
+    if sys.byteorder != 'little':
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr
+
+
+def write_snapshot(filename: str, dependencies: Dict[str, Iterable[str]],
+                   columns: Optional[Dict[str, Dict[str, str]]] = None):
+    """
+    Записать снимок графа (атомарно, через временный файл)
+
+    Args:
+        filename: Путь к файлу снимка
+        dependencies: Словарь {пакет: список зависимостей}; зависимости,
+                      отсутствующие среди ключей, становятся узлами без ребер
+        columns: Столбцы узлов {название: {пакет: значение}}, например
+                 {'version': {'requests': '2.31.0'}}
+    """
+    columns = columns or {}
+    column_names = sorted(columns)
+
+    names = set(dependencies)
+    for deps in dependencies.values():
+        names.update(deps)
+    encoded = sorted(name.encode('utf-8') for name in names)
+    names = [name.decode('utf-8') for name in encoded]
+    index = {name: i for i, name in enumerate(names)}
+
+    # Таблица строк: имена узлов, затем названия и значения столбцов без повторов
+    strings: Dict[str, int] = dict(index)
+    string_data = list(encoded)
+
+    def intern(value: str) -> int:
+        string_id = strings.get(value)
+        if string_id is None:
+            string_id = strings[value] = len(string_data)
+            string_data.append(value.encode('utf-8'))
+        return string_id
+
+    rows = [[index[dep] for dep in dependencies.get(name, ())] for name in names]
+    reverse_rows = [[] for _ in names]
+    for source, row in enumerate(rows):
+        for target in row:
+            reverse_rows[target].append(source)
+
+    column_arrays = []
+    for column in column_names:
+        values = columns[column]
+        column_arrays.append((intern(column), array('I', (
+            NO_VALUE if values.get(name) is None else intern(values[name]) for name in names))))
+
+    hashes = array('Q', (
+        node_hash(name, (columns[column].get(name) for column in column_names), dependencies.get(name, ()))
+        for name in names))
+
+    def csr(node_rows: List[List[int]]) -> Tuple[array, array]:
+        offsets = array('I', [0])
+        offsets.extend(accumulate(len(row) for row in node_rows))
+        targets = array('I')
+        for row in node_rows:
+            targets.extend(row)
+        return offsets, targets
+
+    offsets, targets = csr(rows)
+    reverse_offsets, reverse_targets = csr(reverse_rows)
+    string_offsets = array('I', [0])
+    string_offsets.extend(accumulate(len(data) for data in string_data))
+
+    sections = [
+        (STRING_OFFSETS, 0, _little_endian(string_offsets).tobytes()),
+        (STRING_DATA, 0, b''.join(string_data)),
+        (OFFSETS, 0, _little_endian(offsets).tobytes()),
+        (TARGETS, 0, _little_endian(targets).tobytes()),
+        (REVERSE_OFFSETS, 0, _little_endian(reverse_offsets).tobytes()),
+        (REVERSE_TARGETS, 0, _little_endian(reverse_targets).tobytes()),
+        (HASHES, 0, _little_endian(hashes).tobytes()),
+    ]
+    sections.extend((COLUMN, name_id, _little_endian(values).tobytes()) for name_id, values in column_arrays)
+
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(names), len(targets),
+                          len(string_data), len(column_arrays), 0)
+    position = _HEADER.size + _SECTION.size * len(sections)
+    directory = []
+    for kind, name_id, data in sections:
+        position += -position % 8
+        directory.append(_SECTION.pack(kind, name_id, position, len(data)))
+        position += len(data)
+
+    temp_file = f"{filename}.{os.getpid()}.tmp"
+    with open(temp_file, 'wb') as f:
+        f.write(header)
+        f.write(b''.join(directory))
+        for _, _, data in sections:
+            f.write(b'\x00' * (-f.tell() % 8))
+            f.write(data)
+    os.replace(temp_file, filename)
+
+
+class GraphSnapshot:
+    """
+    Снимок графа, отображенный в память
+
+    Массивы - срезы memoryview над mmap без копирования; имена декодируются
+    только при обращении. Срезы, возвращенные neighbors/predecessors,
+    действительны до close().
+
+    Args:
+        filename: Путь к файлу снимка
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: List[memoryview] = []
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self):
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"Файл не является снимком графа: {self.filename}")
+        magic, version, self.node_count, self.edge_count, string_count, column_count, _ = \
+            _HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Файл не является снимком графа: {self.filename}")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия снимка {version} (ожидается {SNAPSHOT_VERSION})")
+
+        buffer = memoryview(self._mmap)
+        self._views.append(buffer)
+        sections = {}
+        column_ids = []
+        for number in range(7 + column_count):
+            kind, name_id, offset, length = _SECTION.unpack_from(self._mmap, _HEADER.size + number * _SECTION.size)
+            if offset + length > len(self._mmap):
+                raise ValueError(f"Снимок поврежден: секция выходит за конец файла {self.filename}")
+            view = buffer[offset:offset + length]
+            self._views.append(view)
+            if kind == COLUMN:
+                column_ids.append((name_id, view))
+            else:
+                sections[kind] = view
+
+        self._string_offsets = self._typed(sections[STRING_OFFSETS], 'I')
+        self._string_data = sections[STRING_DATA]
+        self._offsets = self._typed(sections[OFFSETS], 'I')
+        self._targets = self._typed(sections[TARGETS], 'I')
+        self._reverse_offsets = self._typed(sections[REVERSE_OFFSETS], 'I')
+        self._reverse_targets = self._typed(sections[REVERSE_TARGETS], 'I')
+        self._hashes = self._typed(sections[HASHES], 'Q')
+        self._columns = {self.string(name_id): self._typed(view, 'I') for name_id, view in column_ids}
+
+        if len(self._string_offsets) != string_count + 1 or len(self._offsets) != self.node_count + 1:
+            raise ValueError(f"Снимок поврежден: размеры секций не совпадают с заголовком {self.filename}")
+
+    def _typed(self, view: memoryview, typecode: str):
+        """Типизированный вид секции (на big-endian машинах - переставленная копия)"""
+        if sys.byteorder == 'little':
+            typed = view.cast(typecode)
+            self._views.append(typed)
+            return typed
+        arr = array(typecode, view.tobytes())
+        arr.byteswap()
+        return arr
+
+    @classmethod
+    def open(cls, filename: str) -> 'GraphSnapshot':
+        return cls(filename)
+
+    def close(self):
+        """Освободить отображение файла"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Срезы, отданные вызывающему коду, еще живы; отображение закроется при их удалении
+            pass
+
+    def __enter__(self) -> 'GraphSnapshot':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.node_count
+
+    def __contains__(self, name: str) -> bool:
+        return self.index_of(name) is not None
+
+    @property
+    def column_names(self) -> List[str]:
+        return sorted(self._columns)
+
+    def string(self, string_id: int) -> str:
+        """Строка из таблицы строк"""
+        offsets = self._string_offsets
+        return str(self._string_data[offsets[string_id]:offsets[string_id + 1]], 'utf-8')
+
+    def _string_bytes(self, string_id: int) -> bytes:
+        offsets = self._string_offsets
+        return self._string_data[offsets[string_id]:offsets[string_id + 1]].tobytes()
+
+    def name(self, node: int) -> str:
+        """Имя узла (узлы пронумерованы в порядке байтов UTF-8 имен)"""
+        return self.string(node)
+
+    def names(self) -> Iterator[str]:
+        for node in range(self.node_count):
+            yield self.string(node)
+
+    def index_of(self, name: str) -> Optional[int]:
+        """Номер узла по имени (двоичный поиск по отсортированной таблице имен)"""
+        key = name.encode('utf-8')
+        low, high = 0, self.node_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._string_bytes(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.node_count and self._string_bytes(low) == key:
+            return low
+        return None
+
+    def neighbors(self, node: int) -> memoryview:
+        """Номера зависимостей узла"""
+        return self._targets[self._offsets[node]:self._offsets[node + 1]]
+
+    def predecessors(self, node: int) -> memoryview:
+        """Номера пакетов, напрямую зависящих от узла"""
+        return self._reverse_targets[self._reverse_offsets[node]:self._reverse_offsets[node + 1]]
+
+    def dependencies_of(self, name: str) -> List[str]:
+        node = self.index_of(name)
+        if node is None:
+            return []
+        return [self.string(target) for target in self.neighbors(node)]
+
+    def dependents_of(self, name: str) -> List[str]:
+        node = self.index_of(name)
+        if node is None:
+            return []
+        return [self.string(source) for source in self.predecessors(node)]
+
+    @property
+    def hashes(self):
+        """Столбец хэшей содержимого узлов (срезы сравниваются без перебора в Python)"""
+        return self._hashes
+
+    def node_hash(self, node: int) -> int:
+        return self._hashes[node]
+
+    def value(self, column: str, node: int) -> Optional[str]:
+        """Значение столбца узла (None - не задано)"""
+        string_id = self._columns[column][node]
+        return None if string_id == NO_VALUE else self.string(string_id)
+
+    def attributes(self, node: int) -> Dict[str, Optional[str]]:
+        """Значения всех столбцов узла"""
+        return {column: self.value(column, node) for column in self.column_names}
+
+    def to_adjacency(self) -> Dict[str, List[str]]:
+        """Весь граф в формате DependencyParser.dependencies"""
+        names = list(self.names())
+        return {name: [names[target] for target in self.neighbors(node)] for node, name in enumerate(names)}
+
+    def to_columns(self) -> Dict[str, Dict[str, str]]:
+        """Все столбцы в формате параметра columns функции write_snapshot"""
+        columns = {}
+        for column in self.column_names:
+            values = {}
+            for node in range(self.node_count):
+                value = self.value(column, node)
+                if value is not None:
+                    values[self.string(node)] = value
+            columns[column] = values
+        return columns
+
+
+def export_json(snapshot: GraphSnapshot, filename: str):
+    """Экспортировать снимок в JSON (узлы пишутся по одному, без построения всего документа)"""
+    columns = snapshot.column_names
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'format': JSON_FORMAT, 'version': SNAPSHOT_VERSION, 'columns': columns},
+                           ensure_ascii=False)[:-1])
+        f.write(', "nodes": [')
+        for node in range(snapshot.node_count):
+            record = {'name': snapshot.name(node),
+                      'dependencies': [snapshot.name(target) for target in snapshot.neighbors(node)]}
+            for column in columns:
+                value = snapshot.value(column, node)
+                if value is not None:
+                    record[column] = value
+            f.write(('\n' if node == 0 else ',\n') + json.dumps(record, ensure_ascii=False))
+        f.write('\n]}\n')
+
+
+def import_json(filename: str) -> Tuple[Dict[str, List[str]], Dict[str, Dict[str, str]]]:
+    """
+    Прочитать JSON представление снимка
+
+    Returns:
+        (зависимости, столбцы) - аргументы для write_snapshot
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') != JSON_FORMAT:
+        raise ValueError(f"Файл не является JSON снимком графа: {filename}")
+
+    dependencies = {}
+    columns = {column: {} for column in data.get('columns', [])}
+    for record in data['nodes']:
+        dependencies[record['name']] = list(record.get('dependencies', []))
+        for column, values in columns.items():
+            if record.get(column) is not None:
+                values[record['name']] = record[column]
+    return dependencies, columns
+
+
+def main(argv=None):
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Снимки графа зависимостей")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    save = commands.add_parser('save', help="сохранить граф текущего окружения")
+    save.add_argument('snapshot')
+    info = commands.add_parser('info', help="сведения о снимке")
+    info.add_argument('snapshot')
+    info.add_argument('packages', nargs='*', help="показать зависимости пакетов")
+    export = commands.add_parser('export', help="снимок -> JSON")
+    export.add_argument('snapshot')
+    export.add_argument('json_file')
+    load = commands.add_parser('import', help="JSON -> снимок")
+    load.add_argument('json_file')
+    load.add_argument('snapshot')
+    args = arg_parser.parse_args(argv)
+
+    if args.command == 'save':
+        from dependency_parser import DependencyParser
+
+        parser = DependencyParser()
+        parser.build_dependency_graph()
+        write_snapshot(args.snapshot, parser.dependencies,
+                       {'version': parser.metadata_reader.read_versions()})
+        print(f"💾 Снимок сохранен в {args.snapshot}: {len(parser.dependencies)} пакетов")
+    elif args.command == 'info':
+        with GraphSnapshot(args.snapshot) as snapshot:
+            print(f"{args.snapshot}: узлов {len(snapshot)}, ребер {snapshot.edge_count}, "
+                  f"столбцы: {', '.join(snapshot.column_names) or '-'}")
+            for package in args.packages:
+                node = snapshot.index_of(package)
+                if node is None:
+                    print(f"  {package}: нет в снимке")
+                    continue
+                print(f"  {package} {snapshot.attributes(node)}: {', '.join(snapshot.dependencies_of(package)) or '-'}")
+    elif args.command == 'export':
+        with GraphSnapshot(args.snapshot) as snapshot:
+            export_json(snapshot, args.json_file)
+        print(f"📤 Снимок экспортирован в {args.json_file}")
+    else:
+        dependencies, columns = import_json(args.json_file)
+        write_snapshot(args.snapshot, dependencies, columns)
+        print(f"💾 Снимок сохранен в {args.snapshot}: {len(dependencies)} пакетов")
+
+
+if __name__ == '__main__':
+    main()
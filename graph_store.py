@@ -0,0 +1,140 @@
+from array import array
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional
+
+
+class CompactGraph:
+    """
+    Компактное хранилище графа зависимостей
+
+    Имена пакетов хранятся один раз в таблице и заменяются целыми индексами,
+    а прямые и обратные ребра хранятся в формате CSR (compressed sparse row):
+    массив смещений длиной n + 1 и общий массив соседей. Соседи узла
+    возвращаются срезом memoryview без копирования.
+    """
+
+    TYPECODE = 'i'
+
+    def __init__(self, names: List[str], offsets: array, targets: array,
+                 reverse_offsets: array, reverse_targets: array):
+        self.names = names
+        self.offsets = offsets
+        self.targets = targets
+        self.reverse_offsets = reverse_offsets
+        self.reverse_targets = reverse_targets
+        self._index = {name: i for i, name in enumerate(names)}
+        self._targets_view = memoryview(targets)
+        self._reverse_view = memoryview(reverse_targets)
+
+    @classmethod
+    def from_adjacency(cls, adjacency: Dict[str, Iterable[str]]) -> 'CompactGraph':
+        """
+        Построить граф из словаря {пакет: список зависимостей}
+
+        Зависимости, отсутствующие среди ключей, добавляются как узлы без ребер.
+        """
+        names = list(adjacency)
+        index = {name: i for i, name in enumerate(names)}
+        rows = []
+        for deps in adjacency.values():
+            row = []
+            for dep in deps:
+                dep_index = index.get(dep)
+                if dep_index is None:
+                    dep_index = index[dep] = len(names)
+                    names.append(dep)
+                row.append(dep_index)
+            rows.append(row)
+
+        node_count = len(names)
+        rows.extend([] for _ in range(node_count - len(rows)))
+
+        reverse_rows = [[] for _ in range(node_count)]
+        for source, row in enumerate(rows):
+            for target in row:
+                reverse_rows[target].append(source)
+
+        offsets, targets = cls._pack_rows(rows)
+        reverse_offsets, reverse_targets = cls._pack_rows(reverse_rows)
+        return cls(names, offsets, targets, reverse_offsets, reverse_targets)
+
+    @classmethod
+    def _pack_rows(cls, rows: List[List[int]]):
+        """Упаковать списки соседей в пару массивов CSR (смещения, соседи)"""
+        offsets = array(cls.TYPECODE, [0])
+        offsets.extend(accumulate(len(row) for row in rows))
+        targets = array(cls.TYPECODE)
+        for row in rows:
+            targets.extend(row)
+        return offsets, targets
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def index_of(self, name: str) -> Optional[int]:
+        """Индекс узла по имени пакета"""
+        return self._index.get(name)
+
+    def neighbors(self, node: int) -> memoryview:
+        """Индексы зависимостей узла (срез без копирования)"""
+        return self._targets_view[self.offsets[node]:self.offsets[node + 1]]
+
+    def predecessors(self, node: int) -> memoryview:
+        """Индексы пакетов, зависящих от узла (срез без копирования)"""
+        return self._reverse_view[self.reverse_offsets[node]:self.reverse_offsets[node + 1]]
+
+    def out_degree(self, node: int) -> int:
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def in_degree(self, node: int) -> int:
+        return self.reverse_offsets[node + 1] - self.reverse_offsets[node]
+
+    def dependencies_of(self, name: str) -> List[str]:
+        """Имена прямых зависимостей пакета"""
+        node = self._index.get(name)
+        if node is None:
+            return []
+        return [self.names[target] for target in self.neighbors(node)]
+
+    def dependents_of(self, name: str) -> List[str]:
+        """Имена пакетов, напрямую зависящих от пакета"""
+        node = self._index.get(name)
+        if node is None:
+            return []
+        return [self.names[source] for source in self.predecessors(node)]
+
+    def nbytes(self) -> int:
+        """Размер массивов смежности в байтах (без таблицы имен)"""
+        return sum(arr.itemsize * len(arr) for arr in
+                   (self.offsets, self.targets, self.reverse_offsets, self.reverse_targets))
+
+    def to_networkx(self, nodes: Optional[Iterable[str]] = None):
+        """
+        Экспортировать граф (или его часть) в networkx.DiGraph
+
+        Args:
+            nodes: Узлы, ребра между которыми нужно перенести (None - весь граф)
+        """
+        import networkx as nx
+
+        G = nx.DiGraph()
+        if nodes is None:
+            G.add_nodes_from(self.names)
+            G.add_edges_from((self.names[source], self.names[target])
+                             for source in range(len(self.names))
+                             for target in self.neighbors(source))
+            return G
+
+        selected = {self._index[name] for name in nodes if name in self._index}
+        G.add_nodes_from(self.names[node] for node in selected)
+        G.add_edges_from((self.names[source], self.names[target])
+                         for source in selected
+                         for target in self.neighbors(source) if target in selected)
+        return G
@@ -0,0 +1,95 @@
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Направления обхода графа
+DEPENDENCIES = 'dependencies'
+DEPENDENTS = 'dependents'
+
+
+class TraversalResult:
+    """
+    Результат обхода: кратчайшая глубина каждого узла и пройденные ребра
+
+    Ребра всегда направлены от пакета к его зависимости, независимо от
+    направления обхода.
+    """
+
+    __slots__ = ('depths', 'edges')
+
+    def __init__(self, depths: Dict[str, int], edges: List[Tuple[str, str]]):
+        self.depths = depths
+        self.edges = edges
+
+    @property
+    def nodes(self) -> List[str]:
+        """Узлы в порядке обхода (по неубыванию глубины)"""
+        return list(self.depths)
+
+
+def breadth_first(roots: Iterable[str], get_neighbors: Callable[[str], Iterable[str]],
+                  max_depth: Optional[int] = None, direction: str = DEPENDENCIES,
+                  record_edges: bool = True,
+                  accept: Optional[Callable[[str], bool]] = None) -> TraversalResult:
+    """
+    Итеративный обход графа в ширину с ограничением глубины
+
+    Каждый узел раскрывается не более одного раза и на своей кратчайшей
+    глубине от ближайшего корня, поэтому общие поддеревья и циклы не
+    обходятся повторно, а время работы линейно по размеру подграфа.
+    Раскрываются узлы с глубиной не больше max_depth; их соседи попадают
+    в результат как листья. Соседи, отклоненные accept, отбрасываются до
+    постановки в очередь: ни они, ни их поддеревья не запрашиваются у
+    get_neighbors.
+
+    Args:
+        roots: Начальные узлы (глубина 0)
+        get_neighbors: Функция, возвращающая соседей узла в направлении обхода
+        max_depth: Максимальная глубина раскрываемых узлов (None - без ограничения)
+        direction: DEPENDENCIES или DEPENDENTS - определяет ориентацию ребер
+        record_edges: Сохранять ли ребра (без них обход занимает O(узлов) памяти)
+        accept: Предикат включения соседа в обход (None - все узлы); к корням не применяется
+
+    Returns:
+        Глубины узлов и ребра подграфа
+    """
+    if direction not in (DEPENDENCIES, DEPENDENTS):
+        raise ValueError(f"Неизвестное направление обхода: {direction}")
+
+    depths: Dict[str, int] = {}
+    edges: List[Tuple[str, str]] = []
+    queue = deque()
+
+    for root in roots:
+        if root not in depths:
+            depths[root] = 0
+            queue.append(root)
+
+    while queue:
+        node = queue.popleft()
+        depth = depths[node]
+        if max_depth is not None and depth > max_depth:
+            continue
+
+        for neighbor in get_neighbors(node):
+            if accept is not None and not accept(neighbor):
+                continue
+            if record_edges:
+                edges.append((node, neighbor) if direction == DEPENDENCIES else (neighbor, node))
+
+            if neighbor not in depths:
+                depths[neighbor] = depth + 1
+                queue.append(neighbor)
+
+    return TraversalResult(depths, edges)
+
+
+def substring_filter(substring: Optional[str]) -> Optional[Callable[[str], bool]]:
+    """
+    Предикат для accept: исключить пакеты, в названии которых есть подстрока
+
+    Сравнение без учета регистра; пустая подстрока означает отсутствие фильтра.
+    """
+    if not substring:
+        return None
+    needle = substring.lower()
+    return lambda name: needle not in name.lower()
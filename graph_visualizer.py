@@ -1,39 +1,56 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List
 import os
+import instrumentation
+from dependency_parser import DependencyParser
+from layered_layout import LayeredLayout
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+# matplotlib и networkx импортируются внутри методов: только построение
+# Mermaid или экспорт не должны платить за их загрузку
 
 class GraphVisualizer:
-    def __init__(self, dependency_parser: DependencyParser):
+    def __init__(self, dependency_parser: DependencyParser, headless: bool = False,
+                 dpi: int = 300, image_format: str = None):
+        """
+        Args:
+            dependency_parser: Парсер с построенным графом зависимостей
+            headless: Не открывать окна (plt.show), только сохранять файлы
+            dpi: Разрешение сохраняемых изображений
+            image_format: Формат файлов (None - по расширению имени файла)
+        """
         self.parser = dependency_parser
+        self.layout = LayeredLayout()
+        self.headless = headless
+        self.dpi = dpi
+        self.image_format = image_format
     
-    def create_networkx_graph(self, package_name: str, max_depth: int = 2) -> nx.DiGraph:
+    def create_networkx_graph(self, package_name: str, max_depth: int = 2,
+                              filter_substring: str = None) -> 'nx.DiGraph':
         """Создать граф NetworkX для визуализации"""
-        G = nx.DiGraph()
+        import networkx as nx
         
-        def add_dependencies(pkg: str, depth: int = 0):
-            if depth > max_depth:
-                return
-            
-            G.add_node(pkg)
-            
-            deps = self.parser.dependencies.get(pkg, [])
-            for dep in deps:
-                G.add_node(dep)
-                G.add_edge(pkg, dep)
-                add_dependencies(dep, depth + 1)
+        traversal = self.parser.traverse(package_name, max_depth, filter_substring=filter_substring)
         
-        add_dependencies(package_name)
+        G = nx.DiGraph()
+        G.add_nodes_from(traversal.depths)
+        G.add_edges_from(traversal.edges)
         return G
     
-    def visualize_package_dependencies(self, package_name: str, output_file: str = None):
-        """Визуализировать зависимости пакета"""
-        G = self.create_networkx_graph(package_name)
+    def visualize_package_dependencies(self, package_name: str, output_file: str = None,
+                                       max_depth: int = 2, filter_substring: str = None,
+                                       positions: Dict = None):
+        """Визуализировать зависимости пакета (positions - готовая раскладка графа)"""
+        import matplotlib.pyplot as plt
+        import networkx as nx
+        
+        G = self.create_networkx_graph(package_name, max_depth, filter_substring)
         
-        plt.figure(figsize=(12, 8))
+        fig = plt.figure(figsize=(12, 8))
         
-        # Используем spring layout для лучшего расположения узлов
-        pos = nx.spring_layout(G, k=1, iterations=50)
+        # Послойная раскладка: пакеты над своими зависимостями, без случайности
+        pos = positions if positions is not None else self.layout(G)
         
         # Рисуем граф
         nx.draw_networkx_nodes(G, pos, node_color='lightblue', 
@@ -47,18 +64,22 @@ class GraphVisualizer:
         plt.tight_layout()
         
         if output_file:
-            plt.savefig(output_file, dpi=300, bbox_inches='tight')
+            self._save_figure(fig, output_file)
             print(f"Граф сохранен в {output_file}")
         
-        plt.show()
+        self._finish_figure(fig)
     
-    def create_comparison_visualization(self, package_name: str, our_graph: nx.DiGraph, 
-                                      official_graph: nx.DiGraph, output_file: str):
-        """Создать сравнительную визуализацию"""
+    def create_comparison_visualization(self, package_name: str, our_graph: 'nx.DiGraph', 
+                                      official_graph: 'nx.DiGraph', output_file: str,
+                                      our_positions: Dict = None):
+        """Создать сравнительную визуализацию (our_positions - готовая раскладка нашего графа)"""
+        import matplotlib.pyplot as plt
+        import networkx as nx
+        
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(20, 8))
         
         # Наш граф
-        pos1 = nx.spring_layout(our_graph, k=1, iterations=50)
+        pos1 = our_positions if our_positions is not None else self.layout(our_graph)
         nx.draw_networkx_nodes(our_graph, pos1, node_color='lightblue', 
                               node_size=1500, alpha=0.7, ax=ax1)
         nx.draw_networkx_edges(our_graph, pos1, edge_color='blue', 
@@ -68,7 +89,7 @@ class GraphVisualizer:
         ax1.axis('off')
         
         # Официальный граф
-        pos2 = nx.spring_layout(official_graph, k=1, iterations=50)
+        pos2 = self.layout(official_graph)
         nx.draw_networkx_nodes(official_graph, pos2, node_color='lightgreen', 
                               node_size=1500, alpha=0.7, ax=ax2)
         nx.draw_networkx_edges(official_graph, pos2, edge_color='green', 
@@ -79,5 +100,18 @@ class GraphVisualizer:
         
         plt.suptitle(f'Сравнение визуализаций для пакета: {package_name}', fontsize=16)
         plt.tight_layout()
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        plt.show()
\ No newline at end of file
+        self._save_figure(fig, output_file)
+        self._finish_figure(fig)
+    
+    def _save_figure(self, fig, output_file: str):
+        """Сохранить фигуру с настроенными разрешением и форматом"""
+        with instrumentation.span('render.savefig', file=output_file):
+            fig.savefig(output_file, dpi=self.dpi, format=self.image_format, bbox_inches='tight')
+    
+    def _finish_figure(self, fig):
+        """Показать фигуру (кроме headless режима) и освободить ее память"""
+        import matplotlib.pyplot as plt
+        
+        if not self.headless:
+            plt.show()
+        plt.close(fig)
\ No newline at end of file
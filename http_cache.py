@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+def default_cache_dir() -> str:
+    """Каталог HTTP кэша по умолчанию"""
+    cache_root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_root, 'nuget-dependency-analyzer', 'http')
+
+
+class HttpDiskCache:
+    """
+    Дисковый кэш HTTP ответов с адресацией по содержимому
+
+    Тела ответов хранятся один раз под своим sha256 в каталоге blobs/,
+    а индекс связывает URL с хэшем тела, ETag и временем последнего
+    обращения. При превышении лимита размера вытесняются давно не
+    использованные записи (LRU).
+
+    Индекс хранится в порядке последнего обращения, а суммарный размер и
+    число ссылок на каждое тело ведутся при изменениях, поэтому сохранение
+    и вытеснение не перебирают весь индекс.
+
+    Args:
+        directory: Каталог кэша
+        max_bytes: Максимальный суммарный размер хранимых тел ответов
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 100 * 1024 * 1024):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._index_file = os.path.join(self.directory, 'index.json')
+        # Записи в порядке последнего обращения: первая - кандидат на вытеснение
+        self._entries: Dict[str, Dict] = {}
+        # sha256 тела -> (число URL, ссылающихся на тело, размер тела)
+        self._blobs: Dict[str, List[int]] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        """Загрузить индекс кэша (поврежденный индекс игнорируется)"""
+        try:
+            with open(self._index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get('version') == self.FORMAT_VERSION:
+            entries = data.get('entries', {})
+            self._entries = dict(sorted(entries.items(), key=lambda item: item[1]['last_access']))
+            for entry in self._entries.values():
+                self._add_reference(entry)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, 'blobs', digest[:2], digest)
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Найти запись индекса для URL (тело ответа при этом не читается)"""
+        with self._lock:
+            entry = self._entries.get(url)
+            return dict(entry) if entry is not None else None
+
+    def read(self, url: str) -> Optional[bytes]:
+        """Прочитать закэшированное тело ответа и отметить обращение к нему"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+
+            try:
+                with open(self._blob_path(entry['sha256']), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                # Файл удален извне - запись больше недействительна
+                del self._entries[url]
+                self._release_reference(entry['sha256'])
+                self._dirty = True
+                return None
+
+            self._mark_used(url, entry)
+            self._dirty = True
+            self.hits += 1
+            return body
+
+    def store(self, url: str, body: bytes, etag: Optional[str] = None, immutable: bool = False):
+        """
+        Сохранить тело ответа, загруженное из сети
+
+        Args:
+            url: URL запроса
+            body: Тело ответа
+            etag: Значение заголовка ETag для условной перепроверки
+            immutable: Ответ никогда не меняется и не требует перепроверки
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(digest)
+
+        with self._lock:
+            self.misses += 1
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                temp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(body)
+                os.replace(temp_path, blob_path)
+
+            old_entry = self._entries.pop(url, None)
+            entry = {
+                'sha256': digest,
+                'size': len(body),
+                'etag': etag,
+                'immutable': immutable,
+                'last_access': time.time(),
+            }
+            self._entries[url] = entry
+            self._add_reference(entry)
+            if old_entry is not None:
+                self._remove_blob_if_unused(old_entry['sha256'])
+
+            self._dirty = True
+            self._evict()
+
+    def touch(self, url: str):
+        """Отметить, что закэшированный ответ подтвержден сервером (HTTP 304)"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._mark_used(url, entry)
+                self._dirty = True
+                self.revalidated += 1
+
+    def _mark_used(self, url: str, entry: Dict):
+        """Отметить обращение, переместив запись в конец порядка LRU"""
+        entry['last_access'] = time.time()
+        del self._entries[url]
+        self._entries[url] = entry
+
+    def _add_reference(self, entry: Dict):
+        blob = self._blobs.get(entry['sha256'])
+        if blob is None:
+            self._blobs[entry['sha256']] = [1, entry['size']]
+            self._total_bytes += entry['size']
+        else:
+            blob[0] += 1
+
+    def _release_reference(self, digest: str) -> bool:
+        """Уменьшить число ссылок на тело; True, если ссылок не осталось"""
+        blob = self._blobs.get(digest)
+        if blob is None:
+            return True
+        blob[0] -= 1
+        if blob[0] > 0:
+            return False
+        del self._blobs[digest]
+        self._total_bytes -= blob[1]
+        return True
+
+    def _total_size(self) -> int:
+        """Суммарный размер уникальных тел ответов"""
+        return self._total_bytes
+
+    def _remove_blob_if_unused(self, digest: str):
+        """Снять ссылку удаленной записи и удалить тело ответа, если на него больше не ссылается ни один URL"""
+        if not self._release_reference(digest):
+            return
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Вытеснить давно не использованные записи до соблюдения лимита размера"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            url = next(iter(self._entries))
+            entry = self._entries.pop(url)
+            self._remove_blob_if_unused(entry['sha256'])
+
+    def flush(self):
+        """Записать индекс кэша на диск"""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            os.makedirs(self.directory, exist_ok=True)
+            temp_file = f"{self._index_file}.{os.getpid()}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.FORMAT_VERSION, 'entries': self._entries}, f)
+            os.replace(temp_file, self._index_file)
+            self._dirty = False
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика обращений к кэшу"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'entries': len(self._entries),
+            'bytes': self._total_size(),
+        }
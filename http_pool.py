@@ -0,0 +1,148 @@
+import http.client
+import queue
+import threading
+import time
+import urllib.parse
+from typing import Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов по алгоритму token bucket
+
+    Args:
+        rate: Допустимое число запросов в секунду (0 или None - без ограничения)
+        capacity: Максимальный размер «всплеска» запросов
+    """
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        self.rate = rate or 0
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Дождаться свободного токена"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class ConnectionPool:
+    """
+    Пул постоянных HTTP/1.1 соединений к одному хосту
+
+    Соединения переиспользуются между запросами (keep-alive), поэтому TLS
+    рукопожатие выполняется один раз на соединение, а не на каждый запрос.
+    """
+
+    # Ошибки, означающие что сервер закрыл простаивающее соединение
+    STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                               ConnectionResetError, BrokenPipeError)
+
+    def __init__(self, base_url: str, max_connections: int = 8, timeout: float = 30,
+                 headers: Optional[Dict[str, str]] = None):
+        parsed = urllib.parse.urlsplit(base_url)
+        if parsed.scheme not in ('http', 'https'):
+            raise ValueError(f"Неподдерживаемая схема URL: {base_url}")
+
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.base_path = parsed.path.rstrip('/')
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self._idle = queue.LifoQueue(maxsize=max_connections)
+        self.connections_opened = 0
+        self._counter_lock = threading.Lock()
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        """Открыть новое соединение"""
+        with self._counter_lock:
+            self.connections_opened += 1
+
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Взять простаивающее соединение из пула или открыть новое"""
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, connection: http.client.HTTPConnection):
+        """Вернуть соединение в пул (лишние соединения закрываются)"""
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(self, path: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Выполнить GET запрос
+
+        Args:
+            path: Путь относительно базового URL
+            headers: Дополнительные заголовки запроса
+
+        Returns:
+            Кортеж (HTTP статус, заголовки ответа, тело ответа)
+        """
+        request_headers = dict(self.headers)
+        request_headers.update(headers or {})
+        full_path = f"{self.base_path}/{path.lstrip('/')}"
+
+        connection, reused = self._acquire()
+        try:
+            try:
+                response = self._send(connection, full_path, request_headers)
+            except self.STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # Сервер закрыл соединение, пока оно простаивало в пуле - повторяем на новом
+                connection.close()
+                connection = self._new_connection()
+                response = self._send(connection, full_path, request_headers)
+
+            body = response.read()
+            response_headers = {key.lower(): value for key, value in response.getheaders()}
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+
+        return response.status, response_headers, body
+
+    def _send(self, connection: http.client.HTTPConnection, path: str,
+              headers: Dict[str, str]) -> http.client.HTTPResponse:
+        """Отправить запрос по соединению и получить ответ"""
+        connection.request('GET', path, headers=headers)
+        return connection.getresponse()
+
+    def close(self):
+        """Закрыть все простаивающие соединения"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
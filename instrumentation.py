@@ -0,0 +1,233 @@
+"""
+Легковесная инструментация конвейера анализа: интервалы, счетчики и гистограммы.
+
+По умолчанию выключена: span() возвращает общий пустой контекстный
+менеджер, а count() и observe() сразу возвращаются, поэтому накладные
+расходы сводятся к одной проверке глобальной переменной. После enable()
+интервалы записываются в память и выгружаются в JSON lines или в формат
+Chrome trace events (chrome://tracing, Perfetto).
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Dict, List, Optional
+
+# Границы корзин гистограмм задержек, мс
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+TRACE_FORMATS = ('chrome', 'jsonl')
+
+_NULL_SPAN = contextlib.nullcontext()
+
+# Активный трассировщик; None - инструментация выключена
+_tracer: Optional['Tracer'] = None
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами"""
+
+    __slots__ = ('bounds', 'counts', 'total', 'count', 'max')
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> Dict:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'buckets': {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+class _Span:
+    """Открытый интервал; при выходе записывается в трассировщик"""
+
+    __slots__ = ('tracer', 'name', 'args', 'started')
+
+    def __init__(self, tracer: 'Tracer', name: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        finished = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.record(self.name, self.started, finished, self.args)
+        return False
+
+
+class Tracer:
+    """Хранилище интервалов, счетчиков и гистограмм одного запуска"""
+
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self.spans: List[tuple] = []
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, started: int, finished: int, args: Dict):
+        # list.append атомарен, блокировка не нужна
+        self.spans.append((name, started - self.origin, finished - started, threading.get_ident(), args))
+
+    def count(self, name: str, value: float):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(value)
+
+    def summary(self) -> Dict:
+        """Сводка: суммарное и максимальное время по именам интервалов, счетчики, гистограммы"""
+        spans: Dict[str, Dict] = {}
+        for name, _, duration, _, _ in self.spans:
+            stats = spans.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += duration / 1e6
+            stats['max_ms'] = max(stats['max_ms'], duration / 1e6)
+        return {
+            'spans': spans,
+            'counters': dict(self.counters),
+            'histograms': {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+        }
+
+    def write_jsonl(self, filename: str):
+        """Один JSON объект на строку: интервалы, затем счетчики и гистограммы"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            for name, start, duration, thread_id, args in self.spans:
+                record = {'type': 'span', 'name': name, 'start_ms': start / 1e6,
+                          'duration_ms': duration / 1e6, 'thread': thread_id, 'args': args}
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            for name, value in self.counters.items():
+                f.write(json.dumps({'type': 'counter', 'name': name, 'value': value},
+                                   ensure_ascii=False) + '\n')
+            for name, histogram in self.histograms.items():
+                f.write(json.dumps({'type': 'histogram', 'name': name, **histogram.to_dict()},
+                                   ensure_ascii=False) + '\n')
+
+    def write_chrome_trace(self, filename: str):
+        """Формат Chrome trace events: интервалы - события 'X', счетчики - события 'C'"""
+        events = []
+        end = 0
+        for name, start, duration, thread_id, args in self.spans:
+            events.append({'name': name, 'ph': 'X', 'ts': start / 1e3, 'dur': duration / 1e3,
+                           'pid': self.pid, 'tid': thread_id, 'args': args})
+            end = max(end, start + duration)
+        for name, value in self.counters.items():
+            events.append({'name': name, 'ph': 'C', 'ts': end / 1e3, 'pid': self.pid,
+                           'args': {'value': value}})
+
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'histograms': self.summary()['histograms']}},
+                      f, ensure_ascii=False)
+
+
+def enable() -> Tracer:
+    """Включить инструментацию (новый пустой трассировщик)"""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable() -> Optional[Tracer]:
+    """Выключить инструментацию и вернуть собранные данные"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def is_enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, **args):
+    """Контекстный менеджер интервала; без включенной инструментации ничего не делает"""
+    if _tracer is None:
+        return _NULL_SPAN
+    return _Span(_tracer, name, args)
+
+
+def count(name: str, value: float = 1):
+    """Увеличить счетчик"""
+    if _tracer is not None:
+        _tracer.count(name, value)
+
+
+def observe(name: str, value: float):
+    """Добавить значение в гистограмму"""
+    if _tracer is not None:
+        _tracer.observe(name, value)
+
+
+def traced(name: str):
+    """Декоратор: выполнение функции записывается как интервал name"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _Span(_tracer, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def save_trace(tracer: Tracer, filename: str, trace_format: Optional[str] = None):
+    """
+    Сохранить трассировку в файл
+
+    Args:
+        tracer: Трассировщик с собранными данными
+        filename: Путь к файлу
+        trace_format: 'chrome' или 'jsonl' (по умолчанию - по расширению: .jsonl -> jsonl)
+    """
+    if trace_format is None:
+        trace_format = 'jsonl' if filename.endswith('.jsonl') else 'chrome'
+    if trace_format == 'jsonl':
+        tracer.write_jsonl(filename)
+    elif trace_format == 'chrome':
+        tracer.write_chrome_trace(filename)
+    else:
+        raise ValueError(f"Неизвестный формат трассировки: {trace_format}")
+
+
+def print_summary(tracer: Tracer):
+    """Напечатать сводку по этапам, отсортированную по суммарному времени"""
+    summary = tracer.summary()
+    print("\n⏱  Профиль выполнения:")
+    for name, stats in sorted(summary['spans'].items(), key=lambda item: -item[1]['total_ms']):
+        print(f"  {name:<36} x{stats['count']:<6} всего {stats['total_ms']:9.1f} мс, "
+              f"макс {stats['max_ms']:8.1f} мс")
+    for name, value in sorted(summary['counters'].items()):
+        print(f"  {name:<36} {value:g}")
+    for name, histogram in sorted(summary['histograms'].items()):
+        print(f"  {name:<36} n={histogram['count']}, среднее {histogram['mean']:.1f}, "
+              f"макс {histogram['max']:.1f}, корзины {histogram['buckets']}")
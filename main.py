@@ -1,15 +1,93 @@
 import os
+import argparse
+import config
+import instrumentation
+from analysis_pipeline import PackagePipeline, print_stage_result, summarize
 from dependency_parser import DependencyParser
 from mermaid_generator import MermaidGenerator
 from graph_visualizer import GraphVisualizer
 from comparison_tool import ComparisonTool
+from graph_cache import DependencyGraphCache
+from graph_exporters import EXPORTERS, export_graph
 
 def ensure_directory(directory: str):
     """Создать директорию если не существует"""
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-def main():
+def parse_args(argv=None):
+    """Разобрать аргументы командной строки"""
+    arg_parser = argparse.ArgumentParser(description="Визуализатор графа зависимостей Python пакетов")
+    arg_parser.add_argument('packages', nargs='*',
+                            help="пакеты для обработки (по умолчанию - PYTHON_PACKAGES_TO_ANALYZE из config.py)")
+    arg_parser.add_argument('--packages-file', default=None,
+                            help="файл со списком пакетов, по одному на строку")
+    arg_parser.add_argument('--all-installed', action='store_true',
+                            help="обработать все установленные пакеты")
+    arg_parser.add_argument('--io-workers', type=int, default=8,
+                            help="потоков для Mermaid и сравнения с pipdeptree")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="не использовать дисковый кэш графа зависимостей")
+    arg_parser.add_argument('--cache-file', default=None,
+                            help="путь к файлу кэша графа зависимостей")
+    arg_parser.add_argument('--target-env', metavar='SPEC', default=None,
+                            help="вычислять маркеры зависимостей для другого окружения, "
+                                 "например python_version=3.8,sys_platform=win32")
+    arg_parser.add_argument('--compare-all', metavar='REPORT_JSON', default=None,
+                            help="сравнить все пакеты окружения и сохранить JSON отчет")
+    arg_parser.add_argument('--compare-source', choices=ComparisonTool.SNAPSHOT_SOURCES,
+                            default='pipdeptree',
+                            help="источник эталонных данных для --compare-all")
+    arg_parser.add_argument('--headless', action='store_true',
+                            help="не открывать окна, отрисовывать файлы параллельно на пуле процессов")
+    arg_parser.add_argument('--dpi', type=int, default=300,
+                            help="разрешение сохраняемых изображений")
+    arg_parser.add_argument('--format', dest='image_format', default='png',
+                            help="формат изображений (png, svg, pdf, ...)")
+    arg_parser.add_argument('--render-workers', type=int, default=None,
+                            help="число процессов отрисовки в headless режиме")
+    arg_parser.add_argument('--export', metavar='FILE', default=None,
+                            help="экспортировать весь граф окружения (.mmd, .dot или .graphml)")
+    arg_parser.add_argument('--export-format', choices=sorted(EXPORTERS), default=None,
+                            help="формат экспорта (по умолчанию - по расширению файла)")
+    arg_parser.add_argument('--export-max-nodes', type=int, default=200,
+                            help="бюджет узлов экспорта, остальное сворачивается в кластеры")
+    arg_parser.add_argument('--snapshot', metavar='FILE', default=None,
+                            help="загрузить граф из бинарного снимка вместо анализа окружения")
+    arg_parser.add_argument('--save-snapshot', metavar='FILE', default=None,
+                            help="сохранить построенный граф в бинарный снимок")
+    arg_parser.add_argument('--trace', metavar='FILE', default=None,
+                            help="записать профиль этапов (Chrome trace .json или JSON lines .jsonl)")
+    arg_parser.add_argument('--trace-format', choices=instrumentation.TRACE_FORMATS, default=None,
+                            help="формат файла профиля (по умолчанию - по расширению)")
+    args = arg_parser.parse_args(argv)
+    args.target_environment = None
+    if args.target_env:
+        from requirement_records import TargetEnvironment
+        try:
+            args.target_environment = TargetEnvironment.from_spec(args.target_env)
+        except ValueError as e:
+            arg_parser.error(str(e))
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.trace:
+        run(args)
+        return
+    
+    tracer = instrumentation.enable()
+    try:
+        with instrumentation.span('main'):
+            run(args)
+    finally:
+        instrumentation.disable()
+        instrumentation.print_summary(tracer)
+        instrumentation.save_trace(tracer, args.trace, args.trace_format)
+        print(f"📈 Профиль сохранен в {args.trace}")
+
+def run(args):
+    """Выполнить анализ с разобранными аргументами командной строки"""
     print("🚀 Запуск визуализатора графа зависимостей")
     
     # Создаем необходимые директории
@@ -17,67 +95,113 @@ def main():
     ensure_directory('mermaid_files')
     
     # Инициализируем компоненты
-    parser = DependencyParser()
+    cache = None if args.no_cache else DependencyGraphCache(args.cache_file)
+    if args.target_environment is not None:
+        print(f"🎯 Целевое окружение: {args.target_environment}")
+    parser = DependencyParser(cache=cache, environment=args.target_environment)
     mermaid_gen = MermaidGenerator(parser)
-    visualizer = GraphVisualizer(parser)
+    visualizer = GraphVisualizer(parser, headless=args.headless, dpi=args.dpi,
+                                 image_format=args.image_format)
     comparer = ComparisonTool(parser)
     
-    print("📦 Анализ установленных пакетов...")
-    parser.build_dependency_graph()
+    columns = None
+    if args.snapshot:
+        from graph_snapshot import GraphSnapshot
+        with GraphSnapshot(args.snapshot) as snapshot:
+            parser.load_graph(snapshot.to_adjacency())
+            # Версии относятся к окружению, из которого сделан снимок, а не к текущему
+            columns = snapshot.to_columns()
+        print(f"📦 Граф загружен из снимка {args.snapshot}: {len(parser.dependencies)} пакетов")
+    else:
+        print("📦 Анализ установленных пакетов...")
+        parser.build_dependency_graph()
+        if cache is not None:
+            stats = cache.get_stats()
+            print(f"💾 Кэш графа: попаданий {stats['hits']}, промахов {stats['misses']}, "
+                  f"удалено {stats['removed']}")
     
-    # Выбираем пакеты для демонстрации
-    demo_packages = ['requests', 'numpy', 'matplotlib']
+    if args.save_snapshot:
+        from graph_snapshot import write_snapshot
+        if columns is None:
+            versions = parser.metadata_reader.read_versions()
+            columns = {'version': {package: versions[package]
+                                   for package in parser.dependencies if package in versions}}
+        write_snapshot(args.save_snapshot, parser.dependencies, columns)
+        print(f"💾 Снимок графа сохранен в {args.save_snapshot}")
     
-    print(f"\n🎯 Демонстрационные пакеты: {', '.join(demo_packages)}")
+    if args.compare_all:
+        compare_environment(comparer, args.compare_all, args.compare_source)
+        return
     
-    for i, package in enumerate(demo_packages, 1):
-        print(f"\n{'='*50}")
-        print(f"ПАКЕТ {i}: {package}")
-        print(f"{'='*50}")
-        
-        # Генерируем Mermaid диаграмму
-        mermaid_code = mermaid_gen.generate_mermaid_graph(package)
-        mermaid_file = f"mermaid_files/{package}_dependencies.mmd"
-        mermaid_gen.save_mermaid_to_file(mermaid_code, mermaid_file)
-        
-        print(f"📊 Mermaid диаграмма создана: {mermaid_file}")
-        
-        # Создаем визуализацию
-        png_file = f"examples/example{i}.png"
-        visualizer.visualize_package_dependencies(package, png_file)
-        
-        # Сравниваем с официальными инструментами
-        print(f"\n🔍 Сравнение с официальными инструментами...")
-        
-        our_graph = visualizer.create_networkx_graph(package)
-        official_graph = comparer.create_official_graph(package)
-        
-        if official_graph.number_of_nodes() > 0:
-            comparison_result = comparer.compare_graphs(our_graph, official_graph)
-            comparer.print_comparison_report(comparison_result, package)
-            
-            # Создаем сравнительную визуализацию
-            comparison_file = f"examples/comparison_{package}.png"
-            visualizer.create_comparison_visualization(
-                package, our_graph, official_graph, comparison_file
-            )
-        else:
-            print("⚠️  Официальные данные недоступны для сравнения")
+    if args.export:
+        plan = export_graph(parser.dependencies, args.export, args.export_format,
+                            max_nodes=args.export_max_nodes)
+        collapsed = sum(plan.cluster_sizes.values())
+        print(f"📤 Граф экспортирован в {args.export}: узлов {len(plan.kept)}, "
+              f"свернуто в кластеры {collapsed}")
+        return
+    
+    packages = select_packages(args, parser)
+    print(f"\n🎯 Пакеты для обработки ({len(packages)}): {', '.join(packages[:20])}"
+          f"{' ...' if len(packages) > 20 else ''}")
     
-    print(f"\n✅ Визуализация завершена!")
+    # Окна matplotlib можно показывать только из основного процесса,
+    # поэтому без --headless отрисовка выполняется в нем
+    pipeline = PackagePipeline(mermaid_gen, visualizer, comparer, io_workers=args.io_workers,
+                               render_workers=args.render_workers if args.headless else 0)
+    results = []
+    with instrumentation.span('pipeline', packages=len(packages)):
+        for result in pipeline.run(packages):
+            print_stage_result(result, comparer)
+            results.append(result)
+    
+    failures = summarize(results)
+    print(f"\n✅ Визуализация завершена! Этапов: {len(results)}, пакетов с ошибками: {len(failures)}")
     print(f"📁 Результаты сохранены в папках 'examples' и 'mermaid_files'")
     
     # Сохраняем сводный отчет
-    save_summary_report(demo_packages)
+    save_summary_report(packages, failures)
+
+def select_packages(args, parser: DependencyParser) -> list:
+    """Список пакетов: из командной строки, из файла, все установленные или из config"""
+    if args.all_installed:
+        return sorted(parser.get_installed_packages())
+    
+    packages = list(args.packages)
+    if args.packages_file:
+        with open(args.packages_file, 'r', encoding='utf-8') as f:
+            packages.extend(line.strip() for line in f
+                            if line.strip() and not line.lstrip().startswith('#'))
+    return packages or list(config.PYTHON_PACKAGES_TO_ANALYZE)
+
+def compare_environment(comparer: ComparisonTool, report_file: str, source: str):
+    """Сравнить все пакеты окружения за один проход и сохранить отчет"""
+    print(f"🔍 Сравнение всего окружения с {source}...")
+    report = comparer.compare_environment(source)
+    if report is None:
+        print("⚠️  Официальные данные недоступны для сравнения")
+        return
+    
+    comparer.save_environment_report(report, report_file)
+    summary = report['summary']
+    print(f"Пакетов: {summary['packages']}, совпадает: {summary['match']}, "
+          f"расхождений: {summary['mismatch']}, нет в нашем графе: {summary['missing_ours']}, "
+          f"не установлено: {summary['not_installed']}")
 
-def save_summary_report(packages: list):
+def save_summary_report(packages: list, failures: dict = None):
     """Сохранить сводный отчет"""
     with open('visualization_report.md', 'w', encoding='utf-8') as f:
         f.write("# Отчет по визуализации графа зависимостей\n\n")
-        f.write("## Демонстрационные пакеты:\n")
+        f.write("## Обработанные пакеты:\n")
         for i, pkg in enumerate(packages, 1):
             f.write(f"{i}. **{pkg}**\n")
         
+        if failures:
+            f.write("\n## Ошибки:\n")
+            for pkg, errors in failures.items():
+                for error in errors:
+                    f.write(f"- **{pkg}**: {error}\n")
+        
         f.write("\n## Созданные файлы:\n")
         f.write("- PNG изображения графов в папке `examples/`\n")
         f.write("- Mermaid диаграммы в папке `mermaid_files/`\n")
@@ -1,39 +1,52 @@
+import instrumentation
+from dependency_parser import DependencyParser
+from graph_exporters import MERMAID_RESERVED, ExportPlan, NodeIdRegistry, export_graph
+from graph_traversal import DEPENDENCIES, DEPENDENTS
+
 class MermaidGenerator:
     def __init__(self, dependency_parser: DependencyParser):
         self.parser = dependency_parser
+        self._node_ids = NodeIdRegistry(MERMAID_RESERVED)
     
-    def generate_mermaid_graph(self, package_name: str, max_nodes: int = 20) -> str:
+    @instrumentation.traced('mermaid.generate')
+    def generate_mermaid_graph(self, package_name: str, max_nodes: int = 20, max_depth: int = 0) -> str:
         """Сгенерировать Mermaid диаграмму для пакета"""
-        package_info = self.parser.get_package_info(package_name)
-        
         mermaid_code = ["graph TD"]
         
         # Добавляем центральный пакет
         mermaid_code.append(f"    {self._format_node_name(package_name)}[{package_name}]")
         
-        # Добавляем прямые зависимости
         added_nodes = {package_name}
+        added_edges = set()
         
-        for i, dep in enumerate(package_info['direct_dependencies'][:max_nodes//2]):
-            dep_node = self._format_node_name(dep)
-            mermaid_code.append(f"    {dep_node}[{dep}]")
-            mermaid_code.append(f"    {self._format_node_name(package_name)} --> {dep_node}")
-            added_nodes.add(dep)
-        
-        # Добавляем обратные зависимости
-        for i, rev_dep in enumerate(package_info['reverse_dependencies'][:max_nodes//2]):
-            rev_dep_node = self._format_node_name(rev_dep)
-            if rev_dep not in added_nodes:
-                mermaid_code.append(f"    {rev_dep_node}[{rev_dep}]")
-                added_nodes.add(rev_dep)
-            mermaid_code.append(f"    {rev_dep_node} --> {self._format_node_name(package_name)}")
+        # Добавляем зависимости и обратные зависимости (по max_nodes//2 узлов на направление)
+        for direction in (DEPENDENCIES, DEPENDENTS):
+            traversal = self.parser.traverse(package_name, max_depth, direction)
+            kept = [node for node in traversal.depths if node != package_name][:max_nodes//2]
+            kept_nodes = set(kept) | {package_name}
+            
+            for node in kept:
+                if node not in added_nodes:
+                    mermaid_code.append(f"    {self._format_node_name(node)}[{node}]")
+                    added_nodes.add(node)
+            
+            for source, target in traversal.edges:
+                if source in kept_nodes and target in kept_nodes and (source, target) not in added_edges:
+                    mermaid_code.append(
+                        f"    {self._format_node_name(source)} --> {self._format_node_name(target)}")
+                    added_edges.add((source, target))
         
         return '\n'.join(mermaid_code)
     
     def _format_node_name(self, name: str) -> str:
-        """Форматировать имя узла для Mermaid"""
-        # Заменяем недопустимые символы
-        return name.replace('-', '_').replace('.', '_').replace(' ', '_')
+        """Форматировать имя узла для Mermaid (с кэшем и разрешением коллизий вида a-b / a.b)"""
+        return self._node_ids.node_id(name)
+    
+    def save_full_graph(self, package_name: str, filename: str, max_nodes: int = 200) -> ExportPlan:
+        """Потоково сохранить полный транзитивный граф пакета, свернув лишнее в кластеры"""
+        plan = export_graph(self.parser.dependencies, filename, 'mermaid', [package_name], max_nodes)
+        print(f"Mermaid код сохранен в {filename}")
+        return plan
     
     def save_mermaid_to_file(self, mermaid_code: str, filename: str):
         """Сохранить Mermaid код в файл"""
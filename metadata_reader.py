@@ -0,0 +1,128 @@
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from requirement_records import MarkerEvaluator, RequirementRecord, TargetEnvironment
+
+# importlib.metadata и packaging загружаются при первом чтении метаданных:
+# при попадании в кэш графа они не нужны вовсе
+
+
+def normalize_name(name: str) -> str:
+    """Привести имя пакета к ключу, как это делал pkg_resources (safe_name + lower)"""
+    return re.sub(r'[^A-Za-z0-9.]+', '-', name).lower()
+
+
+class MetadataReader:
+    """
+    Читает метаданные всех установленных дистрибутивов за один проход
+    через importlib.metadata, без запуска дочерних процессов
+    """
+
+    def __init__(self, path: Optional[List[str]] = None,
+                 environment: Optional['TargetEnvironment'] = None):
+        self.path = path
+        # Целевое окружение для маркеров; None - текущий интерпретатор
+        self.environment = environment
+        self._evaluator = None
+        self._requires: Optional[Dict[str, List[str]]] = None
+        # Зависимости, прочитанные по одному пакету до полного чтения окружения
+        self._package_requires: Dict[str, Optional[List[str]]] = {}
+
+    @property
+    def environment_key(self) -> str:
+        """Отпечаток целевого окружения ('' для текущего интерпретатора)"""
+        return '' if self.environment is None else self.environment.fingerprint
+
+    @property
+    def evaluator(self) -> 'MarkerEvaluator':
+        """Вычислитель маркеров с кэшем, создается при первом чтении зависимостей"""
+        if self._evaluator is None:
+            from requirement_records import MarkerEvaluator
+            self._evaluator = MarkerEvaluator(self.environment)
+        return self._evaluator
+
+    def iter_distributions(self):
+        """Перебрать дистрибутивы в порядке sys.path (первый найденный побеждает)"""
+        from importlib import metadata
+
+        seen = set()
+        if self.path is None:
+            distributions = metadata.distributions()
+        else:
+            distributions = metadata.distributions(path=self.path)
+
+        for dist in distributions:
+            name = dist.metadata['Name']
+            if not name:
+                continue
+            key = normalize_name(name)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield key, dist
+
+    def read_requirements(self, dist) -> List['RequirementRecord']:
+        """Разобрать Requires-Dist дистрибутива в записи RequirementRecord (без учета маркеров)"""
+        from requirement_records import parse_requirement
+
+        records = []
+        for line in dist.requires or []:
+            record = parse_requirement(line)
+            if record is not None:
+                records.append(record)
+        return records
+
+    def read_requires(self, dist) -> List[str]:
+        """Получить список зависимостей из Requires-Dist, применимых в целевом окружении"""
+        evaluator = self.evaluator
+        # Как и pip show, не учитываем зависимости, подключаемые через extras
+        names = {record.name: None for record in self.read_requirements(dist)
+                 if evaluator.evaluate(record.marker, '')}
+        return sorted(names)
+
+    def read_all(self) -> Dict[str, List[str]]:
+        """Прочитать зависимости всех установленных пакетов"""
+        if self._requires is None:
+            self._requires = {
+                key: self.read_requires(dist) for key, dist in self.iter_distributions()
+            }
+        return self._requires
+
+    def read_versions(self) -> Dict[str, str]:
+        """Версии установленных пакетов {пакет: версия}"""
+        return {key: dist.version for key, dist in self.iter_distributions()}
+
+    def get_installed_packages(self) -> List[str]:
+        """Получить список установленных пакетов"""
+        return list(self.read_all())
+
+    def get_package_dependencies(self, package_name: str) -> Optional[List[str]]:
+        """
+        Получить зависимости пакета или None, если пакет не установлен
+
+        Если окружение еще не прочитано целиком, читается только метаданные
+        этого пакета: обход одного пакета не разбирает остальные дистрибутивы.
+        """
+        key = normalize_name(package_name)
+        if self._requires is not None:
+            deps = self._requires.get(key)
+        elif key in self._package_requires:
+            deps = self._package_requires[key]
+        else:
+            deps = self._package_requires[key] = self._read_package(key)
+        return list(deps) if deps is not None else None
+
+    def _read_package(self, key: str) -> Optional[List[str]]:
+        """Найти дистрибутив пакета (первый в порядке путей поиска) и прочитать его зависимости"""
+        from importlib import metadata
+
+        search = {'name': key} if self.path is None else {'name': key, 'path': self.path}
+        for dist in metadata.Distribution.discover(**search):
+            return self.read_requires(dist)
+        return None
+
+    def invalidate(self):
+        """Сбросить прочитанные метаданные"""
+        self._requires = None
+        self._package_requires = {}
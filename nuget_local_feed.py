@@ -0,0 +1,109 @@
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional
+
+from nuspec_parser import parse_nuspec
+
+
+def iter_nupkg_files(root: str) -> Iterator[str]:
+    """Перебрать .nupkg архивы каталога и его подкаталогов (плоская и вложенная структура)"""
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.lower().endswith('.nupkg'):
+                yield os.path.join(directory, filename)
+
+
+def contains_packages(root: str) -> bool:
+    """Есть ли в каталоге хотя бы один .nupkg (обход прекращается на первом найденном)"""
+    return next(iter_nupkg_files(root), None) is not None
+
+
+class LocalNuGetFeed:
+    """
+    Локальный источник NuGet пакетов: каталог с .nupkg архивами
+
+    Поддерживаются плоский каталог (Id.Version.nupkg) и вложенная структура
+    id/version/ как в ~/.nuget/packages. Индекс id -> версии строится один
+    раз, а nuspec читается из архива напрямую, без распаковки.
+
+    Args:
+        root: Путь к каталогу с пакетами
+    """
+
+    def __init__(self, root: str):
+        if not os.path.isdir(root):
+            raise ValueError(f"Каталог локального репозитория не найден: {root}")
+
+        self.root = root
+        self._packages: Dict[str, Dict[str, str]] = {}
+        self._build_index()
+
+    def _build_index(self):
+        """Найти все .nupkg архивы и запомнить их id и версии"""
+        for path in iter_nupkg_files(self.root):
+            identity = self._identity_from_layout(path) or self._identity_from_archive(path)
+            if identity is None:
+                continue
+
+            package_id, version = identity
+            self._packages.setdefault(package_id.lower(), {}).setdefault(version.lower(), path)
+
+    def _identity_from_layout(self, path: str) -> Optional[tuple]:
+        """Определить id и версию по пути вида <id>/<version>/<id>.<version>.nupkg"""
+        version_dir = os.path.dirname(path)
+        id_dir = os.path.dirname(version_dir)
+        package_id = os.path.basename(id_dir)
+        version = os.path.basename(version_dir)
+        if os.path.basename(path).lower() == f"{package_id}.{version}.nupkg".lower():
+            return package_id, version
+        return None
+
+    def _identity_from_archive(self, path: str) -> Optional[tuple]:
+        """Определить id и версию из nuspec внутри архива (имя файла неоднозначно)"""
+        content = self._read_nuspec(path)
+        if content is None:
+            return None
+
+        try:
+            metadata = parse_nuspec([content])
+        except ET.ParseError:
+            return None
+
+        if metadata['id'] and metadata['version']:
+            return metadata['id'], metadata['version']
+        return None
+
+    @staticmethod
+    def _read_nuspec(path: str) -> Optional[bytes]:
+        """Прочитать .nuspec из корня архива, не распаковывая остальные файлы"""
+        try:
+            with zipfile.ZipFile(path) as archive:
+                for name in archive.namelist():
+                    if '/' not in name and name.lower().endswith('.nuspec'):
+                        return archive.read(name)
+        except (OSError, zipfile.BadZipFile):
+            pass
+        return None
+
+    def get_nuspec(self, package_name: str, version: str) -> Optional[bytes]:
+        """
+        Получить содержимое nuspec файла пакета
+
+        Args:
+            package_name: Название пакета
+            version: Версия пакета
+
+        Returns:
+            Байты nuspec файла или None, если пакета нет в репозитории
+        """
+        path = self._packages.get(package_name.lower(), {}).get(version.lower())
+        return self._read_nuspec(path) if path else None
+
+    def get_versions(self, package_name: str) -> Optional[List[str]]:
+        """Получить список версий пакета или None, если пакета нет в репозитории"""
+        versions = self._packages.get(package_name.lower())
+        return list(versions) if versions is not None else None
+
+    def __len__(self) -> int:
+        return sum(len(versions) for versions in self._packages.values())
@@ -0,0 +1,330 @@
+import time
+from functools import total_ordering
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config
+from dependency_analyzer import NuGetDependencyAnalyzer
+from graph_traversal import substring_filter
+
+
+@total_ordering
+class NuGetVersion:
+    """
+    Версия NuGet пакета (до четырех числовых частей и prerelease метка)
+
+    Сравнение следует правилам NuGet: числовые части сравниваются как числа,
+    версия с меткой prerelease младше той же версии без метки, метаданные
+    сборки (+...) игнорируются.
+    """
+
+    __slots__ = ('original', 'release', 'prerelease')
+
+    def __init__(self, version: str):
+        self.original = version
+        version = version.strip().split('+', 1)[0]
+        release, _, prerelease = version.partition('-')
+
+        parts = [int(part) for part in release.split('.')]
+        if not 1 <= len(parts) <= 4:
+            raise ValueError(f"Некорректная версия: {version}")
+        self.release = tuple(parts + [0] * (4 - len(parts)))
+        self.prerelease = tuple(
+            (0, int(label), '') if label.isdigit() else (1, 0, label.lower())
+            for label in prerelease.split('.')
+        ) if prerelease else ()
+
+    @property
+    def is_prerelease(self) -> bool:
+        return bool(self.prerelease)
+
+    def _key(self):
+        # Отсутствие prerelease метки старше любой метки
+        return self.release, not self.prerelease, self.prerelease
+
+    def __eq__(self, other):
+        return isinstance(other, NuGetVersion) and self._key() == other._key()
+
+    def __lt__(self, other):
+        return self._key() < other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"NuGetVersion({self.original!r})"
+
+
+class VersionRange:
+    """
+    Диапазон версий в нотации NuGet
+
+    Примеры: "1.0" (>= 1.0), "[1.0]" (ровно 1.0), "[1.0, 2.0)", "(, 1.0]".
+    """
+
+    __slots__ = ('min_version', 'min_inclusive', 'max_version', 'max_inclusive')
+
+    def __init__(self, min_version: Optional[NuGetVersion], min_inclusive: bool,
+                 max_version: Optional[NuGetVersion], max_inclusive: bool):
+        self.min_version = min_version
+        self.min_inclusive = min_inclusive
+        self.max_version = max_version
+        self.max_inclusive = max_inclusive
+
+    @classmethod
+    def parse(cls, value: str) -> 'VersionRange':
+        """Разобрать строку диапазона версий"""
+        value = value.strip()
+        if not value:
+            return cls(None, True, None, True)
+
+        if value[0] not in '[(':
+            # Одиночная версия означает минимальную допустимую версию
+            return cls(NuGetVersion(value), True, None, True)
+
+        if value[-1] not in '])':
+            raise ValueError(f"Некорректный диапазон версий: {value}")
+
+        min_inclusive = value[0] == '['
+        max_inclusive = value[-1] == ']'
+        body = value[1:-1]
+
+        if ',' not in body:
+            version = NuGetVersion(body)
+            return cls(version, True, version, True)
+
+        low, high = (part.strip() for part in body.split(',', 1))
+        return cls(NuGetVersion(low) if low else None, min_inclusive,
+                   NuGetVersion(high) if high else None, max_inclusive)
+
+    def satisfies(self, version: NuGetVersion) -> bool:
+        """Проверить, входит ли версия в диапазон"""
+        if self.min_version is not None:
+            if version < self.min_version or (version == self.min_version and not self.min_inclusive):
+                return False
+        if self.max_version is not None:
+            if version > self.max_version or (version == self.max_version and not self.max_inclusive):
+                return False
+        return True
+
+    def find_best_match(self, versions: Iterable[str]) -> Optional[str]:
+        """
+        Выбрать версию по правилу NuGet «наименьшая подходящая»
+
+        Prerelease версии рассматриваются, только если нижняя граница
+        диапазона сама является prerelease версией.
+        """
+        allow_prerelease = self.min_version is not None and self.min_version.is_prerelease
+        best = None
+        best_version = None
+
+        for candidate in versions:
+            try:
+                version = NuGetVersion(candidate)
+            except ValueError:
+                continue
+            if version.is_prerelease and not allow_prerelease:
+                continue
+            if self.satisfies(version) and (best_version is None or version < best_version):
+                best, best_version = candidate, version
+
+        return best
+
+
+class TransitiveResolver:
+    """
+    Обход графа зависимостей NuGet пакетов в ширину
+
+    Диапазоны версий разрешаются в конкретные версии по индексу версий
+    flat-container API. Каждый узел (id, версия) запоминается, поэтому общие
+    поддеревья загружаются ровно один раз, а все пакеты одного уровня
+    обхода загружаются параллельно.
+
+    Args:
+        analyzer: Анализатор, выполняющий HTTP запросы
+        target_framework: Целевая платформа для выбора группы зависимостей
+                          (None - объединение всех групп)
+        max_depth: Максимальный уровень загружаемых пакетов (None - без ограничения);
+                   зависимости пакетов последнего уровня разрешаются в версии,
+                   но сами не загружаются
+        filter_substring: Исключить пакеты, в id которых есть подстрока: для них
+                          не загружаются ни индекс версий, ни nuspec, ни поддерево
+    """
+
+    def __init__(self, analyzer: Optional[NuGetDependencyAnalyzer] = None,
+                 target_framework: Optional[str] = None, max_depth: Optional[int] = None,
+                 filter_substring: Optional[str] = None):
+        self.analyzer = analyzer or NuGetDependencyAnalyzer()
+        self.target_framework = target_framework
+        self.max_depth = max_depth
+        self.accept = substring_filter(filter_substring)
+        self.nodes: Dict[Tuple[str, str], Dict] = {}
+        self._ids: Dict[str, str] = {}
+        self._versions: Dict[str, List[str]] = {}
+        self._resolved_ranges: Dict[Tuple[str, str], Optional[str]] = {}
+
+    @staticmethod
+    def node_key(package_id: str, version: str) -> Tuple[str, str]:
+        """Ключ узла графа: id и версия без учета регистра"""
+        return package_id.lower(), version.lower()
+
+    def _select_dependencies(self, package_info: Dict) -> List[Dict]:
+        """Выбрать зависимости для целевой платформы"""
+        groups = package_info.get('dependency_groups') or {}
+        if self.target_framework is None or self.target_framework not in groups:
+            dependencies = package_info['dependencies']
+        else:
+            dependencies = groups.get('', []) + groups[self.target_framework]
+        if self.accept is None:
+            return dependencies
+        return [dep for dep in dependencies if self.accept(dep['id'])]
+
+    def _resolve_ranges(self, requests: Iterable[Tuple[str, str]]):
+        """Разрешить диапазоны версий, загружая недостающие индексы версий параллельно"""
+        pending = [request for request in dict.fromkeys(requests)
+                   if request not in self._resolved_ranges]
+
+        missing_ids = [package_id for package_id in dict.fromkeys(pid for pid, _ in pending)
+                       if package_id not in self._versions]
+        self._versions.update(self.analyzer.get_many_versions(missing_ids))
+
+        for package_id, version_range in pending:
+            try:
+                best = VersionRange.parse(version_range).find_best_match(self._versions[package_id])
+            except ValueError:
+                best = None
+            self._resolved_ranges[(package_id, version_range)] = best
+
+    def resolve(self, roots: Iterable[Tuple[str, str]]) -> Dict:
+        """
+        Построить полный граф зависимостей для корневых пакетов
+
+        Args:
+            roots: Пары (название пакета, конкретная версия)
+
+        Returns:
+            Словарь с узлами графа, корнями, неразрешенными зависимостями
+            и временем обработки каждого уровня обхода
+        """
+        roots = list(roots)
+        for package_id, _ in roots:
+            self._ids.setdefault(package_id.lower(), package_id)
+
+        root_keys = [self.node_key(package_id, version) for package_id, version in roots]
+        frontier = [key for key in dict.fromkeys(root_keys) if key not in self.nodes]
+        unresolved = []
+        levels = []
+        level = 0
+
+        while frontier:
+            started = time.perf_counter()
+            fetched = self.analyzer.get_many(frontier)
+
+            requests = []
+            for key in frontier:
+                package_info = fetched.get(key)
+                dependencies = self._select_dependencies(package_info) if package_info else []
+                self.nodes[key] = {
+                    'id': self._ids.get(key[0], key[0]),
+                    'version': key[1],
+                    'found': package_info is not None,
+                    'dependencies': dependencies,
+                }
+                for dep in dependencies:
+                    self._ids.setdefault(dep['id'].lower(), dep['id'])
+                    requests.append((dep['id'].lower(), dep['version']))
+
+            self._resolve_ranges(requests)
+
+            next_frontier = []
+            for key in frontier:
+                node = self.nodes[key]
+                resolved = []
+                for dep in node['dependencies']:
+                    version = self._resolved_ranges[(dep['id'].lower(), dep['version'])]
+                    if version is None:
+                        unresolved.append({'package': key, 'id': dep['id'], 'range': dep['version']})
+                        continue
+
+                    dep_key = self.node_key(dep['id'], version)
+                    resolved.append({'id': dep['id'], 'range': dep['version'], 'version': dep_key[1]})
+                    if dep_key not in self.nodes and (self.max_depth is None or level < self.max_depth):
+                        next_frontier.append(dep_key)
+                node['dependencies'] = resolved
+
+            levels.append({
+                'level': level,
+                'nodes': len(frontier),
+                'seconds': time.perf_counter() - started,
+            })
+            frontier = list(dict.fromkeys(next_frontier))
+            level += 1
+
+        return {
+            'roots': root_keys,
+            'nodes': self.nodes,
+            'unresolved': unresolved,
+            'levels': levels,
+        }
+
+
+def resolution_graph(result: Dict) -> Tuple[Dict[str, List[str]], Dict[str, Dict[str, str]]]:
+    """
+    Граф результата resolve() для graph_snapshot.write_snapshot
+
+    Узел называется id пакета; если в графе несколько версий одного id,
+    каждая получает имя "id@версия". Версия хранится в столбце version.
+
+    Returns:
+        (зависимости, столбцы)
+    """
+    nodes = result['nodes']
+    versions_by_id: Dict[str, set] = {}
+    for package_id, version in nodes:
+        versions_by_id.setdefault(package_id, set()).add(version)
+    for node in nodes.values():
+        for dep in node['dependencies']:
+            versions_by_id.setdefault(dep['id'].lower(), set()).add(dep['version'])
+
+    display_ids = {key[0]: node['id'] for key, node in nodes.items()}
+
+    def name(package_id: str, version: str) -> str:
+        package_id = display_ids.get(package_id.lower(), package_id)
+        if len(versions_by_id[package_id.lower()]) > 1:
+            return f"{package_id}@{version}"
+        return package_id
+
+    dependencies: Dict[str, List[str]] = {}
+    versions: Dict[str, str] = {}
+    found: Dict[str, str] = {}
+    for (package_id, version), node in nodes.items():
+        node_name = name(package_id, version)
+        dependencies[node_name] = [name(dep['id'], dep['version']) for dep in node['dependencies']]
+        versions[node_name] = version
+        found[node_name] = 'true' if node['found'] else 'false'
+        for dep in node['dependencies']:
+            versions.setdefault(name(dep['id'], dep['version']), dep['version'])
+
+    return dependencies, {'version': versions, 'found': found}
+
+
+def main():
+    """Построить полный граф зависимостей для пакетов из config.PACKAGES_TO_ANALYZE"""
+    resolver = TransitiveResolver(NuGetDependencyAnalyzer.from_repository(config.REPOSITORY_URL))
+    try:
+        result = resolver.resolve(config.PACKAGES_TO_ANALYZE)
+    finally:
+        resolver.analyzer.close()
+
+    print(f"\nТранзитивный граф для {len(result['roots'])} пакетов")
+    print("=" * 60)
+    for level in result['levels']:
+        print(f"Уровень {level['level']}: {level['nodes']} пакетов за {level['seconds']:.2f} с")
+
+    edges = sum(len(node['dependencies']) for node in result['nodes'].values())
+    print(f"\nИтого узлов: {len(result['nodes'])}, ребер: {edges}")
+    if result['unresolved']:
+        print(f"Неразрешенных зависимостей: {len(result['unresolved'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Локальный HTTP сервер, имитирующий NuGet flat-container API.
+
+Отдает заранее заданные nuspec файлы и индексы версий, поддерживает
+keep-alive соединения и условные запросы по ETag. Используется для проверки и замеров без сети.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело пишутся отдельно; без TCP_NODELAY алгоритм Нейгла вместе
+    # с отложенным ACK добавлял бы ~40 мс к каждому ответу на keep-alive соединении
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        with server.stats_lock:
+            server.request_count += 1
+
+        if server.stub.latency > 0:
+            time.sleep(server.stub.latency)
+
+        status, body, content_type = server.stub.resolve(self.path)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if status == 200:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connection_count += 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NuGetStubServer:
+    """
+    Заглушка NuGet API на localhost
+
+    Args:
+        nuspecs: Словарь {(id пакета, версия): содержимое nuspec}
+        latency: Искусственная задержка ответа в секундах (имитация сети)
+    """
+
+    def __init__(self, nuspecs: Dict[Tuple[str, str], str], latency: float = 0.0):
+        self.latency = latency
+        self.nuspecs = {(package_id.lower(), version.lower()): content.encode('utf-8')
+                        for (package_id, version), content in nuspecs.items()}
+        self._server = None
+        self._thread = None
+
+    def resolve(self, path: str) -> Tuple[int, bytes, str]:
+        """Найти ответ для пути запроса: (статус, тело, Content-Type)"""
+        parts = [part for part in path.split('?', 1)[0].split('/') if part]
+
+        if len(parts) == 3 and parts[2] == f"{parts[0]}.nuspec":
+            content = self.nuspecs.get((parts[0], parts[1]))
+            if content is not None:
+                return 200, content, 'application/xml'
+
+        if len(parts) == 2 and parts[1] == 'index.json':
+            versions = [version for package_id, version in self.nuspecs if package_id == parts[0]]
+            if versions:
+                body = json.dumps({'versions': versions}).encode('utf-8')
+                return 200, body, 'application/json'
+
+        return 404, b'Not Found', 'text/plain'
+
+    @property
+    def url(self) -> str:
+        """Базовый URL запущенного сервера"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self) -> int:
+        return self._server.request_count
+
+    @property
+    def connection_count(self) -> int:
+        return self._server.connection_count
+
+    def start(self) -> 'NuGetStubServer':
+        """Запустить сервер на свободном порту в фоновом потоке"""
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _StubRequestHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._server.stats_lock = threading.Lock()
+        self._server.request_count = 0
+        self._server.connection_count = 0
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Остановить сервер"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self) -> 'NuGetStubServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,96 @@
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List, Optional
+
+# Размер порции, которой тело ответа подается парсеру
+CHUNK_SIZE = 16 * 1024
+
+# Ключ группы для зависимостей без targetFramework (применимы к любой платформе)
+ANY_FRAMEWORK = ''
+
+
+def _local_name(tag: str) -> str:
+    """Имя элемента без пространства имен nuspec.xsd"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_chunks(data: bytes, chunk_size: int = CHUNK_SIZE) -> Iterable[bytes]:
+    """Нарезать тело ответа на порции без копирования"""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+def parse_nuspec(chunks: Iterable[bytes]) -> Dict:
+    """
+    Потоково разбирает nuspec и извлекает зависимости по целевым платформам
+
+    Разбор прекращается сразу после закрытия элемента <dependencies>,
+    оставшаяся часть документа не читается.
+
+    Args:
+        chunks: Порции байтов XML документа
+
+    Returns:
+        Словарь с id, version и зависимостями, сгруппированными по targetFramework
+
+    Raises:
+        xml.etree.ElementTree.ParseError: Документ не является корректным XML
+    """
+    result = {'id': None, 'version': None, 'groups': {}}
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    path: List[str] = []
+    current_group: Optional[str] = None
+
+    for chunk in chunks:
+        parser.feed(chunk)
+
+        for event, element in parser.read_events():
+            name = _local_name(element.tag)
+
+            if event == 'start':
+                path.append(name)
+                if name == 'group' and 'dependencies' in path:
+                    current_group = element.get('targetFramework', ANY_FRAMEWORK)
+                    result['groups'].setdefault(current_group, [])
+                continue
+
+            path.pop()
+
+            if name == 'dependency' and 'dependencies' in path:
+                package_id = element.get('id')
+                if package_id:
+                    group = current_group if current_group is not None else ANY_FRAMEWORK
+                    result['groups'].setdefault(group, []).append({
+                        'id': package_id,
+                        'version': element.get('version', ''),
+                    })
+            elif name == 'group':
+                current_group = None
+            elif name in ('id', 'version') and path[-1:] == ['metadata']:
+                result[name] = (element.text or '').strip()
+            elif name == 'dependencies':
+                return result
+
+            # Элементы больше не нужны - не даем дереву расти
+            element.clear()
+
+    parser.close()
+    return result
+
+
+def flatten_dependencies(groups: Dict[str, List[Dict]]) -> List[Dict]:
+    """
+    Объединить зависимости всех групп без дубликатов
+
+    Пакет, указанный в нескольких группах, попадает в список один раз
+    с версией из первой группы, в которой он встретился.
+    """
+    seen = set()
+    dependencies = []
+    for group_dependencies in groups.values():
+        for dependency in group_dependencies:
+            key = dependency['id'].lower()
+            if key not in seen:
+                seen.add(key)
+                dependencies.append(dependency)
+    return dependencies
@@ -0,0 +1,303 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Номера установленных битов в порядке возрастания"""
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+class ReachabilityIndex:
+    """
+    Индекс транзитивной достижимости в графе зависимостей
+
+    Граф сжимается по компонентам сильной связности (алгоритм Тарьяна),
+    после чего для каждой компоненты хранятся множества потомков и предков
+    в виде битовых масок (int). Проверка «достижим ли B из A» - это один
+    сдвиг маски, а перечисление транзитивных зависимостей не требует обхода
+    графа.
+
+    При изменении зависимостей одного пакета пересчитываются только
+    компоненты, чьи множества могли измениться; полная перестройка нужна,
+    лишь когда компоненты сильной связности сливаются или распадаются.
+
+    Args:
+        adjacency: Словарь {пакет: список зависимостей}
+    """
+
+    def __init__(self, adjacency: Dict[str, Iterable[str]]):
+        self.adjacency: Dict[str, List[str]] = {name: list(dict.fromkeys(deps))
+                                                for name, deps in adjacency.items()}
+        self.full_rebuilds = 0
+        self.rebuild()
+
+    def rebuild(self):
+        """Полностью перестроить индекс по текущему графу"""
+        self.full_rebuilds += 1
+        self.names: List[str] = []
+        self.node_index: Dict[str, int] = {}
+        for name, deps in self.adjacency.items():
+            self._intern(name)
+            for dep in deps:
+                self._intern(dep)
+
+        node_count = len(self.names)
+        successors = [[] for _ in range(node_count)]
+        for name, deps in self.adjacency.items():
+            successors[self.node_index[name]] = [self.node_index[dep] for dep in deps]
+
+        self.component: List[int] = [-1] * node_count
+        self.members: List[List[int]] = []
+        self._tarjan(successors)
+
+        # Между компонентами храним число исходных ребер, чтобы удаление одного
+        # из параллельных ребер не разрывало связь компонент
+        self.succ: List[Dict[int, int]] = [{} for _ in self.members]
+        self.pred: List[Dict[int, int]] = [{} for _ in self.members]
+        for source, targets in enumerate(successors):
+            for target in targets:
+                self._link(self.component[source], self.component[target], 1)
+
+        # Тарьян выдает компоненты в обратном топологическом порядке:
+        # потомки компоненты всегда имеют меньший номер
+        self.descendants: List[int] = [0] * len(self.members)
+        for comp in range(len(self.members)):
+            bits = 1 << comp
+            for succ in self.succ[comp]:
+                bits |= self.descendants[succ]
+            self.descendants[comp] = bits
+
+        self.ancestors: List[int] = [0] * len(self.members)
+        for comp in reversed(range(len(self.members))):
+            bits = 1 << comp
+            for pred in self.pred[comp]:
+                bits |= self.ancestors[pred]
+            self.ancestors[comp] = bits
+
+    def copy(self) -> 'ReachabilityIndex':
+        """
+        Независимая копия индекса без повторного построения
+
+        Маски замыканий - неизменяемые int, поэтому копируются только списки
+        и словари; изменения копии не видны читателям оригинала.
+        """
+        clone = ReachabilityIndex.__new__(ReachabilityIndex)
+        clone.adjacency = dict(self.adjacency)
+        clone.full_rebuilds = self.full_rebuilds
+        clone.names = list(self.names)
+        clone.node_index = dict(self.node_index)
+        clone.component = list(self.component)
+        clone.members = [list(members) for members in self.members]
+        clone.succ = [dict(links) for links in self.succ]
+        clone.pred = [dict(links) for links in self.pred]
+        clone.descendants = list(self.descendants)
+        clone.ancestors = list(self.ancestors)
+        return clone
+
+    def _intern(self, name: str) -> int:
+        node = self.node_index.get(name)
+        if node is None:
+            node = self.node_index[name] = len(self.names)
+            self.names.append(name)
+        return node
+
+    def _tarjan(self, successors: List[List[int]]):
+        """Итеративный алгоритм Тарьяна (без рекурсии, для глубоких графов)"""
+        node_count = len(successors)
+        order = [-1] * node_count
+        lowlink = [0] * node_count
+        on_stack = [False] * node_count
+        stack: List[int] = []
+        counter = 0
+
+        for start in range(node_count):
+            if order[start] != -1:
+                continue
+
+            work = [(start, 0)]
+            while work:
+                node, edge = work.pop()
+                if edge == 0:
+                    order[node] = lowlink[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+
+                recurse = False
+                targets = successors[node]
+                while edge < len(targets):
+                    target = targets[edge]
+                    edge += 1
+                    if order[target] == -1:
+                        work.append((node, edge))
+                        work.append((target, 0))
+                        recurse = True
+                        break
+                    if on_stack[target]:
+                        lowlink[node] = min(lowlink[node], order[target])
+
+                if recurse:
+                    continue
+
+                if lowlink[node] == order[node]:
+                    comp = len(self.members)
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        self.component[member] = comp
+                        members.append(member)
+                        if member == node:
+                            break
+                    self.members.append(members)
+
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+    def _link(self, source: int, target: int, delta: int) -> bool:
+        """
+        Изменить число ребер между компонентами
+
+        Returns:
+            True, если связь между компонентами появилась или исчезла
+        """
+        if source == target:
+            return False
+
+        count = self.succ[source].get(target, 0) + delta
+        if count > 0:
+            self.succ[source][target] = count
+            self.pred[target][source] = count
+            return count == delta
+        self.succ[source].pop(target, None)
+        self.pred[target].pop(source, None)
+        return True
+
+    def _add_node(self, name: str) -> int:
+        """Добавить новый узел как отдельную компоненту без ребер"""
+        node = self.node_index.get(name)
+        if node is not None:
+            return node
+
+        node = self._intern(name)
+        comp = len(self.members)
+        self.component.append(comp)
+        self.members.append([node])
+        self.succ.append({})
+        self.pred.append({})
+        self.descendants.append(1 << comp)
+        self.ancestors.append(1 << comp)
+        return node
+
+    def update_package(self, package: str, dependencies: Iterable[str]):
+        """
+        Заменить зависимости пакета с инкрементальным обновлением индекса
+
+        Args:
+            package: Название пакета
+            dependencies: Новый список прямых зависимостей
+        """
+        new_deps = list(dict.fromkeys(dependencies))
+        old_deps = set(self.adjacency.get(package, []))
+        self.adjacency[package] = new_deps
+
+        source = self._add_node(package)
+        for dep in new_deps:
+            self._add_node(dep)
+
+        source_comp = self.component[source]
+        removed = [self.component[self.node_index[dep]] for dep in old_deps - set(new_deps)]
+        added = [self.component[self.node_index[dep]] for dep in new_deps if dep not in old_deps]
+
+        # Удаление ребра внутри компоненты может ее разбить, а новое ребро
+        # в обратную сторону - слить несколько компонент
+        if any(target == source_comp for target in removed) or \
+                any(self.descendants[target] >> source_comp & 1 for target in added if target != source_comp):
+            self.rebuild()
+            return
+
+        changed_targets = []
+        for target in removed:
+            if self._link(source_comp, target, -1):
+                changed_targets.append(target)
+        for target in added:
+            if self._link(source_comp, target, 1):
+                changed_targets.append(target)
+
+        if not changed_targets:
+            return
+
+        affected_descendants = self.ancestors[source_comp]
+        affected_ancestors = 0
+        for target in changed_targets:
+            affected_ancestors |= self.descendants[target]
+
+        self._recompute(affected_descendants, self.succ, self.descendants)
+        self._recompute(affected_ancestors, self.pred, self.ancestors)
+
+    def _recompute(self, affected_bits: int, neighbors: List[Dict[int, int]], closure: List[int]):
+        """Пересчитать маски замыкания для затронутых компонент в порядке обратного обхода"""
+        affected = set(iter_bits(affected_bits))
+        done: Set[int] = set()
+
+        for start in affected:
+            if start in done:
+                continue
+
+            work = [(start, iter(neighbors[start]))]
+            visiting = {start}
+            while work:
+                comp, pending = work[-1]
+                descended = False
+                for neighbor in pending:
+                    if neighbor in affected and neighbor not in done and neighbor not in visiting:
+                        visiting.add(neighbor)
+                        work.append((neighbor, iter(neighbors[neighbor])))
+                        descended = True
+                        break
+                if descended:
+                    continue
+
+                work.pop()
+                bits = 1 << comp
+                for neighbor in neighbors[comp]:
+                    bits |= closure[neighbor]
+                closure[comp] = bits
+                done.add(comp)
+
+    def _names_in(self, bits: int, exclude: Optional[str] = None) -> List[str]:
+        names = []
+        for comp in iter_bits(bits):
+            for node in self.members[comp]:
+                name = self.names[node]
+                if name != exclude:
+                    names.append(name)
+        return names
+
+    def transitive_dependencies(self, package: str) -> List[str]:
+        """Все пакеты, от которых пакет зависит прямо или косвенно"""
+        node = self.node_index.get(package)
+        if node is None:
+            return []
+        return self._names_in(self.descendants[self.component[node]], exclude=package)
+
+    def transitive_dependents(self, package: str) -> List[str]:
+        """Все пакеты, которые зависят от пакета прямо или косвенно"""
+        node = self.node_index.get(package)
+        if node is None:
+            return []
+        return self._names_in(self.ancestors[self.component[node]], exclude=package)
+
+    def is_reachable(self, source: str, target: str) -> bool:
+        """Зависит ли source (прямо или косвенно) от target"""
+        source_node = self.node_index.get(source)
+        target_node = self.node_index.get(target)
+        if source_node is None or target_node is None:
+            return False
+        if source_node == target_node:
+            return len(self.members[self.component[source_node]]) > 1 or \
+                source in self.adjacency.get(source, [])
+        return bool(self.descendants[self.component[source_node]] >> self.component[target_node] & 1)
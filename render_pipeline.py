@@ -0,0 +1,141 @@
+"""
+Пакетная отрисовка графов в headless режиме на пуле процессов.
+
+Каждое изображение - отдельная задача; рабочие процессы используют
+бэкенд Agg, никогда не вызывают plt.show и закрывают фигуры сразу после
+сохранения, поэтому память не растет при отрисовке сотен пакетов.
+"""
+
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# Состояние рабочего процесса: визуализатор создается один раз на процесс
+_worker_visualizer = None
+
+
+class RenderJob:
+    """
+    Задача отрисовки одного файла
+
+    Args:
+        package_name: Пакет, граф которого рисуется
+        output_file: Путь к результату
+        official_edges: Ребра графа pipdeptree; если заданы, рисуется сравнение
+        max_depth: Глубина подграфа зависимостей
+        positions: Координаты узлов подграфа, рассчитанные вызывающей стороной
+                   (None - раскладка выполняется в рабочем процессе)
+    """
+
+    __slots__ = ('package_name', 'output_file', 'official_edges', 'max_depth', 'positions')
+
+    def __init__(self, package_name: str, output_file: str,
+                 official_edges: Optional[List[Tuple[str, str]]] = None, max_depth: int = 2,
+                 positions: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.package_name = package_name
+        self.output_file = output_file
+        self.official_edges = official_edges
+        self.max_depth = max_depth
+        self.positions = positions
+
+
+class RenderResult:
+    """Результат задачи отрисовки: файл, время в секундах и текст ошибки"""
+
+    __slots__ = ('package_name', 'output_file', 'seconds', 'error')
+
+    def __init__(self, package_name: str, output_file: str, seconds: float, error: Optional[str] = None):
+        self.package_name = package_name
+        self.output_file = output_file
+        self.seconds = seconds
+        self.error = error
+
+
+def _init_worker(dependencies: Dict[str, List[str]], reverse_dependencies: Dict[str, List[str]],
+                 dpi: int, image_format: Optional[str]):
+    """Подготовить рабочий процесс: бэкенд Agg и визуализатор с готовым графом"""
+    global _worker_visualizer
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    from dependency_parser import DependencyParser
+    from graph_visualizer import GraphVisualizer
+
+    parser = DependencyParser()
+    parser.dependencies = dependencies
+    parser.reverse_dependencies = reverse_dependencies
+    _worker_visualizer = GraphVisualizer(parser, headless=True, dpi=dpi, image_format=image_format)
+
+
+def render_job(visualizer, job: RenderJob) -> RenderResult:
+    """
+    Отрисовать задачу заданным визуализатором, перехватив ошибку
+
+    Args:
+        visualizer: GraphVisualizer
+        job: Задача отрисовки
+
+    Returns:
+        RenderResult со временем отрисовки или текстом ошибки
+    """
+    import networkx as nx
+
+    started = time.perf_counter()
+    try:
+        if job.official_edges is None:
+            visualizer.visualize_package_dependencies(job.package_name, job.output_file,
+                                                      job.max_depth, positions=job.positions)
+        else:
+            our_graph = visualizer.create_networkx_graph(job.package_name, job.max_depth)
+            official_graph = nx.DiGraph(job.official_edges)
+            official_graph.add_node(job.package_name)
+            visualizer.create_comparison_visualization(
+                job.package_name, our_graph, official_graph, job.output_file, job.positions)
+        error = None
+    except Exception as e:
+        error = str(e)
+
+    return RenderResult(job.package_name, job.output_file, time.perf_counter() - started, error)
+
+
+def _render(job: RenderJob) -> RenderResult:
+    """Отрисовать одну задачу в рабочем процессе"""
+    # Сообщения визуализатора не нужны - итог печатает вызывающая сторона
+    with contextlib.redirect_stdout(io.StringIO()):
+        return render_job(_worker_visualizer, job)
+
+
+def create_render_pool(parser, workers: Optional[int] = None, dpi: int = 300,
+                       image_format: Optional[str] = None) -> 'ProcessPoolExecutor':
+    """
+    Создать пул процессов отрисовки с готовым графом в каждом процессе
+
+    Args:
+        parser: DependencyParser с построенным графом
+        workers: Число процессов (по умолчанию - число ядер)
+        dpi: Разрешение изображений
+        image_format: Формат файлов (None - по расширению имени)
+    """
+    # multiprocessing загружается только при первой отрисовке
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Пул создается, когда у вызывающего процесса уже могут работать потоки;
+    # fork в таком состоянии может унаследовать захваченные блокировки
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                               mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker,
+                               initargs=(parser.dependencies, parser.reverse_dependencies,
+                                         dpi, image_format))
+
+
+def submit_render(pool: 'ProcessPoolExecutor', job: RenderJob) -> Future:
+    """Поставить задачу отрисовки в пул; результат Future - RenderResult"""
+    return pool.submit(_render, job)
@@ -0,0 +1,228 @@
+"""
+Структурированные записи зависимостей (PEP 508) и вычисление маркеров
+для целевого окружения.
+
+Строка Requires-Dist разбирается в запись (имя, спецификатор версий, extras,
+маркер) один раз: одинаковые строки встречаются у множества дистрибутивов,
+поэтому разбор кэшируется. Маркеры вычисляются для целевого окружения,
+которое может отличаться от текущего интерпретатора (например, граф для
+Windows и Python 3.8, построенный в Linux). Скомпилированные маркеры и
+результаты их вычисления тоже кэшируются: тысячи одинаковых маркеров
+("python_version < '3.8'", "sys_platform == 'win32'") вычисляются один раз.
+
+packaging загружается при первом разборе, а не при импорте модуля.
+"""
+
+import functools
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from metadata_reader import normalize_name
+
+# Имя в начале строки требования или ключа pipdeptree ("requests[socks]>=2.0")
+_NAME_PATTERN = re.compile(r'\s*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)')
+
+# Переменные маркеров PEP 508, которые можно задать для целевого окружения
+MARKER_VARIABLES = (
+    'implementation_name', 'implementation_version', 'os_name', 'platform_machine',
+    'platform_python_implementation', 'platform_release', 'platform_system',
+    'platform_version', 'python_full_version', 'python_version', 'sys_platform',
+)
+
+# Значения os_name и platform_system, которые следуют из sys_platform
+_PLATFORM_DEFAULTS = {
+    'win32': {'os_name': 'nt', 'platform_system': 'Windows'},
+    'cygwin': {'os_name': 'posix', 'platform_system': 'CYGWIN_NT'},
+    'linux': {'os_name': 'posix', 'platform_system': 'Linux'},
+    'darwin': {'os_name': 'posix', 'platform_system': 'Darwin'},
+}
+
+
+class RequirementRecord:
+    """
+    Разобранная строка Requires-Dist
+
+    Args:
+        name: Нормализованное имя пакета
+        specifier: Спецификатор версий (">=2.0,<3"), пустая строка - любая версия
+        extras: Запрошенные extras зависимости (отсортированы)
+        marker: Маркер окружения в каноническом виде или None
+    """
+
+    __slots__ = ('name', 'specifier', 'extras', 'marker')
+
+    def __init__(self, name: str, specifier: str = '', extras: Tuple[str, ...] = (),
+                 marker: Optional[str] = None):
+        self.name = name
+        self.specifier = specifier
+        self.extras = extras
+        self.marker = marker
+
+    def __repr__(self) -> str:
+        extras = f"[{','.join(self.extras)}]" if self.extras else ''
+        marker = f"; {self.marker}" if self.marker else ''
+        return f"RequirementRecord({self.name}{extras}{self.specifier}{marker})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RequirementRecord):
+            return NotImplemented
+        return self.to_tuple() == other.to_tuple()
+
+    def __hash__(self) -> int:
+        return hash(self.to_tuple())
+
+    def to_tuple(self) -> Tuple[str, str, Tuple[str, ...], Optional[str]]:
+        return self.name, self.specifier, self.extras, self.marker
+
+    def to_dict(self) -> Dict:
+        return {'name': self.name, 'specifier': self.specifier,
+                'extras': list(self.extras), 'marker': self.marker}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RequirementRecord':
+        return cls(data['name'], data.get('specifier', ''), tuple(data.get('extras', ())), data.get('marker'))
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_requirement(line: str) -> Optional[RequirementRecord]:
+    """
+    Разобрать строку требования PEP 508
+
+    Маркер отделяется от требования и компилируется отдельно, поэтому
+    одинаковые маркеры разных строк разбираются один раз.
+
+    Returns:
+        Запись зависимости или None, если строка некорректна
+    """
+    from packaging.markers import InvalidMarker
+    from packaging.requirements import InvalidRequirement
+
+    # У требований с URL ";" может входить в адрес, их разбираем целиком
+    requirement_text, separator, marker_text = line.partition(';') if '@' not in line else (line, '', '')
+    try:
+        name, specifier, extras, marker = _parse_base(requirement_text.strip())
+        if separator:
+            marker = str(_compile_marker(marker_text.strip()))
+    except (InvalidRequirement, InvalidMarker):
+        return None
+    return RequirementRecord(name, specifier, extras, marker)
+
+
+@functools.lru_cache(maxsize=8192)
+def _parse_base(text: str) -> Tuple[str, str, Tuple[str, ...], Optional[str]]:
+    from packaging.requirements import Requirement
+
+    requirement = Requirement(text)
+    return (normalize_name(requirement.name), str(requirement.specifier),
+            tuple(sorted(requirement.extras)), str(requirement.marker) if requirement.marker else None)
+
+
+def requirement_name(text: str) -> str:
+    """
+    Нормализованное имя пакета из строки требования без полного разбора
+
+    Подходит для ключей pipdeptree и строки Requires: у pip show, где
+    могут встречаться extras и спецификаторы ("requests[socks]>=2.0").
+    """
+    match = _NAME_PATTERN.match(text)
+    return normalize_name(match.group(1) if match else text.strip())
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_marker(marker: str):
+    from packaging.markers import Marker
+
+    return Marker(marker)
+
+
+class TargetEnvironment:
+    """
+    Окружение, для которого вычисляются маркеры зависимостей
+
+    Значения берутся из текущего интерпретатора и заменяются переданными.
+    Если задана только python_version, python_full_version получает вид
+    "X.Y.0"; если задана только sys_platform, os_name и platform_system
+    выводятся из нее.
+
+    Args:
+        overrides: {переменная маркера: значение}
+    """
+
+    def __init__(self, overrides: Optional[Dict[str, str]] = None):
+        from packaging.markers import default_environment
+
+        overrides = dict(overrides or {})
+        unknown = set(overrides) - set(MARKER_VARIABLES)
+        if unknown:
+            raise ValueError(f"Неизвестные переменные маркеров: {', '.join(sorted(unknown))}")
+
+        values = dict(default_environment())
+        if 'python_version' in overrides and 'python_full_version' not in overrides:
+            values['python_full_version'] = f"{overrides['python_version']}.0"
+        for key, value in _PLATFORM_DEFAULTS.get(overrides.get('sys_platform'), {}).items():
+            if key not in overrides:
+                values[key] = value
+        values.update(overrides)
+
+        self.overrides = overrides
+        self.values = values
+
+    @classmethod
+    def from_spec(cls, spec: str) -> 'TargetEnvironment':
+        """Создать окружение из строки вида "python_version=3.8,sys_platform=win32" """
+        overrides = {}
+        for item in spec.split(','):
+            if not item.strip():
+                continue
+            key, separator, value = item.partition('=')
+            if not separator or not value.strip():
+                raise ValueError(f"Ожидалось переменная=значение: {item.strip()}")
+            overrides[key.strip()] = value.strip()
+        return cls(overrides)
+
+    @property
+    def fingerprint(self) -> str:
+        """Строка, однозначно определяющая значения окружения (для ключей кэша)"""
+        return ';'.join(f"{key}={self.values[key]}" for key in sorted(self.values))
+
+    def __repr__(self) -> str:
+        return f"TargetEnvironment({', '.join(f'{k}={v}' for k, v in sorted(self.overrides.items()))})"
+
+
+class MarkerEvaluator:
+    """
+    Вычисление маркеров для целевого окружения с кэшированием результатов
+
+    Результат запоминается для пары (маркер, extra), поэтому каждый
+    уникальный маркер компилируется и вычисляется один раз.
+
+    Args:
+        environment: Целевое окружение (по умолчанию - текущий интерпретатор)
+    """
+
+    def __init__(self, environment: Optional[TargetEnvironment] = None):
+        self.environment = environment or TargetEnvironment()
+        self.evaluations = 0
+        self._results: Dict[Tuple[str, str], bool] = {}
+        self._variables: Dict[str, Dict[str, str]] = {}
+
+    def evaluate(self, marker: Optional[str], extra: str = '') -> bool:
+        """Применима ли зависимость с данным маркером в целевом окружении"""
+        if not marker:
+            return True
+        key = (marker, extra)
+        result = self._results.get(key)
+        if result is None:
+            variables = self._variables.get(extra)
+            if variables is None:
+                variables = self._variables[extra] = dict(self.environment.values, extra=extra)
+            self.evaluations += 1
+            result = self._results[key] = _compile_marker(marker).evaluate(variables)
+        return result
+
+    def applies(self, record: RequirementRecord, extra: str = '') -> bool:
+        return self.evaluate(record.marker, extra)
+
+    def select(self, records: Iterable[RequirementRecord], extra: str = '') -> List[RequirementRecord]:
+        """Оставить только записи, применимые в целевом окружении"""
+        return [record for record in records if self.evaluate(record.marker, extra)]
@@ -0,0 +1,212 @@
+"""
+Сравнение двух снимков графа (например, прошлой и текущей сборки).
+
+Узлы снимка отсортированы по имени и имеют хэш содержимого, поэтому оба
+снимка обходятся одновременно двумя указателями, а совпадающие участки
+пропускаются блоками: срезы столбцов хэшей сравниваются целиком, длина
+блока удваивается после каждого совпадения и уменьшается при расхождении.
+В Python разбираются только узлы, чьи хэши различаются, и время работы
+определяется числом изменений, а не размером графов.
+
+Изменения выдаются потоком записей:
+    package_added / package_removed  - пакет появился или исчез (с версией)
+    version_changed                  - изменилась версия пакета
+    column_changed                   - изменилось значение другого столбца
+    edge_added / edge_removed        - добавилась или исчезла зависимость
+
+Запуск:
+    python snapshot_diff.py old.snap new.snap [--output diff.json] [--fail-on package_added,version_changed]
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, List, Optional, Set
+
+from graph_snapshot import GraphSnapshot
+
+PACKAGE_ADDED = 'package_added'
+PACKAGE_REMOVED = 'package_removed'
+VERSION_CHANGED = 'version_changed'
+COLUMN_CHANGED = 'column_changed'
+EDGE_ADDED = 'edge_added'
+EDGE_REMOVED = 'edge_removed'
+
+CHANGE_TYPES = (PACKAGE_ADDED, PACKAGE_REMOVED, VERSION_CHANGED, COLUMN_CHANGED, EDGE_ADDED, EDGE_REMOVED)
+
+DIFF_FORMAT_VERSION = 1
+
+# Наибольший блок хэшей, сравниваемый за один шаг
+MAX_BLOCK = 1 << 16
+
+
+class SnapshotDiff:
+    """
+    Потоковое сравнение двух снимков
+
+    Args:
+        old: Снимок прошлой сборки
+        new: Снимок текущей сборки
+    """
+
+    def __init__(self, old: GraphSnapshot, new: GraphSnapshot):
+        self.old = old
+        self.new = new
+        self.columns = sorted(set(old.column_names) | set(new.column_names))
+        # Статистика последнего обхода: сколько узлов пропущено блоками и сколько разобрано
+        self.skipped = 0
+        self.examined = 0
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.changes()
+
+    def changes(self) -> Iterator[Dict]:
+        """Выдавать изменения по мере обнаружения (в порядке имен пакетов)"""
+        old, new = self.old, self.new
+        old_hashes, new_hashes = old.hashes, new.hashes
+        old_count, new_count = len(old), len(new)
+        self.skipped = self.examined = 0
+
+        i = j = 0
+        block = 1
+        while i < old_count and j < new_count:
+            size = min(block, old_count - i, new_count - j)
+            if old_hashes[i:i + size] == new_hashes[j:j + size]:
+                i += size
+                j += size
+                self.skipped += size
+                block = min(block * 2, MAX_BLOCK)
+                continue
+            if size > 1:
+                # Расхождение внутри блока: уменьшаем блок, пока не дойдем до одного узла
+                block = size // 2
+                continue
+
+            block = 1
+            self.examined += 1
+            old_name = old.name(i).encode('utf-8')
+            new_name = new.name(j).encode('utf-8')
+            if old_name == new_name:
+                yield from self._changed_node(i, j)
+                i += 1
+                j += 1
+            elif old_name < new_name:
+                yield from self._removed_node(i)
+                i += 1
+            else:
+                yield from self._added_node(j)
+                j += 1
+
+        for node in range(i, old_count):
+            self.examined += 1
+            yield from self._removed_node(node)
+        for node in range(j, new_count):
+            self.examined += 1
+            yield from self._added_node(node)
+
+    @staticmethod
+    def _value(snapshot: GraphSnapshot, column: str, node: int) -> Optional[str]:
+        return snapshot.value(column, node) if column in snapshot.column_names else None
+
+    @staticmethod
+    def _dependencies(snapshot: GraphSnapshot, node: int) -> List[str]:
+        return [snapshot.name(target) for target in snapshot.neighbors(node)]
+
+    def _added_node(self, node: int) -> Iterator[Dict]:
+        name = self.new.name(node)
+        yield {'type': PACKAGE_ADDED, 'package': name, 'version': self._value(self.new, 'version', node)}
+        for dep in sorted(set(self._dependencies(self.new, node))):
+            yield {'type': EDGE_ADDED, 'package': name, 'dependency': dep}
+
+    def _removed_node(self, node: int) -> Iterator[Dict]:
+        name = self.old.name(node)
+        yield {'type': PACKAGE_REMOVED, 'package': name, 'version': self._value(self.old, 'version', node)}
+        for dep in sorted(set(self._dependencies(self.old, node))):
+            yield {'type': EDGE_REMOVED, 'package': name, 'dependency': dep}
+
+    def _changed_node(self, old_node: int, new_node: int) -> Iterator[Dict]:
+        name = self.old.name(old_node)
+        for column in self.columns:
+            before = self._value(self.old, column, old_node)
+            after = self._value(self.new, column, new_node)
+            if before == after:
+                continue
+            if column == 'version':
+                yield {'type': VERSION_CHANGED, 'package': name, 'old': before, 'new': after}
+            else:
+                yield {'type': COLUMN_CHANGED, 'package': name, 'column': column, 'old': before, 'new': after}
+
+        before: Set[str] = set(self._dependencies(self.old, old_node))
+        after: Set[str] = set(self._dependencies(self.new, new_node))
+        for dep in sorted(after - before):
+            yield {'type': EDGE_ADDED, 'package': name, 'dependency': dep}
+        for dep in sorted(before - after):
+            yield {'type': EDGE_REMOVED, 'package': name, 'dependency': dep}
+
+
+def write_diff(diff: SnapshotDiff, handle, jsonl: bool = False) -> Dict[str, int]:
+    """
+    Записать изменения по мере их обнаружения
+
+    Формат JSON - один документ {"version", "old", "new", "changes": [...], "summary"},
+    JSON lines - одна запись на строку и итоговая запись {"type": "summary", ...}.
+
+    Returns:
+        Число изменений каждого типа
+    """
+    summary = dict.fromkeys(CHANGE_TYPES, 0)
+    if not jsonl:
+        handle.write(json.dumps({'version': DIFF_FORMAT_VERSION, 'old': diff.old.filename,
+                                 'new': diff.new.filename}, ensure_ascii=False)[:-1])
+        handle.write(', "changes": [')
+
+    first = True
+    for change in diff.changes():
+        summary[change['type']] += 1
+        record = json.dumps(change, ensure_ascii=False)
+        if jsonl:
+            handle.write(record + '\n')
+        else:
+            handle.write(('\n' if first else ',\n') + record)
+        first = False
+
+    totals = {'changes': summary, 'old_packages': len(diff.old), 'new_packages': len(diff.new),
+              'skipped': diff.skipped, 'examined': diff.examined}
+    if jsonl:
+        handle.write(json.dumps({'type': 'summary', **totals}, ensure_ascii=False) + '\n')
+    else:
+        handle.write('\n], "summary": ' + json.dumps(totals, ensure_ascii=False) + '}\n')
+    return summary
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Сравнение двух снимков графа зависимостей")
+    arg_parser.add_argument('old', help="снимок прошлой сборки")
+    arg_parser.add_argument('new', help="снимок текущей сборки")
+    arg_parser.add_argument('--output', default=None, help="файл результата (по умолчанию - stdout)")
+    arg_parser.add_argument('--jsonl', action='store_true', help="писать JSON lines вместо одного документа")
+    arg_parser.add_argument('--fail-on', default=None,
+                            help=f"типы изменений через запятую, дающие код выхода 1 ({', '.join(CHANGE_TYPES)})")
+    args = arg_parser.parse_args(argv)
+
+    fail_on = [change_type.strip() for change_type in (args.fail_on or '').split(',') if change_type.strip()]
+    unknown = set(fail_on) - set(CHANGE_TYPES)
+    if unknown:
+        arg_parser.error(f"неизвестные типы изменений: {', '.join(sorted(unknown))}")
+
+    with GraphSnapshot(args.old) as old, GraphSnapshot(args.new) as new:
+        diff = SnapshotDiff(old, new)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                summary = write_diff(diff, f, args.jsonl)
+        else:
+            summary = write_diff(diff, sys.stdout, args.jsonl)
+
+    if args.output:
+        print(f"Изменений: {sum(summary.values())} ({', '.join(f'{key} {value}' for key, value in summary.items() if value) or 'нет'})",
+              file=sys.stderr)
+    return 1 if any(summary[change_type] for change_type in fail_on) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())